@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""Report hot partitions and key skew, and simulate write-sharded GSI keys.
+
+Streams a table or snapshot once and reports, for the busiest values of
+``PK``, ``GSI1PK`` and ``GSI2PK``, the item count, stored bytes and the write
+rate over the last ``--window-days`` of writes (average and peak hour, in
+WCU/s against the 1000 WCU/s a partition takes). Constant GSI partitions
+(``USER``, ``PRODUCT``, ``CART``, ...) and any ``--simulate`` value are then
+replayed as ``<value>#0..N-1`` for each ``--shards`` count. See
+``ddbtools/skew.py``.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from functools import partial
+
+from ddbtools.scan import DEFAULT_SEGMENTS, scan_segments
+from ddbtools.skew import DEFAULT_SHARDS, PARTITION_WCU, SHARD_SPACE, SkewAnalyzer
+from ddbtools.snapshot import read_snapshot
+from ddbtools.transport import TransportError, add_transport_args, transport_from_args
+
+SOURCE = "swami-rupeshwaranand-api-prod-main"
+
+def source_items(args):
+    """Raw items of the source snapshot directory or table."""
+    if os.path.exists(os.path.join(args.source, "manifest.json")):
+        yield from read_snapshot(args.source)
+        return
+    args.table = args.source
+    transport = transport_from_args(args)
+    scan = partial(transport.call, "Scan")
+    for _, page in scan_segments(scan, args.segments, TableName=args.source):
+        yield from page.get("Items", [])
+    if hasattr(transport, "report"):
+        print(transport.report())
+
+def shard_counts(value):
+    counts = tuple(int(n) for n in value.split(","))
+    for count in counts:
+        if count < 2 or SHARD_SPACE % count:
+            raise argparse.ArgumentTypeError(f"shard counts must be divisors of {SHARD_SPACE} above 1")
+    return counts
+
+def size(n):
+    for unit in ("B", "KB", "MB", "GB"):
+        if n < 1024 or unit == "GB":
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+
+def print_report(report):
+    window = report["window"]
+    print(f"\n{report['items']} items, {size(report['bytes'])}; "
+          f"write window {window['from']}h .. {window['to']}h ({window['days']} days)")
+    for attribute, summary in report["attributes"].items():
+        skew = f", write skew x{summary['writeSkew']:.0f}" if "writeSkew" in summary else ""
+        print(f"\n{attribute}: {summary['values']} values over {summary['items']} items, "
+              f"item skew x{summary['itemSkew']:.0f}{skew}")
+        for row in summary["top"]:
+            line = f"  {row['value'][:40]:<40} {row['items']:>8} items {row['itemShare']:6.1%} {size(row['bytes']):>9}"
+            if "peakWcuPerSecond" in row:
+                line += (f"  writes {row['writeShare']:6.1%}  avg {row['averageWcuPerSecond']:.3g}"
+                         f"  peak {row['peakWcuPerSecond']:.3g} WCU/s")
+                if row["overPartitionWcu"]:
+                    line += f"  OVER {PARTITION_WCU} WCU/s"
+            if row["overPartitionSize"]:
+                line += "  OVER 10 GB"
+            print(line)
+    if report["simulations"]:
+        print("\nWrite sharding (busiest shard, peak hour over the window):")
+    for simulation in report["simulations"]:
+        options = "  ".join(f"{o['shards']}: {o['peakWcuPerSecond']:.3g} WCU/s x{o['imbalance']:.2f}"
+                            for o in simulation["options"])
+        print(f"  {simulation['attribute']}={simulation['value']:<24} {options}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("source", nargs="?", default=SOURCE, help="table or snapshot directory")
+    parser.add_argument("--top", type=int, default=10, help="values listed per key attribute")
+    parser.add_argument("--window-days", type=int, default=30,
+                        help="days of writes, up to the latest one, that rates are taken over")
+    parser.add_argument("--shards", type=shard_counts, default=DEFAULT_SHARDS,
+                        help=f"comma-separated shard counts to simulate, divisors of {SHARD_SPACE} "
+                             f"(default: {','.join(map(str, DEFAULT_SHARDS))})")
+    parser.add_argument("--simulate", action="append", default=[], metavar="VALUE",
+                        help="also simulate sharding this GSI1PK/GSI2PK value; repeatable")
+    parser.add_argument("--out", help="also write the report as JSON to this file")
+    parser.add_argument("--segments", type=int, default=DEFAULT_SEGMENTS,
+                        help="parallel scan segments (1 = sequential scan)")
+    add_transport_args(parser)
+    args = parser.parse_args()
+
+    started = time.monotonic()
+    print(f"Analyzing partition keys of {args.source}...")
+    analyzer = SkewAnalyzer(args.simulate)
+    for item in source_items(args):
+        analyzer.add(item)
+        if analyzer.items % 100000 == 0:
+            print(f"  [{analyzer.items}] items read")
+    report = analyzer.report(args.top, args.window_days, args.shards)
+    report["source"] = args.source
+    print_report(report)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.out}")
+    print(f"Elapsed: {time.monotonic() - started:.1f}s")
+
+if __name__ == "__main__":
+    try:
+        main()
+    except TransportError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(1)
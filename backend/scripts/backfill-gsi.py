@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""Backfill new secondary-index keys onto existing rows, then check coverage.
+
+Backfills are declared in ``ddbtools/backfill.py`` (``BACKFILLS``): an entity
+and the key templates of the index attributes to add. Writes are parallel,
+conditional ``UpdateItem`` calls held to the write budget; this is a dry run
+unless ``--apply`` is given.
+"""
+
+import argparse
+import sys
+import time
+
+from ddbtools.access import TableAccess
+from ddbtools.backfill import BACKFILLS, BackfillRunner
+from ddbtools.batch import DEFAULT_CONCURRENCY
+from ddbtools.scan import DEFAULT_SEGMENTS
+from ddbtools.transport import TransportError, add_transport_args, transport_from_args
+
+TABLE = "swami-rupeshwaranand-api-dev-main"
+
+def print_coverage(counts):
+    covered = counts["covered"] / counts["items"] if counts["items"] else 1.0
+    print(f"  Coverage: {counts['covered']} of {counts['items']} items ({covered:.2%}); "
+          f"{counts['missing']} missing, {counts['stale']} stale, "
+          f"{counts['uncomputable']} missing a source attribute")
+    print(f"  Index check: {counts['found']} of {counts['sampled']} sampled items found through the index")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("backfill", nargs="*", metavar="NAME",
+                        help=f"backfills to run: {', '.join(sorted(BACKFILLS))} (default: all)")
+    parser.add_argument("--table", default=TABLE)
+    parser.add_argument("--apply", action="store_true", help="write changes (default is a dry run)")
+    parser.add_argument("--check", action="store_true", help="only report coverage, write nothing")
+    parser.add_argument("--sample", type=int, default=20,
+                        help="covered items to look up through the index when checking coverage")
+    parser.add_argument("--segments", type=int, default=DEFAULT_SEGMENTS,
+                        help="parallel scan segments (1 = sequential scan)")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help="conditional updates in flight at once")
+    parser.add_argument("--no-index", action="store_true",
+                        help="scan the table even where an index query would do")
+    add_transport_args(parser)
+    args = parser.parse_args()
+    unknown = set(args.backfill) - set(BACKFILLS)
+    if unknown:
+        parser.error(f"unknown backfill(s): {', '.join(sorted(unknown))}")
+    names = args.backfill or sorted(BACKFILLS)
+
+    transport = transport_from_args(args)
+    access = TableAccess(transport, args.table, args.segments, use_indexes=not args.no_index)
+    runner = BackfillRunner(transport, args.table, access, args.concurrency, dry_run=not args.apply)
+
+    def progress(result):
+        print(f"  [{result.read}] items read, {result.updated} updated")
+
+    mode = "CHECK" if args.check else "APPLY" if args.apply else "DRY RUN"
+    print(f"{mode}: {len(names)} backfills against {args.table}")
+    failed = False
+    for name in names:
+        backfill = BACKFILLS[name]
+        templates = ", ".join(f"{k} = {v}" for k, v in backfill.attributes.items())
+        print(f"\n{name}: {backfill.entity} -> {backfill.index} ({templates})")
+        started = time.monotonic()
+        if not args.check:
+            result = runner.run(backfill, progress)
+            print(f"  {result.summary()} in {time.monotonic() - started:.1f}s")
+            for error in result.errors[:10]:
+                print(f"  ERROR: {error}", file=sys.stderr)
+            failed = failed or bool(result.errors)
+        if args.check or args.apply:
+            counts = runner.coverage(backfill, args.sample)
+            print_coverage(counts)
+            failed = failed or counts["missing"] + counts["stale"] > 0
+
+    print()
+    print(access.report())
+    if hasattr(transport, "report"):
+        print(transport.report())
+    if failed:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    try:
+        main()
+    except TransportError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(1)
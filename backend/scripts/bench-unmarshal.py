@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""Benchmark the DynamoDB-JSON decoders on items shaped like the CMS and order data."""
+
+import argparse
+import json
+import time
+
+from ddbtools import codec
+from ddbtools.codec import decode, marshal, unmarshal
+
+def localized(text):
+    return {"en": text, "hi": f"{text} (हिंदी)"}
+
+def sample_items():
+    """A CMS page, a component with a large bilingual fields list, an order and a user."""
+    page = {
+        "PK": "CMS_PAGE#p1", "SK": "CMS_PAGE#p1", "GSI1PK": "CMS_PAGE", "GSI1SK": "ORDER#001#home",
+        "id": "p1", "slug": "home", "title": localized("Home"), "description": localized("Welcome"),
+        "path": "/", "status": "published", "displayOrder": 1, "componentIds": [f"c{i}" for i in range(8)],
+        "createdAt": "2025-01-01T00:00:00.000Z", "updatedAt": "2025-01-02T00:00:00.000Z",
+    }
+    component = {
+        "PK": "CMS_COMPONENT#c1", "SK": "CMS_COMPONENT#c1", "GSI1PK": "PAGE#p1",
+        "GSI1SK": "ORDER#001#hero_section", "id": "c1", "pageId": "p1", "componentType": "hero_section",
+        "name": localized("Hero"), "displayOrder": 1, "isVisible": True,
+        "fields": [{"key": f"heading{i}", "localizedValue": localized(f"Heading {i}")} for i in range(30)]
+        + [{"key": "slides", "value": [{"imageUrl": f"https://cdn/{i}.jpg", "heading": localized("Slide")}
+                                       for i in range(5)]},
+           {"key": "overlayOpacity", "value": 0.5}],
+        "createdAt": "2025-01-01T00:00:00.000Z", "updatedAt": "2025-01-02T00:00:00.000Z",
+    }
+    order = {
+        "PK": "ORDER#o1", "SK": "ORDER#o1", "GSI1PK": "ORDER", "GSI1SK": "DATE#2025-01-01",
+        "GSI2PK": "USER#u1", "GSI2SK": "ORDER#2025-01-01", "id": "o1", "userId": "u1",
+        "userEmail": "devotee@example.com", "status": "confirmed", "totalItems": 3, "totalAmount": 1497,
+        "currency": "INR", "paymentStatus": "captured",
+        "items": [{"productId": f"pr{i}", "title": "Rudraksha Mala", "price": 499, "quantity": 1}
+                  for i in range(3)],
+        "shippingAddress": {"name": "Devotee", "city": "Varanasi", "pincode": "221001"},
+        "createdAt": "2025-01-01T00:00:00.000Z", "updatedAt": "2025-01-02T00:00:00.000Z",
+    }
+    user = {
+        "PK": "USER#u1", "SK": "USER#u1", "GSI1PK": "USER", "GSI1SK": "EMAIL#devotee@example.com",
+        "id": "u1", "email": "devotee@example.com", "name": "Devotee", "role": "user", "status": "active",
+        "createdAt": "2025-01-01T00:00:00.000Z", "updatedAt": "2025-01-02T00:00:00.000Z",
+    }
+    return [marshal(i) for i in (page, component, order, user)]
+
+def bench(label, fn, items, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for item in items:
+            fn(item)
+    elapsed = time.perf_counter() - started
+    print(f"  {label:40s} {repeat * len(items) / elapsed:>12,.0f} items/s")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=5000, help="passes over the sample items")
+    args = parser.parse_args()
+
+    items = sample_items()
+    for item in items:
+        assert decode(item) == unmarshal(item), item["PK"]
+    lines = [json.dumps(item, ensure_ascii=False) for item in items]
+    projection = ("PK", "SK", "slug", "pageId", "createdAt")
+
+    print(f"Decoding {len(items)} sample items x {args.repeat}:")
+    bench("unmarshal (generic)", unmarshal, items, args.repeat)
+    bench("decode (compiled per entity)", decode, items, args.repeat)
+    bench("decode (projection of 5 attributes)", lambda i: decode(i, projection), items, args.repeat)
+    try:
+        from boto3.dynamodb.types import TypeDeserializer
+    except ImportError:
+        print("  boto3 TypeDeserializer                   (boto3 not installed)")
+    else:
+        deserializer = TypeDeserializer()
+        bench("boto3 TypeDeserializer", lambda i: {k: deserializer.deserialize(v) for k, v in i.items()},
+              items, args.repeat)
+
+    print("\nParsing raw JSON lines:")
+    bench("json.loads", json.loads, lines, args.repeat)
+    if codec.loads is not json.loads:
+        bench("orjson.loads", codec.loads, lines, args.repeat)
+    else:
+        print("  orjson.loads                             (orjson not installed)")
+    bench("codec.loads + decode", lambda line: decode(codec.loads(line)), lines, args.repeat)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""Benchmark the maintenance workloads across table sizes and concurrency levels."""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from datetime import datetime, timezone
+
+from ddbtools.bench import WORKLOADS, create_table, load_table, peak_rss_mb, regressions, run_case
+from ddbtools.generate import DataGenerator
+from ddbtools.memory import MemoryTransport
+from ddbtools.snapshot import SnapshotWriter, read_snapshot
+from ddbtools.transport import TransportError, add_transport_args, make_transport
+
+RESULTS = "bench-results.json"
+
+def int_list(value):
+    return [int(v) for v in value.split(",") if v]
+
+def data_dir(args, size):
+    return os.path.join(args.data_dir, f"synthetic-{size}-seed{args.seed}-dup{args.duplicate_rate}")
+
+def ensure_data(args, size):
+    """Generate the snapshot a size's cases load, once."""
+    directory = data_dir(args, size)
+    if os.path.exists(os.path.join(directory, "manifest.json")):
+        return
+    print(f"Generating {size} items into {directory}...")
+    generator = DataGenerator(seed=args.seed, duplicate_rate=args.duplicate_rate)
+    writer = SnapshotWriter(directory, table="benchmark")
+    for item in generator.items(size):
+        writer.write(item)
+    writer.close()
+
+def run_one(args, case):
+    """Run a single case in this process and print its result as JSON."""
+    workload, size, concurrency = case["workload"], case["size"], case["concurrency"]
+    table = f"bench-{workload}-{size}-{concurrency}"
+    if args.transport == "memory":
+        transport = MemoryTransport(latency=args.latency_ms / 1000)
+    else:
+        transport = make_transport(args.transport, args.profile, args.region,
+                                   args.endpoint_url, args.max_pool_connections)
+        create_table(transport, table)
+    try:
+        loaded = load_table(transport, table, read_snapshot(data_dir(args, size)))
+        loaded_rss = peak_rss_mb()
+        result = run_case(workload, transport, table, loaded, concurrency)
+        result.update(size=size, items=loaded, rssGrowthMb=round(result["peakRssMb"] - loaded_rss, 1))
+    finally:
+        if args.transport != "memory":
+            transport.call("DeleteTable", TableName=table)
+    print(json.dumps(result))
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workloads", default=",".join(WORKLOADS),
+                        help=f"comma-separated, from: {', '.join(WORKLOADS)}")
+    parser.add_argument("--sizes", type=int_list, default=[10_000, 100_000], help="table sizes, e.g. 10000,100000")
+    parser.add_argument("--concurrency", type=int_list, default=[1, 4, 8], help="e.g. 1,4,8")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--duplicate-rate", type=float, default=0.05)
+    parser.add_argument("--latency-ms", type=float, default=2.0,
+                        help="simulated round trip per request for the memory transport")
+    parser.add_argument("--data-dir", default="bench-data", help="where generated table snapshots are cached")
+    parser.add_argument("--results", default=RESULTS, help="results file to write")
+    parser.add_argument("--baseline", help="results file to compare against")
+    parser.add_argument("--threshold", type=float, default=10.0,
+                        help="fail when throughput drops or peak RSS grows by more than this %%")
+    parser.add_argument("--case", help=argparse.SUPPRESS)
+    add_transport_args(parser)
+    parser.set_defaults(transport="memory")
+    args = parser.parse_args()
+
+    if args.case:
+        run_one(args, json.loads(args.case))
+        return
+
+    workloads = [w for w in args.workloads.split(",") if w]
+    unknown = set(workloads) - set(WORKLOADS)
+    if unknown:
+        parser.error(f"unknown workload(s): {', '.join(sorted(unknown))}")
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["cases"]
+
+    # Each case runs in a fresh process so peak RSS and caches are its own
+    passthrough = list(sys.argv[1:])
+    results = []
+    for size in args.sizes:
+        ensure_data(args, size)
+        for workload in workloads:
+            for concurrency in args.concurrency:
+                case = {"workload": workload, "size": size, "concurrency": concurrency}
+                completed = subprocess.run(
+                    [sys.executable, os.path.abspath(__file__), *passthrough, "--case", json.dumps(case)],
+                    capture_output=True, text=True,
+                )
+                if completed.returncode != 0:
+                    print(completed.stderr, file=sys.stderr)
+                    sys.exit(f"Case {case} failed")
+                result = json.loads(completed.stdout.strip().splitlines()[-1])
+                results.append(result)
+                print(f"  {workload:15s} size={size:<9} concurrency={concurrency:<3} "
+                      f"{result['itemsPerSecond']:>10,.0f} items/s  p50 {result['p50Ms']:.1f} ms  "
+                      f"p99 {result['p99Ms']:.1f} ms  RSS {result['peakRssMb']:.0f} MB  "
+                      f"{result['rcu']:.0f} RCU  {result['wcu']:.0f} WCU")
+
+    with open(args.results, "w", encoding="utf-8") as f:
+        json.dump({
+            "createdAt": datetime.now(timezone.utc).isoformat(timespec="seconds").replace("+00:00", "Z"),
+            "commit": git_commit(),
+            "transport": args.transport,
+            "latencyMs": args.latency_ms if args.transport == "memory" else None,
+            "cases": results,
+        }, f, indent=2)
+    print(f"\nResults written to {args.results}")
+
+    if baseline is not None:
+        found = regressions(baseline, results, args.threshold / 100)
+        for regression in found:
+            print(f"REGRESSION: {regression}", file=sys.stderr)
+        if found:
+            sys.exit(1)
+        print(f"No regressions beyond {args.threshold:g}% against {args.baseline}")
+
+if __name__ == "__main__":
+    try:
+        main()
+    except TransportError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(1)
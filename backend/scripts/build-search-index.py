@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""Build the bilingual search index of products, events and CMS pages.
+
+Streams the searchable rows of each type once and writes one memory-mappable
+BM25 shard per type and locale, plus a ``manifest.json`` (see
+``ddbtools/search.py`` for the normalisation and the file format). With
+``--query`` it searches an existing index instead, to check the ranking.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
+
+from ddbtools.access import TableAccess
+from ddbtools.codec import decode
+from ddbtools.scan import DEFAULT_SEGMENTS
+from ddbtools.search import (LOCALES, PROJECTION, SEARCH_TYPES, IndexBuilder, document_terms,
+                             load_manifest, open_shard, searchable, shard_name)
+from ddbtools.transport import TransportError, add_transport_args, transport_from_args
+
+TABLE = "swami-rupeshwaranand-api-prod-main"
+
+def build(access, args, types):
+    built = datetime.now(timezone.utc).isoformat(timespec="seconds").replace("+00:00", "Z")
+    manifest = {"table": args.table, "builtAt": built, "shards": {}}
+    os.makedirs(args.out, exist_ok=True)
+    for search_type in types:
+        entity = SEARCH_TYPES[search_type]
+        builders = {locale: IndexBuilder() for locale in LOCALES}
+        read = 0
+        for item in access.items(entity, PROJECTION):
+            read += 1
+            row = decode(item, PROJECTION, None)
+            if not searchable(entity, row):
+                continue
+            for locale, builder in builders.items():
+                builder.add(row["id"], document_terms(entity, row, locale))
+        for locale, builder in builders.items():
+            name = shard_name(search_type, locale)
+            size = builder.write(os.path.join(args.out, f"{name}.idx"))
+            manifest["shards"][name] = {"entity": entity, "locale": locale, "file": f"{name}.idx",
+                                        "documents": len(builder.ids), "terms": len(builder.postings),
+                                        "bytes": size}
+            print(f"  {name}: {len(builder.ids)} of {read} {entity} rows, "
+                  f"{len(builder.postings)} terms, {size / 1024:.1f} KB")
+
+    # Shards of types not rebuilt this time stay listed
+    path = os.path.join(args.out, "manifest.json")
+    if os.path.exists(path):
+        previous = load_manifest(args.out)["shards"]
+        manifest["shards"] = dict(previous, **manifest["shards"])
+    with open(f"{path}.tmp", "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(f"{path}.tmp", path)
+
+def query(args, types):
+    for search_type in types:
+        with open_shard(args.out, search_type, args.locale) as index:
+            started = time.perf_counter()
+            results = index.search(args.query, args.limit)
+            elapsed = (time.perf_counter() - started) * 1000
+        print(f"{search_type} ({args.locale}): {len(results)} results in {elapsed:.2f} ms")
+        for doc_id, score in results:
+            print(f"  {score:7.3f}  {doc_id}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--table", default=TABLE)
+    parser.add_argument("--out", default="search-index", help="index directory")
+    parser.add_argument("--type", action="append", choices=sorted(SEARCH_TYPES),
+                        help="search type to build or query; repeatable (default: all)")
+    parser.add_argument("--query", help="search the existing index instead of building it")
+    parser.add_argument("--locale", choices=LOCALES, default="en", help="locale for --query")
+    parser.add_argument("--limit", type=int, default=10, help="results per type for --query")
+    parser.add_argument("--segments", type=int, default=DEFAULT_SEGMENTS,
+                        help="parallel scan segments (1 = sequential scan)")
+    parser.add_argument("--no-index", action="store_true",
+                        help="scan the table even where a GSI1 query would do")
+    add_transport_args(parser)
+    args = parser.parse_args()
+    types = args.type or list(SEARCH_TYPES)
+    if args.query is not None:
+        query(args, types)
+        return
+
+    transport = transport_from_args(args)
+    access = TableAccess(transport, args.table, args.segments, use_indexes=not args.no_index)
+    started = time.monotonic()
+    print(f"Indexing {', '.join(types)} from {args.table} into {args.out}/...")
+    build(access, args, types)
+    print(f"\nDone in {time.monotonic() - started:.1f}s")
+    print(access.report())
+    if hasattr(transport, "report"):
+        print(transport.report())
+
+if __name__ == "__main__":
+    try:
+        main()
+    except TransportError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(1)
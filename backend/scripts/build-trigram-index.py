@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""Build or update the trigram index for substring and typo-tolerant search.
+
+Indexes the same fields as ``build-search-index.py`` (title, subtitle and
+description, page title and slug) in both locales into a SQLite file; see
+``ddbtools/trigram.py``. Every run reads all rows of the indexed types, as a
+rebuild does, because deleted rows are only noticed by their absence; only
+rows whose ``updatedAt`` changed since the last run are re-indexed unless
+``--reindex-all`` is given. With ``--query`` it searches the existing index
+instead.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+from ddbtools.access import TableAccess
+from ddbtools.codec import decode
+from ddbtools.scan import DEFAULT_SEGMENTS
+from ddbtools.search import LOCALES, PROJECTION, SEARCH_TYPES, searchable, shard_name
+from ddbtools.transport import TransportError, add_transport_args, transport_from_args
+from ddbtools.trigram import TrigramIndex
+
+TABLE = "swami-rupeshwaranand-api-prod-main"
+
+def build(access, index, args, types):
+    projection = PROJECTION + ("updatedAt", "createdAt")
+    for search_type in types:
+        entity = SEARCH_TYPES[search_type]
+        rows = [row for row in (decode(item, projection, None) for item in access.items(entity, projection))
+                if searchable(entity, row)]
+        for locale in LOCALES:
+            name = shard_name(search_type, locale)
+            indexed, unchanged, removed = index.update(name, entity, locale, rows, reindex_all=args.reindex_all)
+            print(f"  {name}: {indexed} indexed, {unchanged} unchanged, {removed} removed")
+
+def query(index, args, types):
+    for search_type in types:
+        started = time.perf_counter()
+        results = index.search(shard_name(search_type, args.locale), args.query, args.limit,
+                               args.max_distance)
+        elapsed = (time.perf_counter() - started) * 1000
+        print(f"{search_type} ({args.locale}): {len(results)} results in {elapsed:.2f} ms")
+        for doc_id, distance in results:
+            print(f"  {'exact' if distance == 0 else f'{distance} edits':>8}  {doc_id}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--table", default=TABLE)
+    parser.add_argument("--out", default=os.path.join("search-index", "trigrams.sqlite"),
+                        help="index file")
+    parser.add_argument("--type", action="append", choices=sorted(SEARCH_TYPES),
+                        help="search type to index or query; repeatable (default: all)")
+    parser.add_argument("--reindex-all", action="store_true",
+                        help="re-index every row read, changed or not (the read is the same either way)")
+    parser.add_argument("--query", help="search the existing index instead of updating it")
+    parser.add_argument("--locale", choices=LOCALES, default="en", help="locale for --query")
+    parser.add_argument("--limit", type=int, default=10, help="results per type for --query")
+    parser.add_argument("--max-distance", type=int,
+                        help="edits tolerated by --query (default: one per five characters)")
+    parser.add_argument("--segments", type=int, default=DEFAULT_SEGMENTS,
+                        help="parallel scan segments (1 = sequential scan)")
+    parser.add_argument("--no-index", action="store_true",
+                        help="scan the table even where a GSI1 query would do")
+    add_transport_args(parser)
+    args = parser.parse_args()
+    types = args.type or list(SEARCH_TYPES)
+    if args.query is not None:
+        if not os.path.exists(args.out):
+            parser.error(f"{args.out} does not exist; build it first")
+        with TrigramIndex(args.out) as index:
+            query(index, args, types)
+        return
+
+    transport = transport_from_args(args)
+    access = TableAccess(transport, args.table, args.segments, use_indexes=not args.no_index)
+    os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+    started = time.monotonic()
+    print(f"Reading {', '.join(types)} from {args.table} to re-index "
+          f"{'every row' if args.reindex_all else 'changed rows'} in {args.out}...")
+    with TrigramIndex(args.out) as index:
+        build(access, index, args, types)
+    print(f"\nDone in {time.monotonic() - started:.1f}s")
+    print(access.report())
+    if hasattr(transport, "report"):
+        print(transport.report())
+
+if __name__ == "__main__":
+    try:
+        main()
+    except TransportError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(1)
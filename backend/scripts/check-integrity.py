@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""Find rows whose parent row is gone, for every foreign key in the table.
+
+The foreign keys are declared in ``ddbtools/schema.py`` (``RELATIONS``) and all
+of them are checked in one parallel scan. Orphans are written as JSON lines;
+pass the report back with ``--delete`` to remove them. Only owned children
+(relations with a ``lookup``, such as components and ticket replies) are
+deleted by default. Orders, payments and subscriptions whose parent is gone
+are records in their own right and are only deleted if their relation is
+named with ``--relation``.
+"""
+
+import argparse
+import sys
+import time
+from functools import partial
+
+from ddbtools.access import projection_params
+from ddbtools.batch import DEFAULT_CONCURRENCY, batch_delete
+from ddbtools.checkpoint import Journal, add_journal_args
+from ddbtools.codec import decode
+from ddbtools.integrity import IntegrityCheck, keys_from_report, write_report
+from ddbtools.scan import DEFAULT_SEGMENTS, prefix_filter, scan_segments
+from ddbtools.schema import RELATIONS
+from ddbtools.transport import TransportError, add_transport_args, transport_from_args
+
+TABLE = "swami-rupeshwaranand-api-prod-main"
+REPORT = "orphans.jsonl"
+
+def check(transport, journal, args, relations):
+    integrity = IntegrityCheck(relations)
+    projection = integrity.projection
+    params = prefix_filter(integrity.prefixes)
+    proj = projection_params(projection)
+    params["ProjectionExpression"] = proj["ProjectionExpression"]
+    params["ExpressionAttributeNames"].update(proj["ExpressionAttributeNames"])
+    scan = partial(transport.call, "Scan")
+
+    print(f"Scanning {args.table} for {', '.join(integrity.prefixes)} rows...")
+    journal.spool(
+        "rows",
+        lambda start_keys, skip: scan_segments(scan, args.segments, start_keys, skip,
+                                               TableName=args.table, **params),
+        lambda items: (decode(item, projection, "") for item in items),
+    )
+    for row in journal.rows("rows"):
+        integrity.add(row)
+    print(f"Read {integrity.rows} rows")
+
+    counts = write_report(args.out, integrity.orphans())
+    print()
+    for relation in integrity.relations:
+        print(f"  {relation.name:45s} {integrity.checked[relation.name]:>9} checked  "
+              f"{counts[relation.name]:>7} orphaned")
+    print(f"\n{sum(counts.values())} orphans written to {args.out}")
+    return counts
+
+def deletable(relations, explicit):
+    """The relations ``--delete`` may remove orphans of: owned children, unless named explicitly."""
+    if explicit:
+        return relations, []
+    return [r for r in relations if r.lookup], [r for r in relations if not r.lookup]
+
+def delete(transport, journal, args, relations):
+    relations, skipped = deletable(relations, bool(args.relation))
+    for relation in skipped:
+        print(f"Skipping {relation.name}: not an owned child, "
+              f"pass --relation '{relation.name}' to delete its orphans")
+    names = {r.name for r in relations}
+
+    def progress(stats):
+        print(f"  [{stats.items}] orphans deleted")
+
+    def written(entries):
+        journal.mark_written("deleted", [e["DeleteRequest"]["Key"] for e in entries])
+
+    print(f"Deleting the orphans listed in {args.delete}...")
+    keys = journal.unwritten("deleted", keys_from_report(args.delete, names))
+    stats = batch_delete(transport, args.table, keys, concurrency=args.concurrency,
+                         on_batch=progress, on_written=written)
+    print(f"  {stats.summary()}")
+    for error in stats.errors:
+        print(f"ERROR: {error}", file=sys.stderr)
+    print(f"\nDone! Deleted {journal.written_count('deleted')} orphans. "
+          f"Re-run the check: removed rows may have been parents themselves.")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--table", default=TABLE)
+    parser.add_argument("--relation", action="append", choices=[r.name for r in RELATIONS],
+                        help="foreign key to check or delete orphans of, repeatable (default: all)")
+    parser.add_argument("--out", default=REPORT, help="orphan report to write (default: %(default)s)")
+    parser.add_argument("--delete", metavar="REPORT", help="delete the orphans listed in a report instead")
+    parser.add_argument("--segments", type=int, default=DEFAULT_SEGMENTS,
+                        help="parallel scan segments (1 = sequential scan)")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help="BatchWriteItem requests in flight at once")
+    add_journal_args(parser, "check-integrity.journal.sqlite")
+    add_transport_args(parser)
+    args = parser.parse_args()
+    relations = [r for r in RELATIONS if not args.relation or r.name in args.relation]
+
+    transport = transport_from_args(args)
+    journal = Journal(args.journal, args.resume, table=args.table, segments=args.segments,
+                      relations=[r.name for r in relations], delete=args.delete)
+    started = time.monotonic()
+    if args.delete:
+        delete(transport, journal, args, relations)
+    else:
+        check(transport, journal, args, relations)
+    if hasattr(transport, "report"):
+        print(transport.report())
+    print(f"Elapsed: {time.monotonic() - started:.1f}s ({transport.name} transport)")
+
+if __name__ == "__main__":
+    try:
+        main()
+    except TransportError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        print("Re-run with --resume to continue from the last checkpoint.", file=sys.stderr)
+        sys.exit(1)
@@ -1,133 +1,182 @@
 #!/usr/bin/env python3
-"""Remove duplicate pages and their orphaned components from DynamoDB."""
-
-import json
-import subprocess
+"""Remove duplicate records left by repeated seeding, with their dependent rows.
+
+Duplicates are found by natural key, per the rules in ``ddbtools/dedupe.py``:
+CMS pages by slug, components by page and position, subscription plans by
+type, users (``USER#<id>`` rows) and newsletter subscribers by email and
+coupons by code. Rows that depend on a duplicate (a page's components) are
+deleted before it, as ``ddbtools/cascade.py`` plans. A coupon's usages are
+moved to the kept coupon instead, and a user that orders, subscriptions or
+payments still point at is not removed.
+"""
+
+import argparse
 import sys
+import time
+from collections import Counter
+
+from ddbtools.access import TableAccess
+from ddbtools.batch import DEFAULT_CONCURRENCY, batch_delete, key
+from ddbtools.cascade import CascadePlanner, delete_levels
+from ddbtools.checkpoint import Journal, add_journal_args
+from ddbtools.codec import decode
+from ddbtools.dedupe import RULES, move_children, referenced_ids
+from ddbtools.scan import DEFAULT_SEGMENTS
+from ddbtools.schema import RELATIONS, item_entity
+from ddbtools.transport import TransportError, add_transport_args, transport_from_args
 
 TABLE = "swami-rupeshwaranand-api-prod-main"
-PROFILE = "SwamiJi"
-REGION = "ap-south-1"
-
-def aws_cmd(args):
-    cmd = ["aws"] + args + ["--profile", PROFILE, "--region", REGION, "--output", "json"]
-    result = subprocess.run(cmd, capture_output=True, text=True)
-    if result.returncode != 0:
-        print(f"ERROR: {result.stderr}", file=sys.stderr)
+SEGMENTS = DEFAULT_SEGMENTS
+CONCURRENCY = DEFAULT_CONCURRENCY
+
+transport = None
+access = None
+journal = None
+
+def project(items, *attrs):
+    """Decode the given attributes of raw items, with "" for missing ones."""
+    for item in items:
+        yield decode(item, attrs, "")
+
+def delete_items(rows, label):
+    """Delete a stream of rows with concurrent BatchWriteItem calls.
+
+    Keys already recorded in the journal are skipped and every acknowledged
+    batch is recorded, so an interrupted delete resumes where it stopped.
+    """
+    def progress(stats):
+        print(f"  [{stats.items}] {label} deleted")
+
+    def written(entries):
+        journal.mark_written(label, [e["DeleteRequest"]["Key"] for e in entries])
+
+    keys = journal.unwritten(label, (key(r["PK"], r["SK"]) for r in rows))
+    stats = batch_delete(
+        transport, TABLE, keys,
+        concurrency=CONCURRENCY, on_batch=progress, on_written=written,
+    )
+    print(f"  {label}: {stats.summary()}")
+    for error in stats.errors:
+        print(f"ERROR: {error}", file=sys.stderr)
+    return stats
+
+def level_stream(entity, depth):
+    return entity if depth == 0 else f"{entity} level {depth}"
+
+def dedupe(rule, dry_run):
+    """Find duplicates of one entity and delete them, dependents first.
+
+    Returns ``(unique, duplicates, levels)`` counts.
+    """
+    entity = rule.entity
+
+    # 1. Spool the entity into the journal, then group it by natural key
+    print(f"\nScanning for {entity} rows...")
+    journal.spool(
+        entity,
+        lambda start_keys, skip: access.pages(entity, rule.projection, start_keys, skip),
+        lambda items: project(items, *rule.projection),
+    )
+    kept, superseded = rule.group(journal.rows(entity))
+    print(f"Found {journal.count(entity)} {entity} rows, {len(kept)} unique")
+    label = rule.attributes
+
+    # 2. Leave alone duplicates that other records still point at
+    if rule.references and superseded:
+        sources = ", ".join(f"{e}.{a}" for e, a in rule.references)
+        print(f"Reading {sources} for references to {entity} rows...")
+        superseded, in_use = rule.in_use(superseded, referenced_ids(access, rule))
+        for row in sorted(in_use.values(), key=lambda r: (rule.key(r), r["createdAt"])):
+            print(f"  IN USE:    {' / '.join(row[a] for a in label):40s} | {row['createdAt']} | {row['PK']} -> KEEP")
+        if in_use:
+            print(f"{len(in_use)} duplicate {entity} rows are still referenced and are kept")
+
+    # 3. Report duplicates and the row kept for each
+    for row in sorted(superseded.values(), key=lambda r: (rule.key(r), r["createdAt"])):
+        print(f"  DUPLICATE: {' / '.join(row[a] for a in label):40s} | {row['createdAt']} | {row['PK']} -> DELETE")
+    for natural in sorted({rule.key(r) for r in superseded.values()}):
+        row = kept[natural]
+        print(f"  KEEP:      {' / '.join(row[a] for a in label):40s} | {row['createdAt']} | {row['PK']}")
+
+    if not superseded:
+        print(f"No duplicate {entity} rows found!")
+        return len(kept), 0, 1
+    print(f"{len(superseded)} duplicate {entity} rows (keeping the {rule.keep})")
+
+    # 4. Move the children that record something about their parent to the kept row
+    pairs = [(row, kept[rule.key(row)]) for row in superseded.values()]
+    for move in rule.moves:
+        moved, merged = move_children(transport, TABLE, access, move, pairs, dry_run)
+        verb = "to move" if dry_run else "moved"
+        print(f"  {moved} {move.relation.child} rows {verb} to the kept {entity}"
+              + (f", {merged} already there deleted" if merged else ""))
+
+    # 5. Expand the duplicates into their remaining dependents, level by level
+    moved = {move.relation.name for move in rule.moves}
+    planner = CascadePlanner(access, [r for r in RELATIONS if r.name not in moved])
+
+    def spool(depth, read_pages):
+        stream = level_stream(entity, depth)
+        journal.spool(stream, read_pages, lambda items: project(items, "PK", "SK"))
+        return journal.rows(stream)
+
+    levels = planner.plan(superseded.values(), spool)
+    for depth, rows in enumerate(levels[1:], 1):
+        found = Counter(item_entity(r["PK"], r["SK"]) for r in rows)
+        print(f"  level {depth}: " + ", ".join(f"{n} {e}" for e, n in sorted(found.items())) + " to delete")
+
+    # 6. Delete the deepest level first, so no row is left orphaned
+    if not dry_run:
+        print(f"\nDeleting duplicate {entity} rows and their dependents...")
+        delete_levels(levels, lambda depth, rows: delete_items(rows, level_stream(entity, depth)))
+    return len(kept), len(superseded), len(levels)
+
+def main():
+    global TABLE, SEGMENTS, CONCURRENCY, transport, access, journal
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--table", default=TABLE)
+    parser.add_argument("--entity", action="append", choices=sorted(RULES) + ["all"],
+                        help="entity to dedupe, repeatable (default: CMS_PAGE); see ddbtools/dedupe.py")
+    parser.add_argument("--dry-run", action="store_true", help="report duplicates without deleting")
+    parser.add_argument("--segments", type=int, default=SEGMENTS,
+                        help="parallel scan segments (1 = sequential scan)")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY,
+                        help="BatchWriteItem requests in flight at once")
+    parser.add_argument("--no-index", action="store_true",
+                        help="scan the table even where a GSI1 query would do")
+    add_journal_args(parser, "cleanup-duplicates.journal.sqlite")
+    add_transport_args(parser)
+    args = parser.parse_args()
+    entities = args.entity or ["CMS_PAGE"]
+    # Rules run in declaration order, so page cascades land before components are deduped
+    entities = [e for e in RULES if e in entities or "all" in entities]
+    TABLE = args.table
+    SEGMENTS = args.segments
+    CONCURRENCY = args.concurrency
+    transport = transport_from_args(args)
+    access = TableAccess(transport, TABLE, SEGMENTS, use_indexes=not args.no_index)
+    journal = Journal(args.journal, args.resume, table=TABLE, segments=SEGMENTS, indexes=not args.no_index,
+                      entities=entities, dryRun=args.dry_run)
+    started = time.monotonic()
+
+    totals = {entity: dedupe(RULES[entity], args.dry_run) for entity in entities}
+
+    print("\nDone!" if not args.dry_run else "\nDry run, nothing deleted.")
+    for entity, (unique, duplicates, levels) in totals.items():
+        deleted = journal.written_count(entity)
+        dependents = sum(journal.written_count(level_stream(entity, d)) for d in range(1, levels))
+        print(f"  {entity:22s} {unique:>7} unique  {duplicates:>6} duplicate  {deleted:>6} deleted"
+              + (f" (with {dependents} dependent rows)" if dependents else ""))
+    print(access.report())
+    if hasattr(transport, "report"):
+        print(transport.report())
+    print(f"Elapsed: {time.monotonic() - started:.1f}s ({transport.name} transport)")
+
+if __name__ == "__main__":
+    try:
+        main()
+    except TransportError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        print("Re-run with --resume to continue from the last checkpoint.", file=sys.stderr)
         sys.exit(1)
-    return json.loads(result.stdout)
-
-def scan_all(filter_expr, attr_values, projection, attr_names=None):
-    """Scan with pagination support."""
-    items = []
-    args = [
-        "dynamodb", "scan",
-        "--table-name", TABLE,
-        "--filter-expression", filter_expr,
-        "--expression-attribute-values", json.dumps(attr_values),
-        "--projection-expression", projection,
-    ]
-    if attr_names:
-        args += ["--expression-attribute-names", json.dumps(attr_names)]
-    
-    last_key = None
-    while True:
-        scan_args = list(args)
-        if last_key:
-            scan_args += ["--exclusive-start-key", json.dumps(last_key)]
-        data = aws_cmd(scan_args)
-        items.extend(data.get("Items", []))
-        last_key = data.get("LastEvaluatedKey")
-        if not last_key:
-            break
-    return items
-
-def delete_item(pk, sk):
-    cmd = [
-        "aws", "dynamodb", "delete-item",
-        "--table-name", TABLE,
-        "--key", json.dumps({"PK": {"S": pk}, "SK": {"S": sk}}),
-        "--profile", PROFILE, "--region", REGION,
-    ]
-    result = subprocess.run(cmd, capture_output=True, text=True)
-    if result.returncode != 0:
-        print(f"ERROR deleting {pk}: {result.stderr}", file=sys.stderr)
-        return False
-    return True
-
-# 1. Get all pages
-print("Scanning for CMS pages...")
-pages = scan_all(
-    "begins_with(PK, :pk)",
-    {":pk": {"S": "CMS_PAGE#"}},
-    "PK, SK, slug, createdAt",
-)
-print(f"Found {len(pages)} pages total")
-
-# 2. Group by slug and find duplicates
-from collections import defaultdict
-slug_groups = defaultdict(list)
-for p in pages:
-    slug = p.get("slug", {}).get("S", "")
-    created = p.get("createdAt", {}).get("S", "")
-    pk = p["PK"]["S"]
-    sk = p["SK"]["S"]
-    slug_groups[slug].append({"pk": pk, "sk": sk, "created": created})
-
-# For each duplicate group, keep the NEWER one (second seed run), delete the older
-pages_to_delete = []
-for slug, group in sorted(slug_groups.items()):
-    if len(group) > 1:
-        # Sort by createdAt, keep the latest
-        group.sort(key=lambda x: x["created"])
-        for old in group[:-1]:  # Delete all but the newest
-            pages_to_delete.append({"slug": slug, **old})
-            print(f"  DUPLICATE: {slug:25s} | {old['created']} | {old['pk']} -> DELETE")
-        kept = group[-1]
-        print(f"  KEEP:      {slug:25s} | {kept['created']} | {kept['pk']}")
-
-if not pages_to_delete:
-    print("\nNo duplicate pages found!")
-    sys.exit(0)
-
-print(f"\n{len(pages_to_delete)} duplicate pages to delete")
-
-# 3. Get all components
-print("\nScanning for CMS components...")
-components = scan_all(
-    "begins_with(PK, :pk)",
-    {":pk": {"S": "CMS_COMPONENT#"}},
-    "PK, SK, pageId",
-)
-print(f"Found {len(components)} components total")
-
-# 4. Find components belonging to duplicate pages
-page_ids_to_delete = set()
-for p in pages_to_delete:
-    # Extract page ID from PK like "CMS_PAGE#uuid"
-    page_id = p["pk"].replace("CMS_PAGE#", "")
-    page_ids_to_delete.add(page_id)
-
-components_to_delete = []
-for c in components:
-    page_id = c.get("pageId", {}).get("S", "")
-    if page_id in page_ids_to_delete:
-        components_to_delete.append({"pk": c["PK"]["S"], "sk": c["SK"]["S"], "pageId": page_id})
-
-print(f"{len(components_to_delete)} orphaned components to delete")
-
-# 5. Delete orphaned components first
-if components_to_delete:
-    print("\nDeleting orphaned components...")
-    for i, c in enumerate(components_to_delete):
-        delete_item(c["pk"], c["sk"])
-        print(f"  [{i+1}/{len(components_to_delete)}] Deleted component {c['pk']}")
-
-# 6. Delete duplicate pages
-print("\nDeleting duplicate pages...")
-for i, p in enumerate(pages_to_delete):
-    delete_item(p["pk"], p["sk"])
-    print(f"  [{i+1}/{len(pages_to_delete)}] Deleted page {p['slug']} ({p['pk']})")
-
-print(f"\nDone! Deleted {len(pages_to_delete)} duplicate pages and {len(components_to_delete)} orphaned components.")
-print(f"Remaining: {len(pages) - len(pages_to_delete)} unique pages")
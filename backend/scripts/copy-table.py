@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""Copy a table (or snapshot) into another table, masking PII on the way.
+
+Refreshes dev or local from prod: a parallel scan of the source feeds the
+transform stage and concurrent BatchWriteItem calls into the target. Emails
+are masked by default (``ddbtools/transforms.py``). With ``--incremental``
+only items updated since the last sync's watermark are copied.
+"""
+
+import argparse
+import copy
+import os
+import secrets
+import sys
+import time
+from datetime import datetime, timezone
+from functools import partial
+
+from ddbtools.batch import DEFAULT_CONCURRENCY, batch_write
+from ddbtools.scan import DEFAULT_SEGMENTS, scan_segments
+from ddbtools.snapshot import load_manifest, read_snapshot
+from ddbtools.sync import (changed_since, changed_since_params, load_state, next_watermark, save_state,
+                           snapshot_watermark)
+from ddbtools.transforms import apply_transforms, load_transform
+from ddbtools.transport import TransportError, add_transport_args, transport_from_args
+
+SOURCE = "swami-rupeshwaranand-api-prod-main"
+
+def is_snapshot(source):
+    return os.path.exists(os.path.join(source, "manifest.json"))
+
+def source_items(transport, args, since):
+    """Raw items of the source table or snapshot, only those changed after ``since`` if given."""
+    if is_snapshot(args.source):
+        items = read_snapshot(args.source)
+        if since:
+            items = (item for item in items if changed_since(item, since))
+        yield from items
+        return
+    params = changed_since_params(since) if since else {}
+    scan = partial(transport.call, "Scan")
+    for _, page in scan_segments(scan, args.segments, TableName=args.source, **params):
+        yield from page.get("Items", [])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--source", default=SOURCE, help="table or snapshot directory to copy from")
+    parser.add_argument("--target", required=True, help="table to copy into")
+    parser.add_argument("--target-endpoint-url", help="endpoint of the target, e.g. http://localhost:8000")
+    parser.add_argument("--transform", action="append", metavar="NAME|FILE",
+                        help="mask-emails, none, or a .py file defining transform(item); repeatable, "
+                             "applied in order (default: mask-emails)")
+    parser.add_argument("--mask-secret", default=os.environ.get("DDB_MASK_SECRET"),
+                        help="HMAC key for masked emails (default: $DDB_MASK_SECRET, else the one "
+                             "saved in --state, else a new random one)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="copy only items updated since the watermark in --state")
+    parser.add_argument("--state", help="sync state file (default: sync-<source>-<target>.json)")
+    parser.add_argument("--segments", type=int, default=DEFAULT_SEGMENTS,
+                        help="parallel scan segments (1 = sequential scan)")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help="BatchWriteItem requests in flight at once")
+    add_transport_args(parser)
+    args = parser.parse_args()
+    if "-prod-" in args.target:
+        parser.error("refusing to copy into a production table")
+    state_path = args.state or f"sync-{os.path.basename(os.path.normpath(args.source))}-{args.target}.json"
+    state = load_state(state_path)
+
+    specs = args.transform or ["mask-emails"]
+    secret = args.mask_secret or state.get("maskSecret") or secrets.token_hex(16)
+    transforms = [load_transform(spec, secret) for spec in specs if spec != "none"]
+
+    since = state.get("watermark") if args.incremental else None
+    if args.incremental and not since:
+        print(f"No watermark in {state_path} yet, copying everything")
+
+    # Reads are budgeted against the source table, writes against the target
+    args.table = args.source
+    transport = transport_from_args(args)
+    if args.transport == "memory" and not args.target_endpoint_url:
+        target = transport  # an in-process copy only exists inside this transport
+    else:
+        target_args = copy.copy(args)
+        target_args.table, target_args.snapshot = args.target, None
+        target_args.endpoint_url = args.target_endpoint_url or args.endpoint_url
+        target = transport_from_args(target_args)
+
+    started_at = datetime.now(timezone.utc)
+    started = time.monotonic()
+    print(f"Copying {args.source} -> {args.target}"
+          + (f", changed since {since}" if since else "")
+          + f" (transforms: {', '.join(specs)})...")
+    read = 0
+
+    def counted(items):
+        nonlocal read
+        for item in items:
+            read += 1
+            yield item
+
+    def progress(stats):
+        if stats.batches % 200 == 0:
+            print(f"  [{stats.items}] items copied ({stats.items_per_second:.0f}/s)")
+
+    items = apply_transforms(counted(source_items(transport, args, since)), transforms)
+    stats = batch_write(target, args.target, ({"PutRequest": {"Item": i}} for i in items),
+                        concurrency=args.concurrency, on_batch=progress)
+    print(f"  {stats.summary()}")
+    for error in stats.errors:
+        print(f"ERROR: {error}", file=sys.stderr)
+    if stats.failed or stats.errors:
+        sys.exit(f"{len(stats.failed)} items were not copied; the watermark in {state_path} was not advanced")
+
+    # A snapshot only holds what had changed by the time it was exported
+    watermark = snapshot_watermark(load_manifest(args.source)) if is_snapshot(args.source) \
+        else next_watermark(started_at)
+    state.update(source=args.source, target=args.target, watermark=watermark, lastSyncItems=stats.items)
+    if "mask-emails" in specs:
+        state["maskSecret"] = secret
+    save_state(state_path, state)
+    print(f"\nDone! Copied {stats.items} of {read} items read in {time.monotonic() - started:.1f}s; "
+          f"next --incremental run starts from {state['watermark']}")
+    if hasattr(transport, "report"):
+        print(transport.report())
+    if target is not transport and hasattr(target, "report"):
+        print(f"Target: {target.report()}")
+
+if __name__ == "__main__":
+    try:
+        main()
+    except TransportError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(1)
@@ -13,6 +13,8 @@ aws dynamodb create-table \
         AttributeName=GSI1SK,AttributeType=S \
         AttributeName=GSI2PK,AttributeType=S \
         AttributeName=GSI2SK,AttributeType=S \
+        AttributeName=GSI3PK,AttributeType=S \
+        AttributeName=GSI3SK,AttributeType=S \
     --key-schema \
         AttributeName=PK,KeyType=HASH \
         AttributeName=SK,KeyType=RANGE \
@@ -27,6 +29,11 @@ aws dynamodb create-table \
             \"KeySchema\": [{\"AttributeName\":\"GSI2PK\",\"KeyType\":\"HASH\"},{\"AttributeName\":\"GSI2SK\",\"KeyType\":\"RANGE\"}],
             \"Projection\": {\"ProjectionType\":\"ALL\"},
             \"ProvisionedThroughput\": {\"ReadCapacityUnits\":5,\"WriteCapacityUnits\":5}
+        },{
+            \"IndexName\": \"GSI3\",
+            \"KeySchema\": [{\"AttributeName\":\"GSI3PK\",\"KeyType\":\"HASH\"},{\"AttributeName\":\"GSI3SK\",\"KeyType\":\"RANGE\"}],
+            \"Projection\": {\"ProjectionType\":\"ALL\"},
+            \"ProvisionedThroughput\": {\"ReadCapacityUnits\":5,\"WriteCapacityUnits\":5}
         }]" \
     --provisioned-throughput ReadCapacityUnits=5,WriteCapacityUnits=5 \
     --endpoint-url http://localhost:8000 \
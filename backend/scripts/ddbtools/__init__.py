@@ -0,0 +1,4 @@
+"""Shared DynamoDB helpers for the Python maintenance scripts in backend/scripts."""
+
+PROFILE = "SwamiJi"
+REGION = "ap-south-1"
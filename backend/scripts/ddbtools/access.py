@@ -0,0 +1,180 @@
+"""Key-aware reads: query an index when the entity has one, scan otherwise.
+
+A full scan is billed for every item in the table, whatever the filter keeps.
+``TableAccess.items`` looks the entity up in ``schema.ENTITY_INDEXES`` and,
+when the caller supplies the attributes the index partition needs, reads only
+that partition. Consumed capacity is tracked per request so a run can report
+how much it saved compared with scanning.
+"""
+
+import math
+import threading
+from functools import partial
+
+from .scan import DEFAULT_SEGMENTS, merge_pages, paginate, scan_segments
+from .schema import ENTITY_INDEXES, TABLE_INDEXES, template_fields
+from .transport import consumed_capacity
+
+# Eventually consistent reads cost half an RCU per 4 KB.
+RCU_BYTES = 4096
+EVENTUAL_READ_COST = 0.5
+
+
+def projection_params(attrs):
+    """ProjectionExpression with placeholders, so reserved words are safe."""
+    names = {f"#p{i}": a for i, a in enumerate(attrs)}
+    return {"ProjectionExpression": ", ".join(names), "ExpressionAttributeNames": names}
+
+
+class TableAccess:
+    """Reads entities from one table through the cheapest available access path."""
+
+    def __init__(self, transport, table, segments=DEFAULT_SEGMENTS, use_indexes=True):
+        self.transport = transport
+        self.table = table
+        self.segments = segments
+        self.use_indexes = use_indexes
+        self._lock = threading.Lock()
+        self.query_rcu = 0.0
+        self.scan_rcu = 0.0
+        self.queries = 0
+        self.scans = 0
+        self.avoided_scans = 0
+
+    def _add(self, kind, rcu):
+        with self._lock:
+            if kind == "query":
+                self.query_rcu += rcu
+            else:
+                self.scan_rcu += rcu
+
+    def index_for(self, entity, keys):
+        """The entity's index if every attribute its partition key needs is given."""
+        index = ENTITY_INDEXES.get(entity)
+        if not self.use_indexes or index is None:
+            return None
+        if not all(f in keys for f in template_fields(index.template)):
+            return None
+        return index
+
+    def items(self, entity, projection=None, **keys):
+        """Yield raw items of ``entity``.
+
+        Keyword arguments fill the index template, e.g.
+        ``items("CMS_COMPONENT", pageId=page_ids)``. A list, tuple or set value
+        runs one query per value; the whole call still replaces a single scan.
+        """
+        for _, page in self.pages(entity, projection, **keys):
+            yield from page.get("Items", [])
+
+    def pages(self, entity, projection=None, start_keys=None, skip=(), **keys):
+        """Yield ``(cursor, page)`` pairs for ``entity``; see ``items``.
+
+        The cursor names the independently paged stream a page came from: the
+        partition value for index queries, the segment number for scans.
+        ``start_keys`` maps cursors to the ``ExclusiveStartKey`` to resume from
+        and cursors in ``skip`` are not read, which is how checkpoints resume.
+        """
+        start_keys = start_keys or {}
+        index = self.index_for(entity, keys)
+        if index is None:
+            yield from self._scan_pages(entity, projection, start_keys, skip)
+            return
+
+        fields = template_fields(index.template)
+        many = [f for f in fields if isinstance(keys[f], (list, tuple, set, frozenset))]
+        if len(many) > 1:
+            raise ValueError(f"Only one multi-valued key is supported, got {many}")
+        values = sorted(keys[many[0]]) if many else [None]
+        partitions = [index.template.format(**dict(keys, **({many[0]: v} if many else {})))
+                      for v in values]
+        partitions = [p for p in partitions if p not in skip]
+
+        with self._lock:
+            self.avoided_scans += 1
+
+        if len(partitions) == 1:
+            for page in self.query_pages(index.name, partitions[0], projection,
+                                          start_keys.get(partitions[0])):
+                yield partitions[0], page
+            return
+        sources = [(p, partial(self.query_pages, index.name, p, projection, start_keys.get(p)))
+                   for p in partitions]
+        yield from merge_pages(sources, self.segments)
+
+    def query(self, index_name, partition, projection=None, sk_prefix=None):
+        """Yield every item in one index partition (``index_name=None``: a table partition)."""
+        for page in self.query_pages(index_name, partition, projection, sk_prefix=sk_prefix):
+            yield from page.get("Items", [])
+
+    def query_pages(self, index_name, partition, projection=None, start_key=None, sk_prefix=None,
+                    sk_from=None):
+        """Yield the pages of one partition, narrowed to sort keys starting with ``sk_prefix``
+        or from ``sk_from`` on if given."""
+        partition_key, sort_key = TABLE_INDEXES[index_name] if index_name else ("PK", "SK")
+        params = {
+            "TableName": self.table,
+            "KeyConditionExpression": "#pk = :pk",
+            "ExpressionAttributeNames": {"#pk": partition_key},
+            "ExpressionAttributeValues": {":pk": {"S": partition}},
+            "ReturnConsumedCapacity": "TOTAL",
+        }
+        if index_name:
+            params["IndexName"] = index_name
+        if sk_prefix:
+            params["KeyConditionExpression"] += " AND begins_with(#sk, :sk)"
+            params["ExpressionAttributeNames"]["#sk"] = sort_key
+            params["ExpressionAttributeValues"][":sk"] = {"S": sk_prefix}
+        elif sk_from:
+            params["KeyConditionExpression"] += " AND #sk >= :sk"
+            params["ExpressionAttributeNames"]["#sk"] = sort_key
+            params["ExpressionAttributeValues"][":sk"] = {"S": sk_from}
+        if projection:
+            proj = projection_params(projection)
+            params["ProjectionExpression"] = proj["ProjectionExpression"]
+            params["ExpressionAttributeNames"].update(proj["ExpressionAttributeNames"])
+        with self._lock:
+            self.queries += 1
+        for page in paginate(partial(self.transport.call, "Query"), start_key, **params):
+            self._add("query", consumed_capacity(page))
+            yield page
+
+    def scan(self, entity, projection=None):
+        """Yield every item whose PK starts with ``<entity>#`` via a parallel scan."""
+        for _, page in self._scan_pages(entity, projection):
+            yield from page.get("Items", [])
+
+    def _scan_pages(self, entity, projection=None, start_keys=None, skip=()):
+        params = {
+            "TableName": self.table,
+            "FilterExpression": "begins_with(#pk, :prefix)",
+            "ExpressionAttributeNames": {"#pk": "PK"},
+            "ExpressionAttributeValues": {":prefix": {"S": f"{entity}#"}},
+            "ReturnConsumedCapacity": "TOTAL",
+        }
+        if projection:
+            proj = projection_params(projection)
+            params["ProjectionExpression"] = proj["ProjectionExpression"]
+            params["ExpressionAttributeNames"].update(proj["ExpressionAttributeNames"])
+        with self._lock:
+            self.scans += 1
+        for segment, page in scan_segments(partial(self.transport.call, "Scan"), self.segments,
+                                           start_keys, skip, **params):
+            self._add("scan", consumed_capacity(page))
+            yield segment, page
+
+    def estimated_scan_rcu(self):
+        """Approximate RCU of one full scan, from DescribeTable's (6-hourly) size."""
+        table = self.transport.call("DescribeTable", TableName=self.table)["Table"]
+        # Every segment is billed at least one read, even when it finds nothing
+        return max(math.ceil(table.get("TableSizeBytes", 0) / RCU_BYTES), self.segments) * EVENTUAL_READ_COST
+
+    def report(self):
+        lines = [f"Reads: {self.queries} index queries ({self.query_rcu:.1f} RCU), "
+                 f"{self.scans} scans ({self.scan_rcu:.1f} RCU)"]
+        if self.avoided_scans:
+            per_scan = self.estimated_scan_rcu()
+            saved = self.avoided_scans * per_scan - self.query_rcu
+            lines.append(f"Index reads replaced {self.avoided_scans} full scans of ~{per_scan:.1f} RCU "
+                         f"each: ~{saved:.1f} RCU saved")
+        return "\n".join(lines)
@@ -0,0 +1,228 @@
+"""Backfill secondary-index keys onto rows written before the index existed.
+
+A ``Backfill`` declares, for one entity, the index key attributes to add and
+the template each is built from, in ``schema`` template syntax:
+
+    Backfill("ACTIVITY", {"GSI3PK": "ACTIVITY_ENTITY#{entityType}",
+                          "GSI3SK": "DATE#{createdAt}"})
+
+``BackfillRunner`` streams the entity's rows with only the attributes the
+templates need, computes the keys, and writes those that are missing or
+different with parallel ``UpdateItem`` calls. Throughput is capped by the
+rate-limited transport (``--budget-percent``/``--write-budget``). Each update
+is conditional on the row still existing and on its source attributes and
+old key values being unchanged since the read. A concurrently deleted row is
+therefore not resurrected, and an edit made meanwhile is reported as a
+conflict. Rows that already hold the right keys are skipped, so a run can
+be repeated after a failure.
+
+``coverage`` re-reads the rows afterwards and counts how many hold the
+expected keys. It also checks a sample of them through the index itself.
+"""
+
+import random
+import threading
+from collections import namedtuple
+
+from .batch import DEFAULT_CONCURRENCY, run_parallel
+from .codec import decode, marshal_value
+from .schema import TABLE_INDEXES, template_fields
+from .transport import TransportError
+
+
+class Backfill(namedtuple("Backfill", "entity attributes index")):
+    """Index key ``attributes`` (name -> template) of ``entity`` rows, served by ``index``."""
+
+    __slots__ = ()
+
+    def __new__(cls, entity, attributes, index=None):
+        if index is None:
+            index = next(name for name, (pk, _) in TABLE_INDEXES.items() if pk in attributes)
+        return super().__new__(cls, entity, dict(attributes), index)
+
+    @property
+    def sources(self):
+        """Attributes the templates read, in first-use order."""
+        fields = []
+        for template in self.attributes.values():
+            fields += [f for f in template_fields(template) if f not in fields]
+        return tuple(fields)
+
+    @property
+    def projection(self):
+        return ("PK", "SK") + self.sources + tuple(a for a in self.attributes if a not in self.sources)
+
+    def keys(self, row):
+        """The key values for a decoded row, or ``None`` when a source attribute is missing."""
+        if any(row.get(f) in (None, "") for f in self.sources):
+            return None
+        return {name: template.format(**row) for name, template in self.attributes.items()}
+
+
+BACKFILLS = {
+    # ActivityLogService.getLogsByEntity: newest activity on one entity type
+    "activity-by-entity": Backfill("ACTIVITY", {"GSI3PK": "ACTIVITY_ENTITY#{entityType}",
+                                                "GSI3SK": "DATE#{createdAt}"}),
+}
+
+
+class BackfillResult:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.read = 0
+        self.current = 0
+        self.uncomputable = 0
+        self.updated = 0
+        self.conflicts = 0
+        self.errors = []
+
+    def add(self, updated=0, conflicts=0, errors=()):
+        with self._lock:
+            self.updated += updated
+            self.conflicts += conflicts
+            self.errors.extend(errors)
+
+    def summary(self):
+        return (f"{self.read} items read, {self.current} already current, {self.updated} updated, "
+                f"{self.uncomputable} missing a source attribute, {self.conflicts} conflicts, "
+                f"{len(self.errors)} errors")
+
+
+def update_params(backfill, row, keys):
+    """``UpdateItem`` expression setting ``keys`` if ``row`` is still as read."""
+    names = {"#pk": "PK"}
+    values = {}
+    sets, conditions = [], ["attribute_exists(#pk)"]
+    for i, source in enumerate(backfill.sources):
+        names[f"#s{i}"] = source
+        values[f":s{i}"] = marshal_value(row[source])
+        conditions.append(f"#s{i} = :s{i}")
+    for i, (name, value) in enumerate(keys.items()):
+        names[f"#k{i}"] = name
+        values[f":k{i}"] = {"S": value}
+        sets.append(f"#k{i} = :k{i}")
+        if row.get(name) is None:
+            conditions.append(f"attribute_not_exists(#k{i})")
+        else:
+            values[f":o{i}"] = {"S": row[name]}
+            conditions.append(f"#k{i} = :o{i}")
+    return {
+        "UpdateExpression": "SET " + ", ".join(sets),
+        "ConditionExpression": " AND ".join(conditions),
+        "ExpressionAttributeNames": names,
+        "ExpressionAttributeValues": values,
+    }
+
+
+class BackfillRunner:
+    def __init__(self, transport, table, access, concurrency=DEFAULT_CONCURRENCY, dry_run=True, log=print):
+        self.transport = transport
+        self.table = table
+        self.access = access
+        self.concurrency = concurrency
+        self.dry_run = dry_run
+        self.log = log
+
+    def rows(self, backfill):
+        for raw in self.access.items(backfill.entity, backfill.projection):
+            yield raw, decode(raw, backfill.projection, None)
+
+    def plan(self, backfill, result):
+        """Yield ``(key, row, keys)`` for every row whose index keys are missing or stale."""
+        for raw, row in self.rows(backfill):
+            result.read += 1
+            keys = backfill.keys(row)
+            if keys is None:
+                result.uncomputable += 1
+            elif all(row.get(name) == value for name, value in keys.items()):
+                result.current += 1
+            else:
+                yield {"PK": raw["PK"], "SK": raw["SK"]}, row, keys
+
+    def update(self, backfill, task, result):
+        key, row, keys = task
+        try:
+            self.transport.call("UpdateItem", TableName=self.table, Key=key,
+                                **update_params(backfill, row, keys))
+        except TransportError as e:
+            if e.code == "ConditionalCheckFailedException":
+                self.log(f"  CONFLICT: {key['PK']['S']} changed or was deleted since it was read, skipped")
+                result.add(conflicts=1)
+            else:
+                result.add(errors=[str(e)])
+            return
+        result.add(updated=1)
+
+    def run(self, backfill, on_progress=None):
+        result = BackfillResult()
+        if self.dry_run:
+            for key, _, keys in self.plan(backfill, result):
+                result.add(updated=1)
+                if result.updated <= 20:
+                    self.log(f"  WOULD SET: {key['PK']['S']} " + " ".join(f"{k}={v}" for k, v in keys.items()))
+            return result
+
+        reported = 0
+
+        def progress(_):
+            nonlocal reported
+            done = result.updated + result.conflicts
+            if on_progress and done - reported >= 10000:
+                reported = done
+                on_progress(result)
+
+        run_parallel(lambda task: self.update(backfill, task, result), self.plan(backfill, result),
+                     self.concurrency, progress)
+        return result
+
+    def coverage(self, backfill, sample=20, seed=None):
+        """``{"items", "covered", "missing", "stale", "uncomputable", "sampled", "found"}``.
+
+        ``sampled`` covered rows are looked up through ``backfill.index``;
+        ``found`` of them were there (the index is eventually consistent).
+        """
+        counts = dict(items=0, covered=0, missing=0, stale=0, uncomputable=0)
+        reservoir = []
+        rng = random.Random(seed)
+        for raw, row in self.rows(backfill):
+            counts["items"] += 1
+            keys = backfill.keys(row)
+            if keys is None:
+                counts["uncomputable"] += 1
+            elif all(row.get(name) == value for name, value in keys.items()):
+                counts["covered"] += 1
+                # Reservoir sample of the covered rows
+                if len(reservoir) < sample:
+                    reservoir.append((raw, keys))
+                else:
+                    slot = rng.randrange(counts["covered"])
+                    if slot < sample:
+                        reservoir[slot] = (raw, keys)
+            elif any(row.get(name) is None for name in keys):
+                counts["missing"] += 1
+            else:
+                counts["stale"] += 1
+        counts["sampled"] = len(reservoir)
+        counts["found"] = sum(self.indexed(backfill, raw, keys) for raw, keys in reservoir)
+        return counts
+
+    def indexed(self, backfill, raw, keys):
+        """Whether a row can be found through the index under ``keys``."""
+        partition_key, sort_key = TABLE_INDEXES[backfill.index]
+        names = {"#pk": partition_key}
+        values = {":pk": {"S": keys[partition_key]}}
+        condition = "#pk = :pk"
+        if sort_key in keys:
+            names["#sk"] = sort_key
+            values[":sk"] = {"S": keys[sort_key]}
+            condition += " AND #sk = :sk"
+        params = {"TableName": self.table, "IndexName": backfill.index, "KeyConditionExpression": condition,
+                  "ExpressionAttributeNames": names, "ExpressionAttributeValues": values,
+                  "ProjectionExpression": "PK, SK"}
+        while True:
+            page = self.transport.call("Query", **params)
+            if any(item["PK"] == raw["PK"] and item["SK"] == raw["SK"] for item in page.get("Items", [])):
+                return True
+            if "LastEvaluatedKey" not in page:
+                return False
+            params["ExclusiveStartKey"] = page["LastEvaluatedKey"]
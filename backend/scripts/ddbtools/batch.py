@@ -0,0 +1,184 @@
+"""Concurrent BatchWriteItem pipeline.
+
+Write requests are grouped into 25-item batches (the BatchWriteItem limit) and
+up to ``concurrency`` batches are in flight at once. ``UnprocessedItems`` and
+throttling errors are retried with capped exponential backoff and full jitter.
+"""
+
+import random
+import threading
+import time
+from concurrent.futures import ALL_COMPLETED, FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from .transport import TransportError, consumed_capacity
+
+BATCH_SIZE = 25
+DEFAULT_CONCURRENCY = 4
+MAX_RETRIES = 8
+BASE_DELAY = 0.05
+MAX_DELAY = 5.0
+
+RETRYABLE_ERRORS = {
+    "ProvisionedThroughputExceededException",
+    "ThrottlingException",
+    "RequestLimitExceeded",
+    "InternalServerError",
+    "ServiceUnavailable",
+}
+
+
+def key(pk, sk):
+    """Low-level primary key for a PK/SK pair."""
+    return {"PK": {"S": pk}, "SK": {"S": sk}}
+
+
+def backoff_delay(attempt, base=BASE_DELAY, cap=MAX_DELAY):
+    """Full-jitter exponential backoff: uniform(0, min(cap, base * 2^attempt))."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def chunks(iterable, size=BATCH_SIZE):
+    batch = []
+    for entry in iterable:
+        batch.append(entry)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class WriteStats:
+    """Thread-safe counters for a batch write run."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.monotonic()
+        self.finished = None
+        self.items = 0
+        self.batches = 0
+        self.retries = 0
+        self.consumed_wcu = 0.0
+        self.failed = []
+        self.errors = []
+
+    def record(self, items=0, batches=0, retries=0, consumed=0.0, failed=(), errors=()):
+        with self._lock:
+            self.items += items
+            self.batches += batches
+            self.retries += retries
+            self.consumed_wcu += consumed
+            self.failed.extend(failed)
+            self.errors.extend(errors)
+
+    @property
+    def elapsed(self):
+        return (self.finished or time.monotonic()) - self.started
+
+    @property
+    def items_per_second(self):
+        return self.items / self.elapsed if self.elapsed > 0 else 0.0
+
+    def summary(self):
+        return (f"{self.items} items in {self.batches} batches, {self.elapsed:.1f}s "
+                f"({self.items_per_second:.0f} items/s), {self.consumed_wcu:.1f} WCU consumed, "
+                f"{self.retries} retries, {len(self.failed)} failed")
+
+
+def write_batch(transport, table, requests, stats, max_retries=MAX_RETRIES):
+    """Write one batch, retrying unprocessed items until done or out of retries.
+
+    Entries that still fail are collected in ``stats.failed`` rather than raised,
+    so one bad batch does not abort the rest of the run. Returns the entries that
+    were written.
+    """
+    written = []
+    pending = requests
+    attempt = 0
+    while pending:
+        try:
+            response = transport.call(
+                "BatchWriteItem",
+                RequestItems={table: pending},
+                ReturnConsumedCapacity="TOTAL",
+            )
+        except TransportError as e:
+            if e.code not in RETRYABLE_ERRORS or attempt >= max_retries:
+                stats.record(failed=pending, errors=[str(e)])
+                break
+            unprocessed = pending
+            consumed = 0.0
+        else:
+            unprocessed = response.get("UnprocessedItems", {}).get(table, [])
+            consumed = consumed_capacity(response)
+        stats.record(items=len(pending) - len(unprocessed), consumed=consumed)
+        if unprocessed:
+            written.extend(r for r in pending if r not in unprocessed)
+        else:
+            written.extend(pending)
+        if not unprocessed:
+            break
+        if attempt >= max_retries:
+            stats.record(failed=unprocessed)
+            break
+        time.sleep(backoff_delay(attempt))
+        attempt += 1
+        stats.record(retries=1)
+        pending = unprocessed
+    stats.record(batches=1)
+    return written
+
+
+def run_parallel(fn, tasks, concurrency=DEFAULT_CONCURRENCY, on_result=None):
+    """Call ``fn(task)`` for a stream of tasks on ``concurrency`` threads.
+
+    At most ``2 * concurrency`` tasks are buffered, so ``tasks`` can be a lazy
+    iterator of any length. ``on_result(result)`` runs on the calling thread.
+    Exceptions raised by ``fn`` propagate.
+    """
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        in_flight = set()
+
+        def drain(return_when):
+            done, rest = wait(in_flight, return_when=return_when)
+            in_flight.intersection_update(rest)
+            for future in done:
+                result = future.result()
+                if on_result:
+                    on_result(result)
+
+        for task in tasks:
+            if len(in_flight) >= 2 * concurrency:
+                drain(FIRST_COMPLETED)
+            in_flight.add(pool.submit(fn, task))
+        if in_flight:
+            drain(ALL_COMPLETED)
+
+
+def batch_write(transport, table, requests, concurrency=DEFAULT_CONCURRENCY,
+                max_retries=MAX_RETRIES, on_batch=None, on_written=None):
+    """Write a stream of ``PutRequest``/``DeleteRequest`` entries in parallel batches.
+
+    ``requests`` can be a lazy iterator of any length (see ``run_parallel``).
+    ``on_batch(stats)`` is called after each batch and ``on_written(entries)``
+    with the entries it wrote, both on the calling thread.
+    """
+    stats = WriteStats()
+
+    def done(written):
+        if on_written:
+            on_written(written)
+        if on_batch:
+            on_batch(stats)
+
+    run_parallel(
+        lambda batch: write_batch(transport, table, batch, stats, max_retries),
+        chunks(requests), concurrency, done,
+    )
+    stats.finished = time.monotonic()
+    return stats
+
+
+def batch_delete(transport, table, keys, **kwargs):
+    """Delete a stream of low-level primary keys; see ``batch_write``."""
+    return batch_write(transport, table, ({"DeleteRequest": {"Key": k}} for k in keys), **kwargs)
@@ -0,0 +1,193 @@
+"""Benchmark workloads for the maintenance scripts, with regression checks.
+
+A case runs one workload against a freshly loaded table of a given size at a
+given concurrency, through ``TimedTransport``, which records the latency and
+consumed capacity of every request. Workloads run the scripts themselves
+(``cleanup-duplicates.py``, ``migrate.py``) in-process, so the numbers follow
+the code that ships. Throughput is reported as table items per second: how fast
+a job gets through a table of that size.
+
+Results are compared with a baseline per ``(workload, size, concurrency)``; a
+case regresses when its throughput drops, or its peak RSS grows, by more than
+the threshold.
+"""
+
+import contextlib
+import importlib.util
+import io
+import os
+import resource
+import sys
+import tempfile
+import threading
+import time
+from functools import partial
+
+from .access import TableAccess
+from .batch import batch_write
+from .cascade import CascadePlanner, batch_delete_levels
+from .scan import parallel_scan
+from .schema import TABLE_INDEXES
+from .transport import consumed_capacity
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+METERED = {"GetItem", "PutItem", "UpdateItem", "DeleteItem", "Query", "Scan", "BatchGetItem", "BatchWriteItem"}
+READS = {"GetItem", "Query", "Scan", "BatchGetItem"}
+
+
+class TimedTransport:
+    """Records per-request latency and consumed capacity of a wrapped transport."""
+
+    def __init__(self, transport):
+        self.transport = transport
+        self.name = transport.name
+        self._lock = threading.Lock()
+        self.latencies = []
+        self.rcu = 0.0
+        self.wcu = 0.0
+
+    def call(self, operation, **params):
+        if operation in METERED:
+            params.setdefault("ReturnConsumedCapacity", "TOTAL")
+        started = time.perf_counter()
+        response = self.transport.call(operation, **params)
+        elapsed = time.perf_counter() - started
+        units = consumed_capacity(response) if operation in METERED else 0.0
+        with self._lock:
+            self.latencies.append(elapsed)
+            if operation in READS:
+                self.rcu += units
+            else:
+                self.wcu += units
+        return response
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a list of numbers."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def create_table(transport, table):
+    """Create an on-demand table with the single-table key schema."""
+    attributes = ["PK", "SK"] + [a for keys in TABLE_INDEXES.values() for a in keys]
+    transport.call(
+        "CreateTable", TableName=table, BillingMode="PAY_PER_REQUEST",
+        AttributeDefinitions=[{"AttributeName": a, "AttributeType": "S"} for a in attributes],
+        KeySchema=[{"AttributeName": "PK", "KeyType": "HASH"}, {"AttributeName": "SK", "KeyType": "RANGE"}],
+        GlobalSecondaryIndexes=[
+            {"IndexName": index, "Projection": {"ProjectionType": "ALL"},
+             "KeySchema": [{"AttributeName": h, "KeyType": "HASH"}, {"AttributeName": r, "KeyType": "RANGE"}]}
+            for index, (h, r) in TABLE_INDEXES.items()
+        ],
+    )
+
+
+def load_table(transport, table, items, concurrency=8):
+    """Load raw items, in memory directly or through the batch writer."""
+    if hasattr(transport, "load"):
+        return transport.load(table, items)
+    return batch_write(transport, table, ({"PutRequest": {"Item": i}} for i in items),
+                       concurrency=concurrency).items
+
+
+def run_script(name, argv, transport):
+    """Run a maintenance script's ``main()`` in-process against ``transport``."""
+    path = os.path.join(SCRIPTS_DIR, name)
+    spec = importlib.util.spec_from_file_location(name.replace("-", "_")[:-3], path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    module.transport_from_args = lambda args: transport
+    saved = sys.argv
+    sys.argv = [path] + argv
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            module.main()
+    finally:
+        sys.argv = saved
+
+
+# Workloads: (transport, table, concurrency) -> None
+
+def scan_workload(transport, table, concurrency):
+    for _ in parallel_scan(partial(transport.call, "Scan"), concurrency, TableName=table):
+        pass
+
+
+def dedupe_workload(transport, table, concurrency):
+    with tempfile.TemporaryDirectory() as tmp:
+        run_script("cleanup-duplicates.py", [
+            "--table", table, "--segments", str(concurrency), "--concurrency", str(concurrency),
+            "--journal", os.path.join(tmp, "bench.journal.sqlite"),
+        ], transport)
+
+
+def cascade_delete_workload(transport, table, concurrency):
+    """Delete every CMS page together with its components."""
+    access = TableAccess(transport, table, concurrency)
+    pages = [{"PK": i["PK"]["S"], "SK": i["SK"]["S"]} for i in access.items("CMS_PAGE", ["PK", "SK"])]
+    levels = CascadePlanner(access).plan(pages)
+    batch_delete_levels(transport, table, levels, concurrency)
+
+
+def migration_workload(transport, table, concurrency):
+    run_script("migrate.py", ["--table", table, "--apply", "--only", "0001_hero_section_slides",
+                              "--segments", str(concurrency), "--concurrency", str(concurrency)], transport)
+
+
+WORKLOADS = {
+    "scan": scan_workload,
+    "dedupe": dedupe_workload,
+    "cascade-delete": cascade_delete_workload,
+    "migration": migration_workload,
+}
+
+
+def run_case(workload, transport, table, size, concurrency):
+    """Time one workload on a table loaded with ``size`` items and return its result record."""
+    timed = TimedTransport(transport)
+    started = time.perf_counter()
+    WORKLOADS[workload](timed, table, concurrency)
+    elapsed = time.perf_counter() - started
+    return {
+        "workload": workload,
+        "size": size,
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 3),
+        "itemsPerSecond": round(size / elapsed, 1) if elapsed else 0.0,
+        "requests": len(timed.latencies),
+        "p50Ms": round(percentile(timed.latencies, 0.50) * 1000, 3),
+        "p99Ms": round(percentile(timed.latencies, 0.99) * 1000, 3),
+        "peakRssMb": round(peak_rss_mb(), 1),
+        "rcu": round(timed.rcu, 1),
+        "wcu": round(timed.wcu, 1),
+    }
+
+
+def case_key(result):
+    return result["workload"], result["size"], result["concurrency"]
+
+
+def regressions(baseline, results, threshold):
+    """Describe every result worse than its baseline by more than ``threshold`` (a fraction)."""
+    previous = {case_key(r): r for r in baseline}
+    found = []
+    for result in results:
+        before = previous.get(case_key(result))
+        if before is None:
+            continue
+        label = "{} size={} concurrency={}".format(*case_key(result))
+        if result["itemsPerSecond"] < before["itemsPerSecond"] * (1 - threshold):
+            found.append(f"{label}: {result['itemsPerSecond']:.0f} items/s, "
+                         f"was {before['itemsPerSecond']:.0f}")
+        if result["peakRssMb"] > before["peakRssMb"] * (1 + threshold):
+            found.append(f"{label}: peak RSS {result['peakRssMb']:.0f} MB, was {before['peakRssMb']:.0f}")
+    return found
@@ -0,0 +1,133 @@
+"""Cascade deletes planned from the parent/child graph in ``schema.RELATIONS``.
+
+Deleting a page must delete its components, deleting a ticket its replies. A
+``CascadePlanner`` expands a set of root rows into delete levels: the roots,
+their children (found with one query per parent, e.g. ``GSI1PK = PAGE#<id>``,
+run in parallel), the children's children and so on. ``delete_levels`` then
+deletes the deepest level first, each level in concurrent batches, so a row
+is only deleted once nothing below it is left and no orphan is ever visible
+for longer than one level takes. A level whose deletes did not all succeed
+stops the cascade with ``IncompleteDelete`` before the level above it.
+"""
+
+from functools import partial
+
+from .batch import batch_delete, key
+from .scan import merge_pages
+from .schema import RELATIONS, item_entity
+from .transport import TransportError
+
+PROJECTION = ("PK", "SK")
+
+
+def row_key(row):
+    """Plain ``{PK, SK}`` of a decoded or raw row."""
+    pk, sk = row["PK"], row["SK"]
+    if isinstance(pk, dict):
+        pk, sk = pk["S"], sk["S"]
+    return {"PK": pk, "SK": sk}
+
+
+class CascadePlanner:
+    """Expands root rows into the levels of a cascade delete."""
+
+    def __init__(self, access, relations=RELATIONS):
+        self.access = access
+        self.children = {}
+        for relation in relations:
+            if relation.lookup:
+                self.children.setdefault(relation.parent, []).append(relation)
+
+    def partitions(self, rows):
+        """``(index, partition, sk_prefix)`` of every partition holding children of ``rows``."""
+        found = []
+        for row in rows:
+            entity = item_entity(row["PK"], row["SK"])
+            for relation in self.children.get(entity, ()):
+                lookup = relation.lookup
+                parent = row["PK"].split("#", 1)[1]
+                found.append((lookup.index, lookup.template.format(**{relation.attribute: parent}),
+                              lookup.sk_prefix))
+        return found
+
+    def child_pages(self, rows, start_keys=None, skip=()):
+        """Yield ``(cursor, page)`` pairs of the children of ``rows``, as ``TableAccess.pages`` does.
+
+        The cursor is the partition read, so the pages can be spooled into a
+        ``checkpoint.Journal`` and resumed.
+        """
+        start_keys = start_keys or {}
+        partitions = [p for p in self.partitions(rows) if p[1] not in skip]
+
+        yield from merge_pages(
+            [(value, partial(self.access.query_pages, index, value, PROJECTION, start_keys.get(value),
+                             sk_prefix=sk_prefix))
+             for index, value, sk_prefix in partitions],
+            self.access.segments)
+
+    def plan(self, roots, spool=None):
+        """Return the delete levels ``[roots, children, grandchildren, ...]`` as key lists.
+
+        ``spool(depth, read_pages)``, when given, stores each level's pages
+        (e.g. with ``Journal.spool``) and returns its rows; by default the
+        levels are kept in memory.
+        """
+        levels = [[row_key(r) for r in roots]]
+        seen = {(r["PK"], r["SK"]) for r in levels[0]}
+        while True:
+            frontier = levels[-1]
+            if not any(self.children.get(item_entity(r["PK"], r["SK"])) for r in frontier):
+                return levels
+            depth = len(levels)
+
+            def read_pages(start_keys, skip):
+                return self.child_pages(frontier, start_keys, skip)
+
+            if spool is None:
+                rows = (row_key(i) for _, page in read_pages(None, ()) for i in page.get("Items", []))
+            else:
+                rows = spool(depth, read_pages)
+            level = []
+            for row in rows:
+                if (row["PK"], row["SK"]) not in seen:
+                    seen.add((row["PK"], row["SK"]))
+                    level.append(row)
+            if not level:
+                return levels
+            levels.append(level)
+
+
+class IncompleteDelete(TransportError):
+    """Some deletes of a level failed, so the levels above it were left alone."""
+
+    def __init__(self, depth, stats):
+        super().__init__("BatchWriteItem", "IncompleteDelete",
+                         f"{len(stats.failed)} deletes of level {depth} failed, "
+                         f"its parents were not deleted")
+        self.depth = depth
+        self.stats = stats
+
+
+def delete_levels(levels, delete):
+    """Delete the levels deepest first and return their stats by depth.
+
+    ``delete(depth, keys)`` deletes one level and returns its
+    ``batch.WriteStats``. If any of them failed, ``IncompleteDelete`` is
+    raised before the next level up is touched.
+    """
+    stats = {}
+    for depth in reversed(range(len(levels))):
+        if levels[depth]:
+            stats[depth] = delete(depth, levels[depth])
+            if stats[depth].failed or stats[depth].errors:
+                raise IncompleteDelete(depth, stats[depth])
+    return stats
+
+
+def batch_delete_levels(transport, table, levels, concurrency, **kw):
+    """``delete_levels`` with one concurrent ``batch_delete`` per level; returns their stats."""
+    def delete(depth, rows):
+        return batch_delete(transport, table, (key(r["PK"], r["SK"]) for r in rows),
+                            concurrency=concurrency, **kw)
+
+    return delete_levels(levels, delete)
@@ -0,0 +1,136 @@
+"""Durable checkpoints for long-running scans and deletes.
+
+A ``Journal`` is a small SQLite file. Read stages are spooled into it page by
+page: the rows a stage keeps from a page and the cursor's ``LastEvaluatedKey``
+are committed in one transaction, so after a crash every page is either fully
+recorded or read again. Write stages record each key once its batch has been
+acknowledged. Re-running with ``resume=True`` skips finished stages, continues
+unfinished cursors from their last key and leaves out keys already written,
+so no billed read or write is repeated.
+"""
+
+import json
+import os
+import sqlite3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS stages (name TEXT PRIMARY KEY);
+CREATE TABLE IF NOT EXISTS cursors (
+    stream TEXT, cursor TEXT, last_key TEXT, done INTEGER DEFAULT 0,
+    PRIMARY KEY (stream, cursor)
+);
+CREATE TABLE IF NOT EXISTS rows (seq INTEGER PRIMARY KEY, stream TEXT, data TEXT);
+CREATE INDEX IF NOT EXISTS rows_stream ON rows (stream, seq);
+CREATE TABLE IF NOT EXISTS written (stream TEXT, key TEXT, PRIMARY KEY (stream, key));
+"""
+
+
+class JournalMismatch(Exception):
+    """The journal being resumed belongs to a run with different settings."""
+
+
+def _key_id(key):
+    return json.dumps(key, sort_keys=True, separators=(",", ":"))
+
+
+class Journal:
+    """SQLite-backed progress journal for one maintenance run."""
+
+    def __init__(self, path, resume=False, **settings):
+        if not resume and os.path.exists(path):
+            os.remove(path)
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.executescript(SCHEMA)
+        for name, value in settings.items():
+            row = self.db.execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()
+            if row is None:
+                self.db.execute("INSERT INTO meta VALUES (?, ?)", (name, json.dumps(value)))
+            elif json.loads(row[0]) != value:
+                raise JournalMismatch(f"{path} was written with {name}={json.loads(row[0])!r}, not {value!r}")
+        self.db.commit()
+
+    def close(self):
+        self.db.close()
+
+    # -- stages ---------------------------------------------------------------
+
+    def stage_done(self, name):
+        return self.db.execute("SELECT 1 FROM stages WHERE name = ?", (name,)).fetchone() is not None
+
+    def finish_stage(self, name):
+        with self.db:
+            self.db.execute("INSERT OR IGNORE INTO stages VALUES (?)", (name,))
+
+    # -- spooled reads --------------------------------------------------------
+
+    def positions(self, stream):
+        """``(start_keys, finished_cursors)`` recorded for ``stream``."""
+        start_keys, finished = {}, set()
+        for cursor, last_key, done in self.db.execute(
+                "SELECT cursor, last_key, done FROM cursors WHERE stream = ?", (stream,)):
+            cursor = json.loads(cursor)
+            if done:
+                finished.add(cursor)
+            else:
+                start_keys[cursor] = json.loads(last_key)
+        return start_keys, finished
+
+    def spool(self, stream, read_pages, keep):
+        """Run a read stage into the journal unless it already finished.
+
+        ``read_pages(start_keys, skip)`` must yield ``(cursor, page)`` pairs, as
+        ``TableAccess.pages`` does; ``keep(items)`` returns the JSON-serialisable
+        rows to store for a page. Returns the number of rows spooled so far.
+        """
+        if not self.stage_done(stream):
+            start_keys, finished = self.positions(stream)
+            for cursor, page in read_pages(start_keys, finished):
+                last_key = page.get("LastEvaluatedKey")
+                with self.db:
+                    self.db.executemany(
+                        "INSERT INTO rows (stream, data) VALUES (?, ?)",
+                        ((stream, json.dumps(row)) for row in keep(page.get("Items", []))),
+                    )
+                    self.db.execute(
+                        "INSERT OR REPLACE INTO cursors VALUES (?, ?, ?, ?)",
+                        (stream, json.dumps(cursor), json.dumps(last_key), 0 if last_key else 1),
+                    )
+            self.finish_stage(stream)
+        return self.count(stream)
+
+    def count(self, stream):
+        return self.db.execute("SELECT COUNT(*) FROM rows WHERE stream = ?", (stream,)).fetchone()[0]
+
+    def rows(self, stream):
+        """Stream the rows spooled for ``stream`` back from disk, in order."""
+        cursor = self.db.cursor()
+        cursor.execute("SELECT data FROM rows WHERE stream = ? ORDER BY seq", (stream,))
+        for (data,) in cursor:
+            yield json.loads(data)
+
+    # -- acknowledged writes --------------------------------------------------
+
+    def unwritten(self, stream, keys):
+        """Filter out keys already recorded as written for ``stream``."""
+        for key in keys:
+            found = self.db.execute(
+                "SELECT 1 FROM written WHERE stream = ? AND key = ?", (stream, _key_id(key))).fetchone()
+            if found is None:
+                yield key
+
+    def mark_written(self, stream, keys):
+        with self.db:
+            self.db.executemany("INSERT OR IGNORE INTO written VALUES (?, ?)",
+                                ((stream, _key_id(k)) for k in keys))
+
+    def written_count(self, stream):
+        return self.db.execute("SELECT COUNT(*) FROM written WHERE stream = ?", (stream,)).fetchone()[0]
+
+
+def add_journal_args(parser, default_path):
+    parser.add_argument("--journal", default=default_path,
+                        help="SQLite checkpoint journal (default: %(default)s)")
+    parser.add_argument("--resume", action="store_true",
+                        help="continue from the journal of an interrupted run instead of starting over")
@@ -0,0 +1,177 @@
+"""Conversion between DynamoDB-JSON attribute values and plain Python values.
+
+Numbers become ``Decimal`` (as in boto3) so values round-trip exactly.
+
+``unmarshal`` decodes any item generically. ``decode`` is the fast path: it
+compiles one decoder per entity type from ``schema.ENTITY_ATTRIBUTES`` (and per
+projection), which reads each known attribute straight from its expected type
+tag and only falls back to the generic decoder for unknown attributes or
+unexpected types. ``loads`` parses JSON with ``orjson`` when it is installed.
+"""
+
+import json
+from decimal import Decimal
+from functools import lru_cache
+
+from .schema import ENTITY_ATTRIBUTES, entity_of
+
+try:
+    from orjson import loads
+except ImportError:
+    loads = json.loads
+
+MISSING = object()
+
+
+def _identity(inner):
+    return inner
+
+
+def _map(inner):
+    return {k: unmarshal_value(v) for k, v in inner.items()}
+
+
+def _list(inner):
+    return [unmarshal_value(v) for v in inner]
+
+
+_DECODERS = {
+    "S": _identity,
+    "N": Decimal,
+    "BOOL": _identity,
+    "NULL": lambda inner: None,
+    "M": _map,
+    "L": _list,
+    "SS": set,
+    "NS": lambda inner: {Decimal(n) for n in inner},
+    "B": _identity,
+    "BS": set,
+}
+
+
+def unmarshal_value(value):
+    (tag, inner), = value.items()
+    try:
+        decoder = _DECODERS[tag]
+    except KeyError:
+        raise ValueError(f"Unknown DynamoDB type: {tag}") from None
+    return decoder(inner)
+
+
+def unmarshal(item):
+    """Raw DynamoDB-JSON item -> plain dict."""
+    return {k: unmarshal_value(v) for k, v in item.items()}
+
+
+def _localized(value):
+    """``{"M": {"en": {"S": ..}, "hi": {"S": ..}}}`` -> ``{"en": .., "hi": ..}``."""
+    inner = value.get("M")
+    if inner is None:
+        return unmarshal_value(value)
+    try:
+        return {k: v["S"] for k, v in inner.items()}
+    except KeyError:
+        return _map(inner)
+
+
+def _fields(value):
+    """A component ``fields`` list of ``{key, value | localizedValue}`` entries."""
+    entries = value.get("L")
+    if entries is None:
+        return unmarshal_value(value)
+    fields = []
+    for entry in entries:
+        inner = entry["M"]
+        field = {}
+        for k, v in inner.items():
+            if k == "key" and "S" in v:
+                field[k] = v["S"]
+            elif k == "localizedValue":
+                field[k] = _localized(v)
+            else:
+                field[k] = unmarshal_value(v)
+        fields.append(field)
+    return fields
+
+
+_TYPED = {
+    "S": "v['S'] if 'S' in v else unmarshal_value(v)",
+    "N": "Decimal(v['N']) if 'N' in v else unmarshal_value(v)",
+    "BOOL": "v['BOOL'] if 'BOOL' in v else unmarshal_value(v)",
+    "LOCALIZED": "_localized(v)",
+    "FIELDS": "_fields(v)",
+}
+
+
+def compile_decoder(types, projection=None, default=MISSING):
+    """Build a decoder for items whose attributes have the given types.
+
+    ``types`` maps attribute names to a ``_TYPED`` tag. With ``projection`` only
+    those attributes are decoded, and missing ones are set to ``default`` when
+    one is given. The decoder is generated as straight-line Python so decoding
+    an item costs one dict lookup per attribute rather than a loop over tags.
+    """
+    names = list(projection) if projection is not None else list(types)
+    lines = ["def decode(item):", "    out = {}"]
+    for i, name in enumerate(names):
+        expression = _TYPED.get(types.get(name), "unmarshal_value(v)")
+        lines += [f"    v = item.get({name!r})",
+                  "    if v is not None:",
+                  f"        out[{name!r}] = {expression}"]
+        if default is not MISSING:
+            lines += ["    else:", f"        out[{name!r}] = default"]
+    if projection is None:
+        lines += ["    for k, v in item.items():",
+                  "        if k not in known:",
+                  "            out[k] = unmarshal_value(v)"]
+    lines.append("    return out")
+    namespace = {"Decimal": Decimal, "unmarshal_value": unmarshal_value, "_localized": _localized,
+                 "_fields": _fields, "known": frozenset(names), "default": default}
+    exec("\n".join(lines), namespace)
+    return namespace["decode"]
+
+
+@lru_cache(maxsize=None)
+def decoder_for(entity, projection=None, default=MISSING):
+    """The compiled decoder of an entity, cached per projection."""
+    return compile_decoder(ENTITY_ATTRIBUTES.get(entity, {}), projection, default)
+
+
+def decode(item, projection=None, default=MISSING):
+    """Decode a raw item with the compiled decoder of its entity (from ``PK``).
+
+    ``projection`` must be a tuple, so decoders can be cached per projection.
+    """
+    pk = item.get("PK", {}).get("S", "")
+    return decoder_for(entity_of(pk), projection, default)(item)
+
+
+def marshal_value(value):
+    if isinstance(value, bool):
+        return {"BOOL": value}
+    if value is None:
+        return {"NULL": True}
+    if isinstance(value, str):
+        return {"S": value}
+    if isinstance(value, (int, Decimal)):
+        return {"N": str(value)}
+    if isinstance(value, float):
+        return {"N": str(Decimal(str(value)))}
+    if isinstance(value, (bytes, bytearray)):
+        return {"B": bytes(value)}
+    if isinstance(value, dict):
+        return {"M": {k: marshal_value(v) for k, v in value.items()}}
+    if isinstance(value, (list, tuple)):
+        return {"L": [marshal_value(v) for v in value]}
+    if isinstance(value, (set, frozenset)):
+        if all(isinstance(v, str) for v in value):
+            return {"SS": sorted(value)}
+        if all(isinstance(v, (int, float, Decimal)) and not isinstance(v, bool) for v in value):
+            return {"NS": sorted(str(v) for v in value)}
+        return {"BS": sorted(bytes(v) for v in value)}
+    raise TypeError(f"Cannot marshal {type(value).__name__}")
+
+
+def marshal(item):
+    """Plain dict -> raw DynamoDB-JSON item."""
+    return {k: marshal_value(v) for k, v in item.items()}
@@ -0,0 +1,203 @@
+"""Natural-key deduplication, configured per entity.
+
+A seed script that runs twice leaves two rows for one logical record: two
+pages with the same slug, two coupons with the same code. A ``DedupeRule``
+names an entity's natural key and which of its duplicates to keep; rows
+depending on a removed one are found by ``cascade.CascadePlanner``.
+``DedupeRule.group`` makes a single pass over a row stream, hashing each row
+on its natural key and holding only the row kept so far per key, so memory
+grows with the number of distinct records rather than the size of the table.
+
+Other rows may point at a duplicate by id. Rows of ``references`` (orders
+pointing at a user) are not owned by it, so a duplicate they still point at
+is not removed at all. Owned children that record something about their
+parent (a coupon's usages) are named in ``moves``: ``move_children`` re-keys
+them onto the kept row instead of letting the cascade delete them.
+"""
+
+from collections import namedtuple
+
+from .batch import key
+from .schema import RELATIONS, TABLE_INDEXES
+from .transport import TransportError
+
+KEEP_POLICIES = ("newest", "oldest")
+
+
+def row_id(row):
+    """``"CMS_PAGE#abc"`` -> ``"abc"``."""
+    return row["PK"].split("#", 1)[1]
+
+
+def row_ids(row):
+    """Every id other rows may use for ``row``: its ``id`` attribute and the id in its PK."""
+    return {i for i in (row.get("id"), row_id(row)) if i}
+
+
+def relation(child, parent):
+    return next(r for r in RELATIONS if r.child == child and r.parent == parent)
+
+
+# Owned children moved to the kept parent; ``counter`` on the kept parent
+# counts them and is raised by the number moved
+Move = namedtuple("Move", "relation counter", defaults=(None,))
+
+
+class DedupeRule:
+    """How to find and resolve duplicates of one entity.
+
+    ``key(row)`` returns the natural key of a decoded row, or ``None`` for rows
+    that cannot be matched (e.g. a missing email) and are always kept. Rows are
+    decoded with ``projection``: the keys, ``createdAt``, ``id`` and
+    ``attributes``. ``keep`` chooses between duplicates by ``createdAt``; ties
+    keep the row seen first. ``references`` are the ``(entity, attribute)``
+    pairs that refer to a row by id and ``moves`` the ``Move`` of each owned
+    child relation to preserve.
+    """
+
+    def __init__(self, entity, attributes, key, keep="newest", references=(), moves=()):
+        if keep not in KEEP_POLICIES:
+            raise ValueError(f"keep must be one of {KEEP_POLICIES}, not {keep!r}")
+        self.entity = entity
+        self.attributes = tuple(attributes)
+        self.projection = ("PK", "SK", "createdAt", "id") + self.attributes
+        self.key = key
+        self.keep = keep
+        self.references = tuple(references)
+        self.moves = tuple(moves)
+
+    def prefer(self, row, kept):
+        """True when ``row`` should replace ``kept`` as the surviving row."""
+        if self.keep == "newest":
+            return row["createdAt"] > kept["createdAt"]
+        return row["createdAt"] < kept["createdAt"]
+
+    def group(self, rows):
+        """Consume a row stream and resolve duplicates in one pass.
+
+        Returns ``(kept, superseded)``: the surviving row per natural key and
+        the rows to remove, keyed by row id.
+        """
+        kept = {}
+        superseded = {}
+        for row in rows:
+            natural = self.key(row)
+            if natural is None:
+                continue
+            current = kept.get(natural)
+            if current is None:
+                kept[natural] = row
+                continue
+            if self.prefer(row, current):
+                kept[natural], row = row, current
+            superseded[row_id(row)] = row
+        return kept, superseded
+
+    def in_use(self, superseded, referenced):
+        """Split off the superseded rows whose ids are in ``referenced``.
+
+        Returns ``(removable, in_use)``, both keyed like ``superseded``.
+        """
+        removable, in_use = {}, {}
+        for rid, row in superseded.items():
+            if row_ids(row) & referenced:
+                in_use[rid] = row
+            else:
+                removable[rid] = row
+        return removable, in_use
+
+
+def referenced_ids(access, rule):
+    """Ids the rule's ``references`` point at, read with one pass per referring entity."""
+    ids = set()
+    for entity, attribute in rule.references:
+        for item in access.items(entity, ("PK", "SK", attribute)):
+            value = item.get(attribute, {}).get("S")
+            if value:
+                ids.add(value)
+    return ids
+
+
+def move_children(transport, table, access, move, pairs, dry_run=False):
+    """Re-key the children of each ``(superseded, kept)`` parent pair onto the kept parent.
+
+    A child whose new key already exists (the user also used the kept coupon)
+    is only deleted. Each move is a conditional put of the re-keyed copy
+    followed by a delete of the original. The kept parent's ``counter`` is
+    raised by the rows actually moved. Returns ``(moved, merged)`` counts.
+    """
+    lookup = move.relation.lookup
+    partition_key = TABLE_INDEXES[lookup.index][0] if lookup.index else "PK"
+    moved = merged = 0
+    for superseded, kept in pairs:
+        source = lookup.template.format(**{move.relation.attribute: row_id(superseded)})
+        target = lookup.template.format(**{move.relation.attribute: row_id(kept)})
+        count = 0
+        for item in list(access.query(lookup.index, source, sk_prefix=lookup.sk_prefix)):
+            if dry_run:
+                count += 1
+                continue
+            copy = dict(item, **{partition_key: {"S": target},
+                                 move.relation.attribute: {"S": row_id(kept)}})
+            try:
+                transport.call("PutItem", TableName=table, Item=copy,
+                               ConditionExpression="attribute_not_exists(#pk)",
+                               ExpressionAttributeNames={"#pk": "PK"})
+                count += 1
+            except TransportError as e:
+                if e.code != "ConditionalCheckFailedException":
+                    raise
+                merged += 1
+            transport.call("DeleteItem", TableName=table, Key={"PK": item["PK"], "SK": item["SK"]})
+        if count and move.counter and not dry_run:
+            transport.call("UpdateItem", TableName=table, Key=key(kept["PK"], kept["SK"]),
+                           UpdateExpression="ADD #c :n", ExpressionAttributeNames={"#c": move.counter},
+                           ExpressionAttributeValues={":n": {"N": str(count)}})
+        moved += count
+    return moved, merged
+
+
+def _lower(value):
+    return value.strip().lower() or None
+
+
+def _upper(value):
+    return value.strip().upper() or None
+
+
+def _email_key(gsi1sk):
+    return _lower(gsi1sk[len("EMAIL#"):]) if gsi1sk.startswith("EMAIL#") else None
+
+
+def _both(first, second):
+    return (first, second) if first and second else None
+
+
+RULES = {
+    # Seeded by seed-pages.ts and the page-components seed; the later seed wins
+    "CMS_PAGE": DedupeRule("CMS_PAGE", ("slug",), lambda r: r["slug"] or None),
+    # GSI1SK is ORDER#<displayOrder>#<componentType>: a page may hold several
+    # components of one type, but never two at the same position
+    "CMS_COMPONENT": DedupeRule(
+        "CMS_COMPONENT", ("pageId", "GSI1SK"), lambda r: _both(r["pageId"], r["GSI1SK"]),
+    ),
+    # Rows other records refer to by id keep the original, which they point at
+    "SUBSCRIPTION_PLAN": DedupeRule(
+        "SUBSCRIPTION_PLAN", ("planType",), lambda r: r["planType"] or None, keep="oldest",
+    ),
+    # Only USER#<id> rows (GSI1SK EMAIL#<email>) are matched. USER#<email>/PROFILE
+    # rows are the login profiles the auth guard reads the role from: a profile
+    # and an id row with one email are two records, not a duplicate.
+    "USER": DedupeRule(
+        "USER", ("GSI1SK",), lambda r: _email_key(r["GSI1SK"]), keep="oldest",
+        references=[("ORDER", "userId"), ("USER_SUBSCRIPTION", "userId"), ("PAYMENT", "userId")],
+    ),
+    # Usage rows stop a user from using a coupon twice, so they follow the kept coupon
+    "COUPON": DedupeRule(
+        "COUPON", ("code",), lambda r: _upper(r["code"]), keep="oldest",
+        moves=[Move(relation("COUPON_USAGE", "COUPON"), "usageCount")],
+    ),
+    "NEWSLETTER_SUBSCRIBER": DedupeRule(
+        "NEWSLETTER_SUBSCRIBER", ("email",), lambda r: _lower(r["email"]), keep="oldest",
+    ),
+}
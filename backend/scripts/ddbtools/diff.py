@@ -0,0 +1,195 @@
+"""Partitioned hash diff between two tables or snapshots.
+
+Every item hashes to a 64-bit digest of its canonical DynamoDB-JSON and falls
+into a bucket chosen by its key: ``(entity prefix, crc32(PK, SK) % buckets)``.
+A bucket's digest is the count and the sum of its item digests, which does not
+depend on read order. The first pass computes only bucket digests on both
+sides, a few KB per entity. Buckets whose digests differ are then read again,
+this time keeping the items, and compared key by key into added, removed and
+changed records. Identical entities are never looked at twice.
+
+A source is a snapshot directory (see ``snapshot``), read one entity
+directory per worker process, or a live table, read with a parallel scan and
+re-scanned only for the entity prefixes that differ.
+"""
+
+import hashlib
+import json
+import os
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from .scan import DEFAULT_SEGMENTS, prefix_filter, scan_segments
+from .schema import entity_of
+from .snapshot import _encode_binary, load_manifest, read_snapshot
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+DEFAULT_BUCKETS = 1024
+MASK = (1 << 64) - 1
+SETS = ("SS", "NS", "BS")
+# Of the type tags only L, SS, NS and BS hold a JSON array
+SET_MARKER = b'S":['
+
+
+def _dumps(item):
+    if orjson is not None:
+        return orjson.dumps(item, option=orjson.OPT_SORT_KEYS, default=_encode_binary)
+    return json.dumps(item, sort_keys=True, separators=(",", ":"), default=_encode_binary).encode()
+
+
+def _sorted_sets(value):
+    """A copy of a DynamoDB-JSON value with every set sorted; sets come back in no particular order."""
+    (tag, inner), = value.items()
+    if tag in SETS:
+        return {tag: sorted(inner)}
+    if tag == "M":
+        return {tag: {k: _sorted_sets(v) for k, v in inner.items()}}
+    if tag == "L":
+        return {tag: [_sorted_sets(v) for v in inner]}
+    return value
+
+
+def canonical(item, ignore=()):
+    """Bytes that are equal exactly when two raw items are, whatever their attribute order."""
+    if ignore:
+        item = {k: v for k, v in item.items() if k not in ignore}
+    data = _dumps(item)
+    # Only items that hold a set pay for normalising it
+    if SET_MARKER in data:
+        data = _dumps({k: _sorted_sets(v) for k, v in item.items()})
+    return data
+
+
+def item_digest(item, ignore=()):
+    return int.from_bytes(hashlib.blake2b(canonical(item, ignore), digest_size=8).digest(), "little")
+
+
+def bucket_of(pk, sk, buckets):
+    return zlib.crc32(f"{pk}\0{sk}".encode()) % buckets
+
+
+def item_key(item):
+    return item["PK"]["S"], item["SK"]["S"]
+
+
+def bucket_digests(items, buckets, ignore=()):
+    """``{entity: {bucket: [count, digest sum]}}`` of a stream of raw items."""
+    digests = {}
+    for item in items:
+        pk, sk = item_key(item)
+        entity = digests.setdefault(entity_of(pk), {})
+        entry = entity.setdefault(bucket_of(pk, sk, buckets), [0, 0])
+        entry[0] += 1
+        entry[1] = (entry[1] + item_digest(item, ignore)) & MASK
+    return digests
+
+
+def differing_buckets(left, right):
+    """``{entity: set of buckets}`` whose digests differ between two sides."""
+    found = {}
+    for entity in set(left) | set(right):
+        a, b = left.get(entity, {}), right.get(entity, {})
+        changed = {bucket for bucket in set(a) | set(b) if a.get(bucket) != b.get(bucket)}
+        if changed:
+            found[entity] = changed
+    return found
+
+
+def bucket_items(items, wanted, buckets, ignore=()):
+    """``{(PK, SK): (digest, item)}`` for the items that fall in ``wanted`` buckets."""
+    found = {}
+    for item in items:
+        pk, sk = item_key(item)
+        entity_buckets = wanted.get(entity_of(pk))
+        if entity_buckets and bucket_of(pk, sk, buckets) in entity_buckets:
+            found[pk, sk] = (item_digest(item, ignore), item)
+    return found
+
+
+def changed_attributes(before, after, ignore=()):
+    """Names of the attributes added, removed or changed between two raw items."""
+    names = (set(before) | set(after)) - set(ignore)
+    return sorted(n for n in names if n not in before or n not in after
+                  or canonical({n: before[n]}) != canonical({n: after[n]}))
+
+
+def compare(left, right, ignore=()):
+    """Yield added/removed/changed records from two ``bucket_items`` results."""
+    for pk, sk in sorted(set(left) | set(right)):
+        before, after = left.get((pk, sk)), right.get((pk, sk))
+        if before is None:
+            yield {"change": "added", "PK": pk, "SK": sk}
+        elif after is None:
+            yield {"change": "removed", "PK": pk, "SK": sk}
+        elif before[0] != after[0]:
+            yield {"change": "changed", "PK": pk, "SK": sk,
+                   "attributes": changed_attributes(before[1], after[1], ignore)}
+
+
+def _snapshot_digests(directory, entity, buckets, ignore):
+    return bucket_digests(read_snapshot(directory, [entity]), buckets, ignore)
+
+
+class SnapshotSource:
+    """A snapshot directory; digests are computed one entity per worker process."""
+
+    def __init__(self, directory, workers=None):
+        self.directory = directory
+        self.name = directory
+        self.workers = workers or os.cpu_count()
+
+    def digests(self, buckets, ignore=()):
+        entities = list(load_manifest(self.directory)["entities"])
+        digest = partial(_snapshot_digests, self.directory, buckets=buckets, ignore=tuple(ignore))
+        digests = {}
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            for part in pool.map(digest, entities):
+                digests.update(part)
+        return digests
+
+    def items(self, entities):
+        return read_snapshot(self.directory, entities)
+
+
+class TableSource:
+    """A live table, read with a parallel scan."""
+
+    def __init__(self, transport, table, segments=DEFAULT_SEGMENTS):
+        self.transport = transport
+        self.table = table
+        self.name = table
+        self.segments = segments
+
+    def digests(self, buckets, ignore=()):
+        return bucket_digests(self._scan(), buckets, ignore)
+
+    def items(self, entities):
+        return self._scan(prefix_filter(sorted(entities)))
+
+    def _scan(self, params=None):
+        scan = partial(self.transport.call, "Scan")
+        for _, page in scan_segments(scan, self.segments, TableName=self.table, **(params or {})):
+            yield from page.get("Items", [])
+
+
+def diff(left, right, buckets=DEFAULT_BUCKETS, ignore=(), on_digests=None):
+    """Yield the changes that turn ``left`` into ``right``.
+
+    ``on_digests(left_digests, right_digests, differing)`` is called after the
+    first pass, e.g. to report which entities differ.
+    """
+    left_digests = left.digests(buckets, ignore)
+    right_digests = right.digests(buckets, ignore)
+    differing = differing_buckets(left_digests, right_digests)
+    if on_digests is not None:
+        on_digests(left_digests, right_digests, differing)
+    if not differing:
+        return
+    before = bucket_items(left.items(differing), differing, buckets, ignore)
+    after = bucket_items(right.items(differing), differing, buckets, ignore)
+    yield from compare(before, after, ignore)
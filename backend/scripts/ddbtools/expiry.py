@@ -0,0 +1,215 @@
+"""Expiry of short-lived rows through the tables' ``ttl`` attribute.
+
+Both tables have DynamoDB TTL enabled on ``ttl`` (epoch seconds), but only
+rows written with one ever expire. An ``Expiry`` declares, for one entity,
+how long its rows live and the timestamps that lifetime counts from:
+
+    Expiry("CART", 90 * DAY, lookup=Lookup("GSI1", "CART"))
+
+is ``updatedAt`` (or, failing that, ``createdAt``) plus 90 days on every row
+in the ``GSI1PK = CART`` partition, i.e. cart items but not the saved address.
+The services write the same ``ttl`` on new rows; keep the two in step.
+
+``ExpirySweeper`` reads the rows with only the attributes it needs and
+computes each one's expiry. Rows without ``ttl`` get it set; rows already past
+expiry are deleted, since DynamoDB only removes them in the background, days
+later for a large backlog. Both writes run in parallel through the
+rate-limited transport. Each write is conditional on the row's ``ttl`` and
+timestamps being unchanged since the read, so a cart touched meanwhile is
+neither deleted nor given a stale expiry. Rows that already hold a ``ttl`` in
+the future are skipped, so a run can be repeated.
+"""
+
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime
+
+from .batch import DEFAULT_CONCURRENCY, run_parallel
+from .codec import decode, marshal_value
+from .schema import Lookup
+from .transport import TransportError
+
+TTL_ATTRIBUTE = "ttl"
+DAY = 86400
+
+
+def epoch(timestamp):
+    """``2026-10-18T12:00:00.000Z`` -> epoch seconds, or ``None`` if unparseable."""
+    try:
+        return int(datetime.fromisoformat(timestamp.replace("Z", "+00:00")).timestamp())
+    except (AttributeError, ValueError):
+        return None
+
+
+class Expiry(namedtuple("Expiry", "entity lifetime sources lookup sk_prefix table")):
+    """Rows of ``entity`` expire ``lifetime`` seconds after their first present ``sources`` timestamp.
+
+    ``lookup`` reads the rows from one partition instead of the entity's
+    usual access path; ``sk_prefix`` narrows either. ``table`` is ``"main"``
+    or ``"otp"``.
+    """
+
+    __slots__ = ()
+
+    def __new__(cls, entity, lifetime, sources=("updatedAt", "createdAt"), lookup=None,
+                sk_prefix=None, table="main"):
+        return super().__new__(cls, entity, lifetime, tuple(sources), lookup, sk_prefix, table)
+
+    @property
+    def projection(self):
+        return ("PK", "SK", TTL_ATTRIBUTE) + self.sources
+
+    def expires(self, row):
+        """The ``ttl`` a decoded row should carry, or ``None`` without a usable timestamp."""
+        for source in self.sources:
+            if row.get(source) is not None:
+                started = epoch(row[source])
+                return None if started is None else started + self.lifetime
+        return None
+
+
+EXPIRY_POLICIES = {
+    # ActivityLogService.ACTIVITY_TTL_SECONDS; the counts live on in the rollups
+    "activity": Expiry("ACTIVITY", 365 * DAY, ("createdAt",)),
+    # CartService.CART_TTL_SECONDS; the address row is not in the CART partition
+    "cart-items": Expiry("CART", 90 * DAY, lookup=Lookup("GSI1", "CART"), sk_prefix="ITEM#"),
+    # create-auth-challenge OTP_EXPIRY_SECONDS
+    "cognito-otp": Expiry("COGNITO_OTP", 300, ("createdAt",), table="otp"),
+    # No "temp uploads": StorageService puts them in the content bucket under temp/, never in a table
+}
+
+
+class SweepResult:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.read = 0
+        self.current = 0
+        self.undated = 0
+        self.scheduled = 0
+        self.purged = 0
+        self.conflicts = 0
+        self.errors = []
+
+    def add(self, scheduled=0, purged=0, conflicts=0, errors=()):
+        with self._lock:
+            self.scheduled += scheduled
+            self.purged += purged
+            self.conflicts += conflicts
+            self.errors.extend(errors)
+
+    def summary(self):
+        return (f"{self.read} items read, {self.current} already expiring, {self.scheduled} ttl set, "
+                f"{self.purged} expired and deleted, {self.undated} without a timestamp, "
+                f"{self.conflicts} conflicts, {len(self.errors)} errors")
+
+
+def write_params(expiry, row, ttl=None):
+    """Condition (and, with ``ttl``, update) expression for a row still as read."""
+    names = {"#pk": "PK", "#ttl": TTL_ATTRIBUTE}
+    values = {}
+    conditions = ["attribute_exists(#pk)"]
+    if row.get(TTL_ATTRIBUTE) is None:
+        conditions.append("attribute_not_exists(#ttl)")
+    else:
+        values[":old"] = marshal_value(row[TTL_ATTRIBUTE])
+        conditions.append("#ttl = :old")
+    for i, source in enumerate(expiry.sources):
+        names[f"#s{i}"] = source
+        if row.get(source) is None:
+            conditions.append(f"attribute_not_exists(#s{i})")
+        else:
+            values[f":s{i}"] = marshal_value(row[source])
+            conditions.append(f"#s{i} = :s{i}")
+    params = {"ConditionExpression": " AND ".join(conditions), "ExpressionAttributeNames": names,
+              "ExpressionAttributeValues": values}
+    if ttl is not None:
+        values[":ttl"] = {"N": str(ttl)}
+        params["UpdateExpression"] = "SET #ttl = :ttl"
+    return params
+
+
+class ExpirySweeper:
+    def __init__(self, transport, table, access, concurrency=DEFAULT_CONCURRENCY, dry_run=True,
+                 now=None, log=print):
+        self.transport = transport
+        self.table = table
+        self.access = access
+        self.concurrency = concurrency
+        self.dry_run = dry_run
+        self.now = int(time.time()) if now is None else now
+        self.log = log
+
+    def rows(self, expiry):
+        if expiry.lookup:
+            lookup = expiry.lookup
+            raws = self.access.query(lookup.index, lookup.template, expiry.projection, lookup.sk_prefix)
+        else:
+            raws = self.access.items(expiry.entity, expiry.projection)
+        for raw in raws:
+            if expiry.sk_prefix and not raw["SK"]["S"].startswith(expiry.sk_prefix):
+                continue
+            yield raw, decode(raw, expiry.projection, None)
+
+    def plan(self, expiry, result):
+        """Yield ``(action, key, row, ttl)``: ``"delete"`` for expired rows, ``"set"`` for rows without ``ttl``."""
+        for raw, row in self.rows(expiry):
+            result.read += 1
+            ttl = row.get(TTL_ATTRIBUTE)
+            expires = int(ttl) if ttl is not None else expiry.expires(row)
+            key = {"PK": raw["PK"], "SK": raw["SK"]}
+            if expires is None:
+                result.undated += 1
+            elif expires <= self.now:
+                yield "delete", key, row, expires
+            elif ttl is None:
+                yield "set", key, row, expires
+            else:
+                result.current += 1
+
+    def write(self, expiry, task, result):
+        action, key, row, ttl = task
+        try:
+            if action == "delete":
+                self.transport.call("DeleteItem", TableName=self.table, Key=key, **write_params(expiry, row))
+            else:
+                self.transport.call("UpdateItem", TableName=self.table, Key=key,
+                                    **write_params(expiry, row, ttl))
+        except TransportError as e:
+            if e.code == "ConditionalCheckFailedException":
+                self.log(f"  CONFLICT: {key['PK']['S']} changed or was deleted since it was read, skipped")
+                result.add(conflicts=1)
+            else:
+                result.add(errors=[str(e)])
+            return
+        if action == "delete":
+            result.add(purged=1)
+        else:
+            result.add(scheduled=1)
+
+    def run(self, expiry, on_progress=None):
+        result = SweepResult()
+        if self.dry_run:
+            for action, key, _, ttl in self.plan(expiry, result):
+                if action == "delete":
+                    result.add(purged=1)
+                else:
+                    result.add(scheduled=1)
+                if result.purged + result.scheduled <= 20:
+                    verb = "WOULD DELETE" if action == "delete" else "WOULD SET"
+                    name = key["PK"]["S"] if key["SK"] == key["PK"] else f"{key['PK']['S']} {key['SK']['S']}"
+                    self.log(f"  {verb}: {name} ttl={ttl}")
+            return result
+
+        reported = 0
+
+        def progress(_):
+            nonlocal reported
+            done = result.scheduled + result.purged + result.conflicts
+            if on_progress and done - reported >= 10000:
+                reported = done
+                on_progress(result)
+
+        run_parallel(lambda task: self.write(expiry, task, result), self.plan(expiry, result),
+                     self.concurrency, progress)
+        return result
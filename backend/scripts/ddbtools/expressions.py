@@ -0,0 +1,453 @@
+"""A small evaluator for DynamoDB expressions over raw DynamoDB-JSON items.
+
+Covers what the scripts and the NestJS services send: key conditions, filter
+and condition expressions (comparisons, ``BETWEEN``, ``IN``, ``AND``/``OR``/
+``NOT``, ``attribute_exists``, ``attribute_not_exists``, ``attribute_type``,
+``begins_with``, ``contains``, ``size``), update expressions (``SET`` with
+``+``/``-``, ``if_not_exists`` and ``list_append``, ``REMOVE``, ``ADD``,
+``DELETE``) and projection expressions. Expressions are parsed once and cached;
+placeholders are resolved at evaluation time.
+"""
+
+import re
+from decimal import Decimal
+from functools import lru_cache
+
+from .codec import marshal_value, unmarshal_value
+
+_TOKEN_RE = re.compile(r"\s*(<>|<=|>=|[=<>(),.\[\]+-]|#\w+|:\w+|[A-Za-z_][\w]*|\d+)")
+_KEYWORDS = {"AND", "OR", "NOT", "BETWEEN", "IN", "SET", "REMOVE", "ADD", "DELETE"}
+_COMPARATORS = {"=", "<>", "<", "<=", ">", ">="}
+
+
+class ExpressionError(ValueError):
+    """An expression could not be parsed or evaluated (a ValidationException)."""
+
+
+def _tokenize(expression):
+    tokens, position = [], 0
+    expression = expression.rstrip()
+    while position < len(expression):
+        match = _TOKEN_RE.match(expression, position)
+        if not match:
+            raise ExpressionError(f"Invalid expression near {expression[position:]!r}")
+        token = match.group(1)
+        tokens.append(token.upper() if token.upper() in _KEYWORDS else token)
+        position = match.end()
+    return tokens
+
+
+class _Parser:
+    def __init__(self, expression):
+        self.tokens = _tokenize(expression)
+        self.position = 0
+
+    def peek(self):
+        return self.tokens[self.position] if self.position < len(self.tokens) else None
+
+    def take(self, expected=None):
+        token = self.peek()
+        if token is None or (expected is not None and token != expected):
+            raise ExpressionError(f"Expected {expected or 'a token'}, got {token!r}")
+        self.position += 1
+        return token
+
+    def done(self):
+        if self.peek() is not None:
+            raise ExpressionError(f"Unexpected {self.peek()!r}")
+
+    # Conditions
+
+    def condition(self):
+        node = self.conjunction()
+        while self.peek() == "OR":
+            self.take()
+            node = ("or", node, self.conjunction())
+        return node
+
+    def conjunction(self):
+        node = self.negation()
+        while self.peek() == "AND":
+            self.take()
+            node = ("and", node, self.negation())
+        return node
+
+    def negation(self):
+        if self.peek() == "NOT":
+            self.take()
+            return ("not", self.negation())
+        return self.predicate()
+
+    def predicate(self):
+        if self.peek() == "(":
+            self.take()
+            node = self.condition()
+            self.take(")")
+            return node
+        token = self.peek()
+        if token in _PREDICATES:
+            self.take()
+            return ("fn", token, self.arguments())
+        left = self.operand()
+        token = self.take()
+        if token in _COMPARATORS:
+            return ("cmp", token, left, self.operand())
+        if token == "BETWEEN":
+            low = self.operand()
+            self.take("AND")
+            return ("between", left, low, self.operand())
+        if token == "IN":
+            return ("in", left, self.arguments())
+        raise ExpressionError(f"Unexpected {token!r}")
+
+    def arguments(self):
+        self.take("(")
+        args = [self.value()]
+        while self.peek() == ",":
+            self.take()
+            args.append(self.value())
+        self.take(")")
+        return args
+
+    def operand(self):
+        token = self.peek()
+        if token == "size":
+            self.take()
+            return ("size", self.arguments()[0])
+        if token is not None and token.startswith(":"):
+            return ("value", self.take())
+        return self.path()
+
+    def path(self):
+        token = self.take()
+        if not (token.startswith("#") or token[0].isalpha() or token[0] == "_") or token in _KEYWORDS:
+            raise ExpressionError(f"Expected an attribute name, got {token!r}")
+        elements = [token]
+        while self.peek() in (".", "["):
+            if self.take() == ".":
+                elements.append(self.take())
+            else:
+                elements.append(int(self.take()))
+                self.take("]")
+        return ("path", tuple(elements))
+
+    # Update values
+
+    def value(self):
+        node = self.term()
+        if self.peek() in ("+", "-"):
+            node = ("arith", self.take(), node, self.term())
+        return node
+
+    def term(self):
+        token = self.peek()
+        if token in ("if_not_exists", "list_append"):
+            self.take()
+            return (token, *self.arguments())
+        return self.operand()
+
+    # Update expressions
+
+    def update(self):
+        actions = []
+        while self.peek() is not None:
+            clause = self.take()
+            if clause not in ("SET", "REMOVE", "ADD", "DELETE"):
+                raise ExpressionError(f"Unknown update clause {clause!r}")
+            while True:
+                target = self.path()
+                if clause == "SET":
+                    self.take("=")
+                    actions.append(("SET", target, self.value()))
+                elif clause == "REMOVE":
+                    actions.append(("REMOVE", target, None))
+                else:
+                    actions.append((clause, target, self.operand()))
+                if self.peek() != ",":
+                    break
+                self.take()
+        return actions
+
+    def projection(self):
+        paths = [self.path()]
+        while self.peek() == ",":
+            self.take()
+            paths.append(self.path())
+        return paths
+
+
+_PREDICATES = {"attribute_exists", "attribute_not_exists", "attribute_type", "begins_with", "contains"}
+
+
+@lru_cache(maxsize=1024)
+def parse_condition(expression):
+    parser = _Parser(expression)
+    node = parser.condition()
+    parser.done()
+    return node
+
+
+@lru_cache(maxsize=1024)
+def parse_update(expression):
+    parser = _Parser(expression)
+    return parser.update()
+
+
+@lru_cache(maxsize=1024)
+def parse_projection(expression):
+    parser = _Parser(expression)
+    paths = parser.projection()
+    parser.done()
+    return paths
+
+
+class Context:
+    """Placeholder values of one request."""
+
+    def __init__(self, names=None, values=None):
+        self.names = names or {}
+        self.values = values or {}
+
+    def name(self, element):
+        if isinstance(element, str) and element.startswith("#"):
+            try:
+                return self.names[element]
+            except KeyError:
+                raise ExpressionError(f"Undefined attribute name placeholder {element}") from None
+        return element
+
+    def value(self, placeholder):
+        try:
+            return self.values[placeholder]
+        except KeyError:
+            raise ExpressionError(f"Undefined attribute value placeholder {placeholder}") from None
+
+    def path(self, node):
+        return tuple(self.name(e) for e in node[1])
+
+
+def resolve(item, path):
+    """The raw value at ``path`` in an item, or ``None``."""
+    value = item.get(path[0])
+    for element in path[1:]:
+        if value is None:
+            return None
+        if isinstance(element, int):
+            items = value.get("L")
+            value = items[element] if items is not None and element < len(items) else None
+        else:
+            value = (value.get("M") or {}).get(element)
+    return value
+
+
+def _tag(value):
+    return next(iter(value))
+
+
+def _plain(value):
+    return None if value is None else unmarshal_value(value)
+
+
+def _size(value):
+    tag, inner = next(iter(value.items()))
+    if tag in ("S", "B", "L", "M", "SS", "NS", "BS"):
+        return len(inner)
+    raise ExpressionError(f"size() is not defined for type {tag}")
+
+
+def operand(node, item, context):
+    kind = node[0]
+    if kind == "path":
+        return resolve(item, context.path(node))
+    if kind == "value":
+        return context.value(node[1])
+    if kind == "size":
+        value = operand(node[1], item, context)
+        return None if value is None else {"N": str(_size(value))}
+    if kind == "if_not_exists":
+        current = operand(node[1], item, context)
+        return current if current is not None else operand(node[2], item, context)
+    if kind == "list_append":
+        first, second = operand(node[1], item, context), operand(node[2], item, context)
+        if first is None or second is None or "L" not in first or "L" not in second:
+            raise ExpressionError("list_append() needs two lists")
+        return {"L": first["L"] + second["L"]}
+    if kind == "arith":
+        left, right = operand(node[2], item, context), operand(node[3], item, context)
+        if left is None or right is None or "N" not in left or "N" not in right:
+            raise ExpressionError(f"'{node[1]}' needs two numbers")
+        result = Decimal(left["N"]) + Decimal(right["N"]) * (1 if node[1] == "+" else -1)
+        return {"N": str(result)}
+    raise ExpressionError(f"Unexpected operand {kind}")
+
+
+def compare(op, left, right):
+    if left is None or right is None or _tag(left) != _tag(right):
+        return op == "<>"
+    a, b = _plain(left), _plain(right)
+    if op == "=":
+        return a == b
+    if op == "<>":
+        return a != b
+    if _tag(left) not in ("S", "N", "B"):
+        return False
+    return {"<": a < b, "<=": a <= b, ">": a > b, ">=": a >= b}[op]
+
+
+def _function(name, args, item, context):
+    value = operand(args[0], item, context)
+    if name == "attribute_exists":
+        return value is not None
+    if name == "attribute_not_exists":
+        return value is None
+    if value is None:
+        return False
+    argument = operand(args[1], item, context)
+    if name == "attribute_type":
+        return _tag(value) == argument.get("S")
+    if name == "begins_with":
+        tag = _tag(value)
+        return tag in ("S", "B") and _tag(argument) == tag and value[tag].startswith(argument[tag])
+    if name == "contains":
+        tag = _tag(value)
+        if tag == "S":
+            return "S" in argument and argument["S"] in value["S"]
+        if tag in ("SS", "NS", "BS", "L"):
+            return _plain(argument) in list(_plain(value))
+        return False
+    raise ExpressionError(f"Unknown function {name}")
+
+
+def evaluate(node, item, context):
+    """Evaluate a parsed condition against a raw item."""
+    kind = node[0]
+    if kind == "and":
+        return evaluate(node[1], item, context) and evaluate(node[2], item, context)
+    if kind == "or":
+        return evaluate(node[1], item, context) or evaluate(node[2], item, context)
+    if kind == "not":
+        return not evaluate(node[1], item, context)
+    if kind == "cmp":
+        return compare(node[1], operand(node[2], item, context), operand(node[3], item, context))
+    if kind == "between":
+        value = operand(node[1], item, context)
+        return (compare(">=", value, operand(node[2], item, context))
+                and compare("<=", value, operand(node[3], item, context)))
+    if kind == "in":
+        value = operand(node[1], item, context)
+        return any(compare("=", value, operand(arg, item, context)) for arg in node[2])
+    if kind == "fn":
+        return _function(node[1], node[2], item, context)
+    raise ExpressionError(f"Unexpected condition {kind}")
+
+
+def matches(expression, item, names=None, values=None):
+    """Whether a raw item satisfies a condition expression (``None`` always does)."""
+    if not expression:
+        return True
+    return evaluate(parse_condition(expression), item, Context(names, values))
+
+
+def _assign(item, path, value):
+    if len(path) == 1:
+        item[path[0]] = value
+        return
+    parent = resolve(item, path[:-1])
+    last = path[-1]
+    if isinstance(last, int):
+        if parent is None or "L" not in parent:
+            raise ExpressionError("The document path provided in the update expression is invalid")
+        if last < len(parent["L"]):
+            parent["L"][last] = value
+        else:
+            parent["L"].append(value)
+    else:
+        if parent is None or "M" not in parent:
+            raise ExpressionError("The document path provided in the update expression is invalid")
+        parent["M"][last] = value
+
+
+def _remove(item, path):
+    if len(path) == 1:
+        item.pop(path[0], None)
+        return
+    parent = resolve(item, path[:-1])
+    last = path[-1]
+    if isinstance(last, int):
+        if parent is not None and "L" in parent and last < len(parent["L"]):
+            del parent["L"][last]
+    elif parent is not None and "M" in parent:
+        parent["M"].pop(last, None)
+
+
+def _add(current, value):
+    if current is None:
+        return value
+    tag = _tag(value)
+    if tag == "N" and "N" in current:
+        return {"N": str(Decimal(current["N"]) + Decimal(value["N"]))}
+    if tag in ("SS", "NS", "BS") and tag in current:
+        return marshal_value(_plain(current) | _plain(value))
+    raise ExpressionError("ADD needs a number or a set of the attribute's type")
+
+
+def _delete(current, value):
+    if current is None:
+        return None
+    tag = _tag(value)
+    if tag not in ("SS", "NS", "BS") or tag not in current:
+        raise ExpressionError("DELETE needs a set of the attribute's type")
+    remaining = _plain(current) - _plain(value)
+    return marshal_value(remaining) if remaining else None
+
+
+def apply_update(expression, item, names=None, values=None):
+    """Apply an update expression to a copy of ``item`` and return the copy.
+
+    Every right-hand side is evaluated against the original item, as DynamoDB
+    does, before any action is applied.
+    """
+    context = Context(names, values)
+    planned = []
+    for action, target, node in parse_update(expression):
+        path = context.path(target)
+        current = resolve(item, path)
+        if action == "SET":
+            planned.append((path, operand(node, item, context)))
+        elif action == "REMOVE":
+            planned.append((path, None))
+        elif action == "ADD":
+            planned.append((path, _add(current, operand(node, item, context))))
+        else:
+            planned.append((path, _delete(current, operand(node, item, context))))
+    updated = copy_item(item)
+    for path, value in planned:
+        if value is None:
+            _remove(updated, path)
+        else:
+            _assign(updated, path, copy_value(value))
+    return updated
+
+
+def project(item, expression, names=None):
+    """Keep the top-level attributes named by a projection expression."""
+    if not expression:
+        return item
+    context = Context(names)
+    attributes = {context.path(path)[0] for path in parse_projection(expression)}
+    return {k: v for k, v in item.items() if k in attributes}
+
+
+def copy_value(value):
+    tag, inner = next(iter(value.items()))
+    if tag == "M":
+        return {"M": {k: copy_value(v) for k, v in inner.items()}}
+    if tag == "L":
+        return {"L": [copy_value(v) for v in inner]}
+    if tag in ("SS", "NS", "BS"):
+        return {tag: list(inner)}
+    return {tag: inner}
+
+
+def copy_item(item):
+    return {k: copy_value(v) for k, v in item.items()}
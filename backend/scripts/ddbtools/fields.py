@@ -0,0 +1,160 @@
+"""Declarative transforms for the ``fields`` list of CMS_COMPONENT items.
+
+A component stores its content as ``fields: [{key, value | localizedValue}]``.
+``FieldSet`` indexes that list by key once, so every operation is a dict
+lookup instead of a linear ``next(f for f in fields if f["key"] == ...)``.
+A ``FieldTransform`` applies a declared list of operations and returns the new
+list only when it differs from the original:
+
+    FieldTransform(
+        Wrap("slides", {"heading": "heading", "backgroundImage": "imageUrl"}),
+        SetDefault("overlayOpacity", Decimal("0.5")),
+        Keep("slides", "overlayOpacity"),
+        component_type="hero_section",
+        skip_if_present="slides",
+    )
+
+Transforms are callables taking a plain item and returning ``{"fields": ...}``
+or ``None``, which is the ``transform(item)`` contract of the migration runner.
+"""
+
+
+def field_value(field):
+    """The stored value of a field entry, localized or not."""
+    return field["localizedValue"] if "localizedValue" in field else field.get("value")
+
+
+def make_field(key, value, localized=False):
+    return {"key": key, "localizedValue" if localized else "value": value}
+
+
+class FieldSet:
+    """An item's ``fields`` list indexed by key, preserving order."""
+
+    def __init__(self, fields):
+        self.fields = {f.get("key"): f for f in fields or []}
+
+    def __contains__(self, key):
+        return key in self.fields
+
+    def get(self, key):
+        return self.fields.get(key)
+
+    def value(self, key, default=None):
+        field = self.fields.get(key)
+        return default if field is None else field_value(field)
+
+    def set(self, key, value, localized=False):
+        self.fields[key] = make_field(key, value, localized)
+
+    def rename(self, old, new):
+        if old not in self.fields or old == new:
+            return
+        self.fields = {(new if k == old else k): (dict(f, key=new) if k == old else f)
+                       for k, f in self.fields.items() if k != new}
+
+    def drop(self, *keys):
+        for key in keys:
+            self.fields.pop(key, None)
+
+    def keep(self, *keys):
+        self.fields = {k: f for k, f in self.fields.items() if k in keys}
+
+    def to_list(self):
+        return list(self.fields.values())
+
+
+class Add:
+    """Add a field, replacing an existing one only with ``overwrite=True``."""
+
+    def __init__(self, key, value, localized=False, overwrite=False):
+        self.key, self.value, self.localized, self.overwrite = key, value, localized, overwrite
+
+    def __call__(self, fields):
+        if self.overwrite or self.key not in fields:
+            fields.set(self.key, self.value, self.localized)
+
+
+class SetDefault(Add):
+    """Add a field only when it is missing."""
+
+    def __init__(self, key, value, localized=False):
+        super().__init__(key, value, localized)
+
+
+class Rename:
+    """Rename a field, replacing any field already under the new key."""
+
+    def __init__(self, old, new):
+        self.old, self.new = old, new
+
+    def __call__(self, fields):
+        fields.rename(self.old, self.new)
+
+
+class Drop:
+    """Drop the listed fields; missing ones are ignored."""
+
+    def __init__(self, *keys):
+        self.keys = keys
+
+    def __call__(self, fields):
+        fields.drop(*self.keys)
+
+
+class Keep:
+    """Drop every field not listed."""
+
+    def __init__(self, *keys):
+        self.keys = keys
+
+    def __call__(self, fields):
+        fields.keep(*self.keys)
+
+
+class Wrap:
+    """Collect several fields into one object appended to an array field.
+
+    ``mapping`` maps source field keys to attribute names in the new object;
+    the source fields are dropped unless ``keep_sources`` is set.
+    """
+
+    def __init__(self, into, mapping, keep_sources=False):
+        self.into, self.mapping, self.keep_sources = into, mapping, keep_sources
+
+    def __call__(self, fields):
+        entry = {attr: fields.value(key) for key, attr in self.mapping.items() if key in fields}
+        items = list(fields.value(self.into) or [])
+        fields.set(self.into, items + [entry])
+        if not self.keep_sources:
+            fields.drop(*(k for k in self.mapping if k != self.into))
+
+
+class FieldTransform:
+    """An ordered list of field operations, applied to matching components.
+
+    ``component_type`` restricts the transform to one componentType and
+    ``skip_if_present`` names a field whose presence marks a component as
+    already migrated.
+    """
+
+    def __init__(self, *operations, component_type=None, skip_if_present=None):
+        self.operations = operations
+        self.component_type = component_type
+        self.skip_if_present = skip_if_present
+
+    def apply(self, fields):
+        """Return the transformed fields list, or ``None`` if nothing changed."""
+        indexed = FieldSet(fields)
+        if self.skip_if_present and self.skip_if_present in indexed:
+            return None
+        for operation in self.operations:
+            operation(indexed)
+        result = indexed.to_list()
+        return None if result == list(fields or []) else result
+
+    def __call__(self, item):
+        if self.component_type and item.get("componentType") != self.component_type:
+            return None
+        fields = self.apply(item.get("fields"))
+        return None if fields is None else {"fields": fields}
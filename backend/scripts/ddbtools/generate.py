@@ -0,0 +1,294 @@
+"""Synthetic, production-shaped items for the single table.
+
+``DataGenerator`` produces raw items with the key patterns the NestJS services
+write: users keyed both by id (``GSI1SK = EMAIL#<email>``) and by email
+(``SK = PROFILE``, as the OTP login creates them), orders and activity rows on
+GSI1 and GSI2, CMS pages and their components under ``GSI1PK = PAGE#<id>``,
+coupons and coupon usages, subscription plans and user subscriptions.
+
+- ``mix`` weights how the requested item count is split across entities;
+- ``skew`` concentrates orders, activity and subscriptions on a few users
+  (0 is uniform; at 2, half the references go to the busiest ~3% of users);
+- ``item_bytes`` pads a free-text attribute (``PAD_ATTRIBUTES``) up to that size;
+- ``duplicate_rate`` re-creates that fraction of CMS pages (with their
+  components), coupons and users under new ids, as a re-run seed would. A
+  duplicated user is a second ``USER#<id>`` row with the same
+  ``GSI1SK = EMAIL#<email>``; a login profile with that email would not be one.
+
+Output is deterministic for a given ``seed``.
+"""
+
+import random
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from .codec import marshal
+from .memory import item_size
+
+DEFAULT_MIX = {
+    "ACTIVITY": 55,
+    "ORDER": 12,
+    "USER": 10,
+    "CMS_COMPONENT": 8,
+    "USER_SUBSCRIPTION": 5,
+    "COUPON_USAGE": 5,
+    "CMS_PAGE": 1,
+    "COUPON": 1,
+}
+
+PAGE_SLUGS = ["home", "about", "teachings", "events", "donation", "contact", "gallery", "ashram",
+              "seva", "publications", "bhajans", "yagya", "satsang", "pilgrimage", "faq"]
+COMPONENT_TYPES = ["hero_section", "text_block", "image_gallery", "upcoming_events", "testimonials",
+                   "video_embed", "announcement_bar", "donation_cta"]
+GLOBAL_COMPONENT_TYPES = ["header", "footer", "announcement_bar"]
+GLOBAL_PAGE_ID = "__GLOBAL__"
+ACTIONS = ["LOGIN", "CREATE", "UPDATE", "DELETE", "VIEW", "PURCHASE", "DONATE", "SUBSCRIBE"]
+ACTIVITY_ENTITIES = ["user", "order", "product", "page", "component", "donation", "subscription"]
+PLANS = [("free", 0), ("basic", 199), ("premium", 499), ("lifetime", 4999)]
+PRODUCTS = [("Rudraksha Mala", 499), ("Puja Thali", 899), ("Bhagavad Gita", 299), ("Gangajal", 99),
+            ("Hanuman Chalisa", 49), ("Tulsi Mala", 199)]
+
+PAD_ATTRIBUTES = {
+    "ACTIVITY": "details",
+    "ORDER": "adminNotes",
+    "USER": "bio",
+    "CMS_COMPONENT": "customClasses",
+    "COUPON": "description",
+    "USER_SUBSCRIPTION": "notes",
+    "SUBSCRIPTION_PLAN": "description",
+}
+_FILLER = "ॐ नमः शिवाय Om Namah Shivaya "
+
+EPOCH = datetime(2025, 1, 1, tzinfo=timezone.utc)
+SPAN_DAYS = 540
+
+
+def localized(en, hi=None):
+    return {"en": en, "hi": hi or f"{en} (हिंदी)"}
+
+
+class DataGenerator:
+    def __init__(self, seed=0, skew=1.0, item_bytes=0, duplicate_rate=0.0, mix=None):
+        self.random = random.Random(seed)
+        self.skew = skew
+        self.item_bytes = item_bytes
+        self.duplicate_rate = duplicate_rate
+        self.mix = dict(mix or DEFAULT_MIX)
+        self.users = []  # (id, email, keyed by email)
+        self.coupons = []
+        self.plans = []
+        self.counts = {}
+        self.coupon_users = set()
+
+    # Helpers
+
+    def uuid(self):
+        return str(uuid.UUID(int=self.random.getrandbits(128), version=4))
+
+    def timestamp(self, after=None):
+        start = datetime.fromisoformat(after.replace("Z", "+00:00")) if after else EPOCH
+        span = (EPOCH + timedelta(days=SPAN_DAYS) - start).total_seconds()
+        moment = start + timedelta(seconds=self.random.random() * max(span, 1))
+        return moment.isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+    def user(self):
+        """A user reference, skewed towards the first (busiest) users."""
+        index = int(len(self.users) * self.random.random() ** (1 + self.skew))
+        return self.users[min(index, len(self.users) - 1)][:2]
+
+    def finish(self, entity, item):
+        attribute = PAD_ATTRIBUTES.get(entity)
+        if self.item_bytes and attribute:
+            raw = marshal(item)
+            missing = self.item_bytes - item_size(raw)
+            if missing > 0:
+                text = (_FILLER * (missing // len(_FILLER.encode("utf-8")) + 1))
+                item[attribute] = item.get(attribute, "") + text.encode("utf-8")[:missing].decode("utf-8", "ignore")
+        self.counts[entity] = self.counts.get(entity, 0) + 1
+        return marshal(item)
+
+    def plan_counts(self, total):
+        weight = sum(self.mix.values())
+        return {entity: max(int(total * w / weight), 0) for entity, w in self.mix.items()}
+
+    # Entities
+
+    def make_user(self, email=None, by_email=None):
+        """A user keyed by id or, as OTP sign-ups are, by email."""
+        user_id = self.uuid()
+        email = email or f"devotee.{len(self.users)}.{user_id[:6]}@example.com"
+        created = self.timestamp()
+        if by_email is None:
+            by_email = self.random.random() < 0.5
+        if not by_email:
+            item = {"PK": f"USER#{user_id}", "SK": f"USER#{user_id}", "GSI1PK": "USER",
+                    "GSI1SK": f"EMAIL#{email}", "id": user_id, "email": email,
+                    "name": f"Devotee {len(self.users)}", "role": "user", "status": "active",
+                    "createdAt": created, "updatedAt": created}
+        else:
+            item = {"PK": f"USER#{email}", "SK": "PROFILE", "GSI1PK": "USER", "GSI1SK": created,
+                    "id": user_id, "email": email, "hasPassword": False, "isVerified": True,
+                    "role": "user", "createdAt": created, "updatedAt": created, "lastLoginAt": created}
+        self.users.append((user_id, email, by_email))
+        return self.finish("USER", item)
+
+    def make_plan(self, order):
+        name, price = PLANS[order % len(PLANS)]
+        plan_id = self.uuid()
+        created = self.timestamp()
+        self.plans.append((plan_id, name, price))
+        return self.finish("SUBSCRIPTION_PLAN", {
+            "PK": f"SUBSCRIPTION_PLAN#{plan_id}", "SK": f"SUBSCRIPTION_PLAN#{plan_id}",
+            "GSI1PK": "SUBSCRIPTION_PLAN", "GSI1SK": f"ORDER#{order:03d}#{name}",
+            "id": plan_id, "name": localized(name.title()), "planType": name, "price": price,
+            "billingCycle": "monthly", "isActive": True, "createdAt": created, "updatedAt": created})
+
+    def make_coupon(self, code=None):
+        coupon_id = self.uuid()
+        code = code or f"SEVA{len(self.coupons):05d}"
+        created = self.timestamp()
+        self.coupons.append((coupon_id, code))
+        return self.finish("COUPON", {
+            "PK": f"COUPON#{coupon_id}", "SK": f"COUPON#{coupon_id}", "GSI1PK": "COUPON",
+            "GSI1SK": f"CODE#{code}", "id": coupon_id, "code": code,
+            "type": self.random.choice(["percentage", "fixed"]), "value": self.random.choice([10, 15, 20, 100]),
+            "minOrderAmount": 0, "expiresAt": self.timestamp(), "isActive": True, "usageLimit": 1000,
+            "usageCount": 0, "createdAt": created, "updatedAt": created})
+
+    def make_coupon_usage(self):
+        # A user redeems a coupon once: (coupon, user) is the item key
+        for _ in range(1000):
+            coupon_id, _ = self.coupons[self.random.randrange(len(self.coupons))]
+            user_id, _ = self.user()
+            if (coupon_id, user_id) not in self.coupon_users:
+                break
+        else:
+            raise ValueError("Too few coupons and users for the requested COUPON_USAGE share")
+        self.coupon_users.add((coupon_id, user_id))
+        return self.finish("COUPON_USAGE", {
+            "PK": f"COUPON_USAGE#{coupon_id}", "SK": f"USER#{user_id}", "couponId": coupon_id,
+            "userId": user_id, "orderId": self.uuid(), "discountAmount": self.random.choice([50, 100, 150]),
+            "usedAt": self.timestamp()})
+
+    def make_order(self):
+        user_id, email = self.user()
+        order_id = self.uuid()
+        created = self.timestamp()
+        items = []
+        for _ in range(self.random.randint(1, 4)):
+            title, price = self.random.choice(PRODUCTS)
+            items.append({"productId": self.uuid(), "title": title, "price": price,
+                          "quantity": self.random.randint(1, 3)})
+        return self.finish("ORDER", {
+            "PK": f"ORDER#{order_id}", "SK": f"ORDER#{order_id}", "GSI1PK": "ORDER", "GSI1SK": f"DATE#{created}",
+            "GSI2PK": f"USER#{user_id}", "GSI2SK": f"ORDER#{created}", "id": order_id, "userId": user_id,
+            "userEmail": email, "status": self.random.choice(["pending", "confirmed", "shipped", "delivered"]),
+            "items": items, "totalItems": sum(i["quantity"] for i in items),
+            "totalAmount": sum(i["price"] * i["quantity"] for i in items), "currency": "INR",
+            "shippingAddress": {"name": "Devotee", "city": "Varanasi", "state": "Uttar Pradesh",
+                                "pincode": "221001"},
+            "paymentStatus": self.random.choice(["created", "captured", "captured", "failed"]),
+            "createdAt": created, "updatedAt": created})
+
+    def make_activity(self):
+        user_id, email = self.user()
+        activity_id = self.uuid()
+        created = self.timestamp()
+        return self.finish("ACTIVITY", {
+            "PK": f"ACTIVITY#{activity_id}", "SK": f"ACTIVITY#{activity_id}", "GSI1PK": "ACTIVITY",
+            "GSI1SK": f"DATE#{created}", "GSI2PK": f"ACTIVITY_USER#{user_id}", "GSI2SK": f"DATE#{created}",
+            "id": activity_id, "userId": user_id, "userEmail": email, "action": self.random.choice(ACTIONS),
+            "entityType": self.random.choice(ACTIVITY_ENTITIES), "entityId": self.uuid(),
+            "details": "", "ipAddress": f"10.{self.random.randrange(256)}.{self.random.randrange(256)}.1",
+            "createdAt": created})
+
+    def make_user_subscription(self):
+        user_id, email = self.user()
+        plan_id, name, price = self.random.choice(self.plans)
+        sub_id = self.uuid()
+        created = self.timestamp()
+        status = self.random.choice(["active", "active", "expired", "cancelled"])
+        return self.finish("USER_SUBSCRIPTION", {
+            "PK": f"USER_SUBSCRIPTION#{sub_id}", "SK": f"USER_SUBSCRIPTION#{sub_id}",
+            "GSI1PK": f"USER#{user_id}", "GSI1SK": f"USER_SUBSCRIPTION#{created}",
+            "GSI2PK": "USER_SUBSCRIPTION", "GSI2SK": f"STATUS#{status}#{created}", "id": sub_id,
+            "userId": user_id, "userEmail": email, "planId": plan_id, "planName": localized(name.title()),
+            "planType": name, "pricePaid": price, "status": status, "startDate": created,
+            "createdAt": created, "updatedAt": created})
+
+    def make_page(self, number, slug, components):
+        """A page and its components; ``number`` orders the pages."""
+        page_id = self.uuid()
+        created = self.timestamp()
+        yield self.finish("CMS_PAGE", {
+            "PK": f"CMS_PAGE#{page_id}", "SK": f"CMS_PAGE#{page_id}", "GSI1PK": "CMS_PAGE",
+            "GSI1SK": f"ORDER#{number:03d}#{slug}", "id": page_id, "slug": slug,
+            "title": localized(slug.replace("-", " ").title()), "path": f"/{slug}", "status": "published",
+            "displayOrder": number, "componentIds": [], "createdAt": created, "updatedAt": created})
+        for order in range(components):
+            yield self.make_component(page_id, order, self.random.choice(COMPONENT_TYPES), created)
+
+    def make_component(self, page_id, order, component_type, after=None):
+        component_id = self.uuid()
+        created = self.timestamp(after)
+        fields = [{"key": "title", "localizedValue": localized(f"{component_type.replace('_', ' ').title()}")}]
+        for i in range(self.random.randint(2, 12)):
+            fields.append({"key": f"item{i}", "localizedValue": localized(f"Satsang line {i}")})
+        if component_type == "hero_section":
+            fields += [{"key": "backgroundImage", "value": f"https://cdn.example.com/hero/{component_id}.jpg"},
+                       {"key": "heading", "localizedValue": localized("Jai Shri Ram")},
+                       {"key": "ctaLink", "value": "/donation"}]
+        return self.finish("CMS_COMPONENT", {
+            "PK": f"CMS_COMPONENT#{component_id}", "SK": f"CMS_COMPONENT#{component_id}",
+            "GSI1PK": f"PAGE#{page_id}", "GSI1SK": f"ORDER#{order:03d}#{component_type}",
+            "id": component_id, "pageId": page_id, "componentType": component_type,
+            "name": localized(component_type.replace("_", " ").title()), "fields": fields,
+            "displayOrder": order, "isVisible": True, "createdAt": created, "updatedAt": created})
+
+    # Stream
+
+    def items(self, total):
+        """Yield about ``total`` raw items (plus duplicates) in dependency order."""
+        counts = self.plan_counts(total)
+        for _ in range(max(counts.get("USER", 0), 1)):
+            if self.random.random() < self.duplicate_rate:
+                # A seed run twice: two id rows for one email (PROFILE rows are keyed by it)
+                yield self.make_user(by_email=False)
+                yield self.make_user(self.users[-1][1], by_email=False)
+            else:
+                yield self.make_user()
+        for order in range(len(PLANS)):
+            yield self.make_plan(order)
+        for _ in range(max(counts.get("COUPON", 0), 1)):
+            yield self.make_coupon()
+            if self.random.random() < self.duplicate_rate:
+                yield self.make_coupon(code=self.coupons[-1][1])
+
+        per_page = max(counts.get("CMS_COMPONENT", 0) // max(counts.get("CMS_PAGE", 0), 1), 1)
+        for component_type in GLOBAL_COMPONENT_TYPES:
+            yield self.make_component(GLOBAL_PAGE_ID, 0, component_type)
+        for number in range(counts.get("CMS_PAGE", 0)):
+            slug = PAGE_SLUGS[number] if number < len(PAGE_SLUGS) else f"page-{number}"
+            components = self.random.randint(max(per_page // 2, 1), per_page * 3 // 2 + 1)
+            yield from self.make_page(number, slug, components)
+            if self.random.random() < self.duplicate_rate:
+                yield from self.make_page(number, slug, components)
+
+        producers = [(self.make_order, counts.get("ORDER", 0)),
+                     (self.make_activity, counts.get("ACTIVITY", 0)),
+                     (self.make_user_subscription, counts.get("USER_SUBSCRIPTION", 0)),
+                     (self.make_coupon_usage, counts.get("COUPON_USAGE", 0))]
+        remaining = [count for _, count in producers]
+        while any(remaining):
+            i = self.random.choices(range(len(producers)), weights=remaining)[0]
+            remaining[i] -= 1
+            yield producers[i][0]()
+
+
+def parse_mix(values):
+    """``["ACTIVITY=80", "ORDER=20"]`` -> ``{"ACTIVITY": 80.0, "ORDER": 20.0}`` over the defaults."""
+    mix = dict(DEFAULT_MIX)
+    for value in values or ():
+        entity, _, weight = value.partition("=")
+        mix[entity.strip().upper()] = float(weight)
+    return mix
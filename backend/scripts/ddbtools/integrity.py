@@ -0,0 +1,112 @@
+"""Referential integrity checks across entities, as hash joins.
+
+Foreign keys are declared once, in ``schema.RELATIONS``. ``IntegrityCheck``
+takes the rows of one pass over the table, in any order. Every parent row adds
+its id to its entity's hash set (the build side) and every child row probes
+the set of the parent it refers to. A probe whose parent has not been seen
+yet waits until the pass is over, so only those references are held in
+memory, and is then probed once more; what is still missing is an orphan.
+
+The orphan report is JSON lines, one orphan per line with its relation, key
+and dangling reference. ``keys_from_report`` turns a report back into keys for
+``batch.batch_delete``.
+"""
+
+import json
+from collections import Counter, defaultdict
+
+from .batch import key
+from .schema import NESTED_ENTITIES, RELATIONS, item_entity
+
+
+def parent_id(row):
+    """The id children refer to: the ``id`` attribute, else the id in the PK."""
+    return row.get("id") or row["PK"].split("#", 1)[1]
+
+
+class IntegrityCheck:
+    """Build/probe hash join of child references against parent ids."""
+
+    def __init__(self, relations=RELATIONS):
+        self.relations = list(relations)
+        self.parents = {r.parent: set() for r in self.relations}
+        self.children = defaultdict(list)
+        for relation in self.relations:
+            self.children[relation.child].append(relation)
+        self.pending = {r.name: [] for r in self.relations}
+        self.checked = Counter()
+        self.rows = 0
+
+    @property
+    def entities(self):
+        return set(self.parents) | set(self.children)
+
+    @property
+    def prefixes(self):
+        """PK prefixes of every entity involved; nested entities live under their parent's."""
+        return sorted({NESTED_ENTITIES.get(e, e) for e in self.entities})
+
+    @property
+    def projection(self):
+        attrs = {"PK", "SK", "id"}
+        for relation in self.relations:
+            attrs.add(relation.attribute)
+            attrs.update(relation.where)
+        return tuple(sorted(attrs))
+
+    def add(self, row):
+        """Account for one decoded row; rows of unrelated entities are ignored."""
+        entity = item_entity(row["PK"], row["SK"])
+        self.rows += 1
+        if entity in self.parents:
+            self.parents[entity].add(parent_id(row))
+        for relation in self.children.get(entity, ()):
+            if any(row.get(a) != v for a, v in relation.where.items()):
+                continue
+            reference = row.get(relation.attribute)
+            # An empty reference is an optional link, not a broken one
+            if not reference or reference in relation.ignore:
+                continue
+            self.checked[relation.name] += 1
+            if reference not in self.parents[relation.parent]:
+                self.pending[relation.name].append((reference, row["PK"], row["SK"]))
+
+    def orphans(self):
+        """Yield a report entry for every child whose parent never turned up."""
+        for relation in self.relations:
+            ids = self.parents[relation.parent]
+            for reference, pk, sk in self.pending[relation.name]:
+                if reference not in ids:
+                    yield {"relation": relation.name, "PK": pk, "SK": sk, "reference": reference}
+
+
+def write_report(path, orphans):
+    """Write orphans as JSON lines and return how many there were per relation."""
+    counts = Counter()
+    with open(path, "w", encoding="utf-8") as f:
+        for orphan in orphans:
+            f.write(json.dumps(orphan) + "\n")
+            counts[orphan["relation"]] += 1
+    return counts
+
+
+def read_report(path, relations=None):
+    """Yield the orphans of a report, optionally only for the named relations."""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            orphan = json.loads(line)
+            if relations is None or orphan["relation"] in relations:
+                yield orphan
+
+
+def keys_from_report(path, relations=None):
+    """Unique table keys of a report's orphans, ready for ``batch_delete``."""
+    seen = set()
+    for orphan in read_report(path, relations):
+        pair = orphan["PK"], orphan["SK"]
+        if pair not in seen:
+            seen.add(pair)
+            yield key(*pair)
+
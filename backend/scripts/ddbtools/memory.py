@@ -0,0 +1,523 @@
+"""An in-process stand-in for the single table, for offline runs and benchmarks.
+
+``MemoryTransport`` answers the same ``call(operation, **params)`` requests as
+the real transports, against tables modelled on ``create-local-table.sh``:
+``PK``/``SK`` plus the global secondary indexes of ``schema.TABLE_INDEXES``, with
+every key attribute a string. It supports GetItem, PutItem, UpdateItem,
+DeleteItem, Query (base table and indexes), Scan with Segment/TotalSegments,
+BatchWriteItem, BatchGetItem and DescribeTable, including 1 MB / ``Limit``
+paging, ``LastEvaluatedKey``, conditional writes and ``ConsumedCapacity``.
+
+Throttling can be simulated two ways: ``throttle_rate`` rejects that fraction
+of requests (and of batch entries, which come back unprocessed), and
+``capacity=(rcu, wcu)`` makes the table PROVISIONED and rejects requests once a
+second's consumption exceeds it, so the rate limiter sees the same
+``ProvisionedThroughputExceededException`` as in production. ``latency`` adds a
+fixed delay per request, outside the table lock, to model network round trips.
+
+Stored items are never modified in place (writes store a new copy), so a Query
+or Scan holds the lock only while it picks the items of its page; filtering,
+projection and copying run outside it and parallel scan segments overlap.
+"""
+
+import math
+import random
+import threading
+import time
+import zlib
+from bisect import bisect_left, bisect_right, insort
+
+from .expressions import (
+    Context, ExpressionError, apply_update, copy_item, evaluate, matches, parse_condition, project,
+)
+from .schema import TABLE_INDEXES
+from .transport import TransportError
+
+PAGE_BYTES = 1024 * 1024
+MAX_BATCH_WRITE = 25
+MAX_BATCH_GET = 100
+THROTTLED = "ProvisionedThroughputExceededException"
+_HIGHEST = "\U0010ffff"
+# Handlers that take the transport lock only around their table reads
+_LOCKS_ITSELF = ("Query", "Scan")
+
+
+def _value_size(value):
+    tag, inner = next(iter(value.items()))
+    if tag == "S":
+        return len(inner.encode("utf-8"))
+    if tag == "N":
+        return len(inner) // 2 + 1
+    if tag in ("B", "SS", "BS", "NS"):
+        return len(inner) if tag == "B" else sum(len(str(v)) for v in inner)
+    if tag == "M":
+        return 3 + sum(len(k) + _value_size(v) for k, v in inner.items())
+    if tag == "L":
+        return 3 + sum(_value_size(v) + 1 for v in inner)
+    return 1
+
+
+def item_size(item):
+    """Approximate stored size of a raw item, as DynamoDB meters it."""
+    return sum(len(k) + _value_size(v) for k, v in item.items())
+
+
+def read_units(size, consistent=False):
+    return max(math.ceil(size / 4096), 1) * (1.0 if consistent else 0.5)
+
+
+def write_units(size):
+    return float(max(math.ceil(size / 1024), 1))
+
+
+def segment_of(pk, total_segments):
+    return zlib.crc32(pk.encode("utf-8")) % total_segments
+
+
+class MemoryTable:
+    """Items of one table, with sorted partitions and GSI partitions."""
+
+    def __init__(self, name, indexes=TABLE_INDEXES):
+        self.name = name
+        self.indexes = indexes
+        self.partitions = {}  # pk -> (sorted sks, {sk: item})
+        self.index_partitions = {index: {} for index in indexes}  # gsi pk -> sorted (gsi sk, pk, sk)
+        self.size = 0
+        self.count = 0
+        self.sizes = {}  # (pk, sk) -> item_size, so pages are measured without re-walking items
+        self._segments = {}
+
+    def get(self, pk, sk):
+        partition = self.partitions.get(pk)
+        return partition[1].get(sk) if partition else None
+
+    def _index_entries(self, item):
+        for index, (hash_key, range_key) in self.indexes.items():
+            if "S" in item.get(hash_key, {}) and "S" in item.get(range_key, {}):
+                yield index, item[hash_key]["S"], (item[range_key]["S"], item["PK"]["S"], item["SK"]["S"])
+
+    def _unindex(self, item):
+        for index, gpk, entry in self._index_entries(item):
+            entries = self.index_partitions[index][gpk]
+            del entries[bisect_left(entries, entry)]
+            if not entries:
+                del self.index_partitions[index][gpk]
+
+    def put(self, item):
+        pk, sk = item["PK"]["S"], item["SK"]["S"]
+        partition = self.partitions.get(pk)
+        if partition is None:
+            partition = self.partitions[pk] = ([], {})
+            self._segments.clear()
+        old = partition[1].get(sk)
+        if old is None:
+            insort(partition[0], sk)
+            self.count += 1
+        else:
+            self._unindex(old)
+            self.size -= self.sizes[pk, sk]
+        partition[1][sk] = item
+        self.sizes[pk, sk] = size = item_size(item)
+        self.size += size
+        for index, gpk, entry in self._index_entries(item):
+            insort(self.index_partitions[index].setdefault(gpk, []), entry)
+        return old
+
+    def delete(self, pk, sk):
+        partition = self.partitions.get(pk)
+        old = partition[1].pop(sk, None) if partition else None
+        if old is None:
+            return None
+        sks = partition[0]
+        del sks[bisect_left(sks, sk)]
+        if not sks:
+            del self.partitions[pk]
+            self._segments.clear()
+        self._unindex(old)
+        self.size -= self.sizes.pop((pk, sk))
+        self.count -= 1
+        return old
+
+    def size_of(self, item):
+        return self.sizes[item["PK"]["S"], item["SK"]["S"]]
+
+    def segment_pks(self, segment, total_segments):
+        """Sorted partition keys of one scan segment, cached until partitions change."""
+        key = (segment, total_segments)
+        if key not in self._segments:
+            self._segments[key] = sorted(pk for pk in self.partitions if segment_of(pk, total_segments) == segment)
+        return self._segments[key]
+
+
+def _sort_key_range(node, attribute, context):
+    """Inclusive (low, high) bounds a key condition puts on the sort key."""
+    if node[0] == "between":
+        return context.value(node[2][1])["S"], context.value(node[3][1])["S"]
+    if node[0] == "fn" and node[1] == "begins_with":
+        prefix = context.value(node[2][1][1])["S"]
+        return prefix, prefix + _HIGHEST
+    if node[0] == "cmp":
+        value = context.value(node[3][1])["S"]
+        return {"=": (value, value), "<": ("", value), "<=": ("", value),
+                ">": (value, _HIGHEST), ">=": (value, _HIGHEST)}[node[1]]
+    raise ExpressionError(f"Unsupported key condition on {attribute}")
+
+
+def _key_condition(expression, hash_key, context):
+    """Split a key condition into the partition value and the sort key predicate."""
+    node = parse_condition(expression)
+    parts = [node[1], node[2]] if node[0] == "and" else [node]
+    partition, sort_condition = None, None
+    for part in parts:
+        if part[0] == "cmp" and part[1] == "=" and part[2][0] == "path" \
+                and context.path(part[2]) == (hash_key,):
+            partition = context.value(part[3][1])["S"]
+        else:
+            sort_condition = part
+    if partition is None:
+        raise ExpressionError(f"Query condition missed key schema element: {hash_key}")
+    return partition, sort_condition
+
+
+class MemoryTransport:
+    name = "memory"
+
+    def __init__(self, throttle_rate=0.0, capacity=None, latency=0.0, seed=None):
+        self.tables = {}
+        self.throttle_rate = throttle_rate
+        self.capacity = capacity
+        self.latency = latency
+        self.random = random.Random(seed)
+        self.lock = threading.RLock()
+        self._window = (0, 0.0, 0.0)  # second, read units, write units
+
+    def table(self, name):
+        with self.lock:
+            if name not in self.tables:
+                self.tables[name] = MemoryTable(name)
+            return self.tables[name]
+
+    def load(self, table, items):
+        """Bulk-load raw items without metering or throttling; returns the count."""
+        target = self.table(table)
+        count = 0
+        with self.lock:
+            for item in items:
+                target.put(item)
+                count += 1
+        return count
+
+    def load_snapshot(self, table, directory):
+        from .snapshot import read_snapshot
+
+        return self.load(table, read_snapshot(directory))
+
+    def call(self, operation, **params):
+        if self.latency:
+            time.sleep(self.latency)
+        handler = getattr(self, f"_{operation}", None)
+        if handler is None:
+            raise TransportError(operation, "UnknownOperationException", f"{operation} is not supported")
+        try:
+            if operation in _LOCKS_ITSELF:
+                return handler(operation, **params)
+            with self.lock:
+                return handler(operation, **params)
+        except ExpressionError as e:
+            raise TransportError(operation, "ValidationException", str(e))
+
+    # Throttling and metering
+
+    def _throttled(self, kind):
+        if self.throttle_rate and self.random.random() < self.throttle_rate:
+            return True
+        if not self.capacity:
+            return False
+        second, read, write = self._window
+        if int(time.monotonic()) != second:
+            return False
+        return (read if kind == "read" else write) >= self.capacity[0 if kind == "read" else 1]
+
+    def _check(self, operation, kind):
+        if self._throttled(kind):
+            raise TransportError(operation, THROTTLED, "The level of configured provisioned throughput "
+                                                       "for the table was exceeded")
+
+    def _consume(self, kind, units):
+        now = int(time.monotonic())
+        second, read, write = self._window
+        if now != second:
+            read, write = 0.0, 0.0
+        self._window = (now, read + (units if kind == "read" else 0), write + (units if kind == "write" else 0))
+
+    def _capacity(self, params, table, units):
+        if params.get("ReturnConsumedCapacity") in ("TOTAL", "INDEXES"):
+            return {"ConsumedCapacity": {"TableName": table, "CapacityUnits": units}}
+        return {}
+
+    # Single-item operations
+
+    def _key(self, operation, key):
+        try:
+            return key["PK"]["S"], key["SK"]["S"]
+        except (KeyError, TypeError):
+            raise TransportError(operation, "ValidationException",
+                                 "The provided key element does not match the schema") from None
+
+    def _condition(self, operation, params, item):
+        if not matches(params.get("ConditionExpression"), item or {},
+                       params.get("ExpressionAttributeNames"), params.get("ExpressionAttributeValues")):
+            raise TransportError(operation, "ConditionalCheckFailedException", "The conditional request failed")
+
+    def _returned(self, params, old, new):
+        mode = params.get("ReturnValues", "NONE")
+        if mode in ("ALL_OLD", "UPDATED_OLD") and old is not None:
+            return {"Attributes": copy_item(old)}
+        if mode in ("ALL_NEW", "UPDATED_NEW") and new is not None:
+            return {"Attributes": copy_item(new)}
+        return {}
+
+    def _GetItem(self, operation, TableName, Key, **params):
+        self._check(operation, "read")
+        table = self.table(TableName)
+        item = table.get(*self._key(operation, Key))
+        units = read_units(item_size(item) if item else 0, params.get("ConsistentRead", False))
+        self._consume("read", units)
+        response = self._capacity(params, TableName, units)
+        if item is not None:
+            response["Item"] = copy_item(project(item, params.get("ProjectionExpression"),
+                                                 params.get("ExpressionAttributeNames")))
+        return response
+
+    def _PutItem(self, operation, TableName, Item, **params):
+        self._check(operation, "write")
+        table = self.table(TableName)
+        key = self._key(operation, Item)
+        old = table.get(*key)
+        self._condition(operation, params, old)
+        table.put(copy_item(Item))
+        units = write_units(max(item_size(Item), item_size(old) if old else 0))
+        self._consume("write", units)
+        return {**self._capacity(params, TableName, units), **self._returned(params, old, None)}
+
+    def _UpdateItem(self, operation, TableName, Key, **params):
+        self._check(operation, "write")
+        table = self.table(TableName)
+        pk, sk = self._key(operation, Key)
+        old = table.get(pk, sk)
+        self._condition(operation, params, old)
+        names, values = params.get("ExpressionAttributeNames"), params.get("ExpressionAttributeValues")
+        new = old or {"PK": {"S": pk}, "SK": {"S": sk}}
+        if params.get("UpdateExpression"):
+            new = apply_update(params["UpdateExpression"], new, names, values)
+        if new.get("PK") != {"S": pk} or new.get("SK") != {"S": sk}:
+            raise TransportError(operation, "ValidationException", "Cannot update attribute PK or SK")
+        table.put(new)
+        units = write_units(max(item_size(new), item_size(old) if old else 0))
+        self._consume("write", units)
+        return {**self._capacity(params, TableName, units), **self._returned(params, old, new)}
+
+    def _DeleteItem(self, operation, TableName, Key, **params):
+        self._check(operation, "write")
+        table = self.table(TableName)
+        key = self._key(operation, Key)
+        old = table.get(*key)
+        self._condition(operation, params, old)
+        table.delete(*key)
+        units = write_units(item_size(old) if old else 0)
+        self._consume("write", units)
+        return {**self._capacity(params, TableName, units), **self._returned(params, old, None)}
+
+    # Reads of many items
+
+    def _page(self, table, candidates, params):
+        """Pick the candidates of one page, up to ``Limit`` or 1 MB; called under the lock.
+
+        Returns the items evaluated, the bytes read and the last item evaluated
+        when the page stopped before the candidates ran out.
+        """
+        limit = params.get("Limit")
+        items, size, last = [], 0, None
+        for item in candidates:
+            if (limit and len(items) >= limit) or size >= PAGE_BYTES:
+                return items, size, last
+            size += table.size_of(item)
+            items.append(item)
+            last = item
+        return items, size, None
+
+    def _response(self, TableName, params, page, units, key_attributes):
+        """Filter, project and copy a page's items; runs outside the lock."""
+        evaluated, _, last = page
+        if params.get("FilterExpression"):
+            context = Context(params.get("ExpressionAttributeNames"), params.get("ExpressionAttributeValues"))
+            filter_node = parse_condition(params["FilterExpression"])
+            items = [i for i in evaluated if evaluate(filter_node, i, context)]
+        else:
+            items = evaluated
+        response = {"Count": len(items), "ScannedCount": len(evaluated),
+                    **self._capacity(params, TableName, units)}
+        if params.get("Select") != "COUNT":
+            response["Items"] = [copy_item(project(i, params.get("ProjectionExpression"),
+                                                   params.get("ExpressionAttributeNames"))) for i in items]
+        if last is not None:
+            response["LastEvaluatedKey"] = {a: last[a] for a in key_attributes}
+        return response
+
+    def _read_page(self, operation, TableName, params, select):
+        """Run ``select(table)`` under the lock to pick a page, then build the response outside it."""
+        with self.lock:
+            self._check(operation, "read")
+            table = self.table(TableName)
+            page, key_attributes = select(table)
+            units = read_units(page[1], params.get("ConsistentRead", False))
+            self._consume("read", units)
+        return self._response(TableName, params, page, units, key_attributes)
+
+    def _Query(self, operation, TableName, KeyConditionExpression, **params):
+        context = Context(params.get("ExpressionAttributeNames"), params.get("ExpressionAttributeValues"))
+        index = params.get("IndexName")
+        forward = params.get("ScanIndexForward", True)
+        start = params.get("ExclusiveStartKey")
+
+        def select(table):
+            if index is not None and index not in table.indexes:
+                raise TransportError(operation, "ValidationException",
+                                     f"The table does not have the index {index}")
+            hash_key, range_key = table.indexes[index] if index else ("PK", "SK")
+            partition, sort_condition = _key_condition(KeyConditionExpression, hash_key, context)
+            low, high = ("", _HIGHEST) if sort_condition is None else \
+                _sort_key_range(sort_condition, range_key, context)
+
+            if index is None:
+                entries, items = table.partitions.get(partition, ([], {}))
+                first, end = bisect_left(entries, low), bisect_right(entries, high)
+                position = start["SK"]["S"] if start else None
+                resolve = items.__getitem__
+            else:
+                entries = table.index_partitions[index].get(partition, [])
+                first, end = bisect_left(entries, (low,)), bisect_right(entries, (high, _HIGHEST))
+                position = (start[range_key]["S"], start["PK"]["S"], start["SK"]["S"]) if start else None
+                resolve = lambda entry: table.partitions[entry[1]][1][entry[2]]  # noqa: E731
+            if position is not None:
+                if forward:
+                    first = max(first, bisect_right(entries, position))
+                else:
+                    end = min(end, bisect_left(entries, position))
+            order = range(first, end) if forward else range(end - 1, first - 1, -1)
+
+            def candidates():
+                for i in order:
+                    item = resolve(entries[i])
+                    if sort_condition is None or evaluate(sort_condition, item, context):
+                        yield item
+
+            key_attributes = ("PK", "SK") + ((hash_key, range_key) if index else ())
+            return self._page(table, candidates(), params), key_attributes
+
+        return self._read_page(operation, TableName, params, select)
+
+    def _Scan(self, operation, TableName, **params):
+        if params.get("IndexName"):
+            raise TransportError(operation, "ValidationException", "Index scans are not supported")
+        total = params.get("TotalSegments", 1)
+        segment = params.get("Segment", 0)
+        if not 0 <= segment < total:
+            raise TransportError(operation, "ValidationException", "Segment must be less than TotalSegments")
+        start = params.get("ExclusiveStartKey")
+
+        def select(table):
+            pks = table.segment_pks(segment, total)
+
+            def candidates():
+                for i in range(bisect_left(pks, start["PK"]["S"]) if start else 0, len(pks)):
+                    pk = pks[i]
+                    partition = table.partitions.get(pk)
+                    if partition is None:
+                        continue
+                    sks = partition[0]
+                    offset = bisect_right(sks, start["SK"]["S"]) if start and pk == start["PK"]["S"] else 0
+                    for sk in sks[offset:]:
+                        yield partition[1][sk]
+
+            return self._page(table, candidates(), params), ("PK", "SK")
+
+        return self._read_page(operation, TableName, params, select)
+
+    def _BatchGetItem(self, operation, RequestItems, **params):
+        requested = sum(len(r["Keys"]) for r in RequestItems.values())
+        if requested > MAX_BATCH_GET:
+            raise TransportError(operation, "ValidationException", f"Too many items requested ({requested})")
+        responses, unprocessed, capacity = {}, {}, []
+        for name, request in RequestItems.items():
+            table = self.table(name)
+            found, units = [], 0.0
+            for key in request["Keys"]:
+                if self._throttled("read"):
+                    unprocessed.setdefault(name, {**request, "Keys": []})["Keys"].append(key)
+                    continue
+                item = table.get(*self._key(operation, key))
+                units += read_units(item_size(item) if item else 0, request.get("ConsistentRead", False))
+                if item is not None:
+                    found.append(copy_item(project(item, request.get("ProjectionExpression"),
+                                                   request.get("ExpressionAttributeNames"))))
+            self._consume("read", units)
+            responses[name] = found
+            capacity.append({"TableName": name, "CapacityUnits": units})
+        response = {"Responses": responses, "UnprocessedKeys": unprocessed}
+        if params.get("ReturnConsumedCapacity") in ("TOTAL", "INDEXES"):
+            response["ConsumedCapacity"] = capacity
+        return response
+
+    def _BatchWriteItem(self, operation, RequestItems, **params):
+        requested = sum(len(r) for r in RequestItems.values())
+        if requested > MAX_BATCH_WRITE:
+            raise TransportError(operation, "ValidationException", f"Too many items requested ({requested})")
+        unprocessed, capacity = {}, []
+        for name, requests in RequestItems.items():
+            table = self.table(name)
+            keys = [self._key(operation, r["PutRequest"]["Item"] if "PutRequest" in r else r["DeleteRequest"]["Key"])
+                    for r in requests]
+            if len(set(keys)) != len(keys):
+                raise TransportError(operation, "ValidationException",
+                                     "Provided list of item keys contains duplicates")
+            units = 0.0
+            for request, key in zip(requests, keys):
+                if self._throttled("write"):
+                    unprocessed.setdefault(name, []).append(request)
+                    continue
+                if "PutRequest" in request:
+                    item = request["PutRequest"]["Item"]
+                    table.put(copy_item(item))
+                    units += write_units(item_size(item))
+                else:
+                    old = table.delete(*key)
+                    units += write_units(item_size(old) if old else 0)
+            self._consume("write", units)
+            capacity.append({"TableName": name, "CapacityUnits": units})
+        response = {"UnprocessedItems": unprocessed}
+        if params.get("ReturnConsumedCapacity") in ("TOTAL", "INDEXES"):
+            response["ConsumedCapacity"] = capacity
+        return response
+
+    def _DescribeTable(self, operation, TableName, **params):
+        table = self.table(TableName)
+        description = {
+            "TableName": TableName,
+            "TableStatus": "ACTIVE",
+            "KeySchema": [{"AttributeName": "PK", "KeyType": "HASH"}, {"AttributeName": "SK", "KeyType": "RANGE"}],
+            "GlobalSecondaryIndexes": [
+                {"IndexName": index, "KeySchema": [{"AttributeName": h, "KeyType": "HASH"},
+                                                   {"AttributeName": r, "KeyType": "RANGE"}]}
+                for index, (h, r) in table.indexes.items()
+            ],
+            "ItemCount": table.count,
+            "TableSizeBytes": table.size,
+        }
+        if self.capacity:
+            description["BillingModeSummary"] = {"BillingMode": "PROVISIONED"}
+            description["ProvisionedThroughput"] = {"ReadCapacityUnits": self.capacity[0],
+                                                    "WriteCapacityUnits": self.capacity[1]}
+        else:
+            description["BillingModeSummary"] = {"BillingMode": "PAY_PER_REQUEST"}
+        return {"Table": description}
@@ -0,0 +1,162 @@
+"""Versioned data migrations for the single table.
+
+A migration is a module in ``scripts/migrations`` named ``NNNN_description.py``
+that defines:
+
+- ``ENTITY``: the entity prefix to read (``"CMS_COMPONENT"``, ...), read through
+  ``TableAccess`` so indexed entities are queried rather than scanned;
+- ``KEYS`` (optional): index template values, e.g. ``{"pageId": "..."}``;
+- ``transform(item)``: given a plain item, return a dict of the attributes to
+  set, or ``None`` when the item needs no change. Returning ``None`` for items
+  already in the new shape is what makes a migration safe to re-run.
+
+Every update is conditional on the changed attributes still holding the values
+that were read, so a concurrent edit is reported as a conflict instead of being
+overwritten. Once a migration has been applied its state is recorded in the
+table itself under ``PK = MIGRATION#<id>``. A run that skipped conflicting
+items is recorded as ``partial`` and runs again next time, so the skipped
+items are migrated once they are no longer being edited.
+"""
+
+import importlib.util
+import os
+import threading
+from datetime import datetime, timezone
+
+from .batch import DEFAULT_CONCURRENCY, run_parallel
+from .codec import decode, marshal, marshal_value, unmarshal
+from .transport import TransportError
+
+STATE_ENTITY = "MIGRATION"
+
+
+class Migration:
+    def __init__(self, path):
+        self.id = os.path.splitext(os.path.basename(path))[0]
+        spec = importlib.util.spec_from_file_location(f"migrations.m{self.id}", path)
+        self.module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(self.module)
+        self.description = (self.module.__doc__ or "").strip().split("\n")[0]
+        self.entity = self.module.ENTITY
+        self.keys = getattr(self.module, "KEYS", {})
+        self.transform = self.module.transform
+
+    @property
+    def key(self):
+        return {"PK": {"S": f"{STATE_ENTITY}#{self.id}"}, "SK": {"S": f"{STATE_ENTITY}#{self.id}"}}
+
+
+def load_migrations(directory):
+    """All migrations in ``directory``, in version order."""
+    names = sorted(n for n in os.listdir(directory) if n.endswith(".py") and n[:4].isdigit())
+    return [Migration(os.path.join(directory, n)) for n in names]
+
+
+class MigrationResult:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.scanned = 0
+        self.changed = 0
+        self.conflicts = 0
+        self.errors = []
+
+    def add(self, changed=0, conflicts=0, errors=()):
+        with self._lock:
+            self.changed += changed
+            self.conflicts += conflicts
+            self.errors.extend(errors)
+
+    def summary(self):
+        return (f"{self.scanned} items read, {self.changed} changed, "
+                f"{self.conflicts} conflicts, {len(self.errors)} errors")
+
+
+def _placeholders(changes, original):
+    """SET expression and a condition that the changed attributes are unchanged."""
+    names, values, sets, conditions = {}, {}, [], []
+    for i, (attr, value) in enumerate(changes.items()):
+        names[f"#a{i}"] = attr
+        values[f":v{i}"] = marshal_value(value)
+        sets.append(f"#a{i} = :v{i}")
+        if attr in original:
+            values[f":o{i}"] = marshal_value(original[attr])
+            conditions.append(f"#a{i} = :o{i}")
+        else:
+            conditions.append(f"attribute_not_exists(#a{i})")
+    return {
+        "UpdateExpression": "SET " + ", ".join(sets),
+        "ConditionExpression": " AND ".join(conditions),
+        "ExpressionAttributeNames": names,
+        "ExpressionAttributeValues": values,
+    }
+
+
+class MigrationRunner:
+    def __init__(self, transport, table, access, concurrency=DEFAULT_CONCURRENCY, dry_run=True, log=print):
+        self.transport = transport
+        self.table = table
+        self.access = access
+        self.concurrency = concurrency
+        self.dry_run = dry_run
+        self.log = log
+
+    def state(self, migration):
+        item = self.transport.call("GetItem", TableName=self.table, Key=migration.key).get("Item")
+        return unmarshal(item) if item else None
+
+    def plan(self, migration, result):
+        """Yield ``(key, original, changes)`` for every item the migration changes."""
+        for raw in self.access.items(migration.entity, **migration.keys):
+            result.scanned += 1
+            item = decode(raw)
+            changes = migration.transform(item)
+            if not changes:
+                continue
+            changes = {k: v for k, v in changes.items() if item.get(k) != v}
+            if changes:
+                yield {"PK": raw["PK"], "SK": raw["SK"]}, item, changes
+
+    def update(self, task, result):
+        key, original, changes = task
+        try:
+            self.transport.call("UpdateItem", TableName=self.table, Key=key,
+                                **_placeholders(changes, original))
+        except TransportError as e:
+            if e.code == "ConditionalCheckFailedException":
+                self.log(f"  CONFLICT: {key['PK']['S']} changed since it was read, skipped")
+                result.add(conflicts=1)
+            else:
+                result.add(errors=[str(e)])
+            return
+        result.add(changed=1)
+
+    def run(self, migration):
+        result = MigrationResult()
+        if self.dry_run:
+            for key, _, changes in self.plan(migration, result):
+                self.log(f"  WOULD UPDATE: {key['PK']['S']} ({', '.join(sorted(changes))})")
+                result.add(changed=1)
+            return result
+        run_parallel(lambda task: self.update(task, result), self.plan(migration, result), self.concurrency)
+        if not result.errors:
+            self.record(migration, result)
+        return result
+
+    def record(self, migration, result):
+        """Record the run; with conflicts it is ``partial``, which still counts as pending."""
+        now = datetime.now(timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+        item = {
+            "GSI1PK": STATE_ENTITY,
+            "GSI1SK": f"ID#{migration.id}",
+            "id": migration.id,
+            "description": migration.description,
+            "status": "partial" if result.conflicts else "applied",
+            "itemsRead": result.scanned,
+            "itemsChanged": result.changed,
+            "conflicts": result.conflicts,
+            "createdAt": now,
+            "updatedAt": now,
+        }
+        if not result.conflicts:
+            item["appliedAt"] = now
+        self.transport.call("PutItem", TableName=self.table, Item={**migration.key, **marshal(item)})
@@ -0,0 +1,182 @@
+"""Adaptive, capacity-driven rate limiting for maintenance jobs.
+
+Maintenance scripts share the table with the live API, so they must not eat
+its provisioned throughput. ``RateLimitedTransport`` wraps any transport: it
+asks DynamoDB for ``ReturnConsumedCapacity`` on every request, charges the
+reported units to a read or write token bucket and blocks the next request
+until the bucket is back in credit. A bucket refills at its target rate, so
+consumption averages out at the budget however large individual pages are.
+
+The rate adapts: a throttling error halves it, and every successful request
+wins back a small step towards the target (AIMD). With ``budget_percent`` the
+target follows the table's provisioned capacity, re-read periodically so it
+tracks auto-scaling.
+"""
+
+import threading
+import time
+
+from .batch import RETRYABLE_ERRORS, backoff_delay
+from .transport import TransportError, consumed_capacity
+
+DEFAULT_BUDGET_PERCENT = 30.0
+BURST_SECONDS = 2.0
+MIN_RATE_FRACTION = 0.05
+RECOVERY_STEP = 0.05
+REFRESH_SECONDS = 60.0
+MAX_RETRIES = 8
+
+READ_OPERATIONS = {"GetItem", "BatchGetItem", "Query", "Scan", "TransactGetItems"}
+WRITE_OPERATIONS = {"PutItem", "UpdateItem", "DeleteItem", "BatchWriteItem", "TransactWriteItems"}
+
+
+class TokenBucket:
+    """Token bucket that is charged after the fact and may go into debt."""
+
+    def __init__(self, rate, burst_seconds=BURST_SECONDS):
+        self._lock = threading.Lock()
+        self.target = rate
+        self.rate = rate
+        self.burst_seconds = burst_seconds
+        self.tokens = rate * burst_seconds
+        self.updated = time.monotonic()
+        self.consumed = 0.0
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.rate * self.burst_seconds,
+                          self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait(self):
+        """Block until the bucket is out of debt."""
+        while True:
+            with self._lock:
+                self._refill()
+                if self.tokens >= 0:
+                    return
+                delay = -self.tokens / self.rate
+            time.sleep(delay)
+
+    def charge(self, units):
+        with self._lock:
+            self._refill()
+            self.tokens -= units
+            self.consumed += units
+
+    def throttled(self):
+        with self._lock:
+            self.rate = max(self.target * MIN_RATE_FRACTION, self.rate / 2)
+
+    def succeeded(self):
+        with self._lock:
+            self.rate = min(self.target, self.rate + self.target * RECOVERY_STEP)
+
+    def retarget(self, rate):
+        with self._lock:
+            self.rate = self.rate * rate / self.target
+            self.target = rate
+
+
+class RateLimitedTransport:
+    """Transport wrapper holding reads and writes at a capacity budget.
+
+    ``read_rate``/``write_rate`` are in capacity units per second; ``None``
+    leaves that side unlimited. ``refresh`` is an optional callable returning
+    fresh ``(read_rate, write_rate)`` targets, polled every ``REFRESH_SECONDS``.
+    """
+
+    def __init__(self, transport, read_rate=None, write_rate=None, refresh=None,
+                 max_retries=MAX_RETRIES):
+        self.transport = transport
+        self.name = transport.name
+        self.reads = TokenBucket(read_rate) if read_rate else None
+        self.writes = TokenBucket(write_rate) if write_rate else None
+        self.refresh = refresh
+        self.refreshed = time.monotonic()
+        self.max_retries = max_retries
+        self.throttles = 0
+
+    def _bucket(self, operation):
+        if operation in READ_OPERATIONS:
+            return self.reads
+        if operation in WRITE_OPERATIONS:
+            return self.writes
+        return None
+
+    def _maybe_refresh(self):
+        if not self.refresh or time.monotonic() - self.refreshed < REFRESH_SECONDS:
+            return
+        self.refreshed = time.monotonic()
+        read_rate, write_rate = self.refresh()
+        if self.reads and read_rate:
+            self.reads.retarget(read_rate)
+        if self.writes and write_rate:
+            self.writes.retarget(write_rate)
+
+    def call(self, operation, **params):
+        bucket = self._bucket(operation)
+        if bucket is None:
+            return self.transport.call(operation, **params)
+        self._maybe_refresh()
+        params.setdefault("ReturnConsumedCapacity", "TOTAL")
+        attempt = 0
+        while True:
+            bucket.wait()
+            try:
+                response = self.transport.call(operation, **params)
+            except TransportError as e:
+                if e.code not in RETRYABLE_ERRORS or attempt >= self.max_retries:
+                    raise
+                self.throttles += 1
+                bucket.throttled()
+                time.sleep(backoff_delay(attempt))
+                attempt += 1
+                continue
+            bucket.charge(consumed_capacity(response))
+            bucket.succeeded()
+            return response
+
+    def report(self):
+        parts = []
+        for label, bucket in (("read", self.reads), ("write", self.writes)):
+            if bucket:
+                parts.append(f"{bucket.consumed:.1f} {label} units at <= {bucket.target:.1f}/s")
+        return f"Rate limit: {', '.join(parts)}, {self.throttles} throttles absorbed"
+
+
+def provisioned_rates(transport, table, percent):
+    """``percent`` of the table's provisioned (RCU, WCU), or ``(None, None)`` on demand."""
+    description = transport.call("DescribeTable", TableName=table)["Table"]
+    throughput = description.get("ProvisionedThroughput") or {}
+    billing = (description.get("BillingModeSummary") or {}).get("BillingMode", "PROVISIONED")
+    if billing == "PAY_PER_REQUEST":
+        return None, None
+    scale = percent / 100.0
+    rcu = throughput.get("ReadCapacityUnits") or 0
+    wcu = throughput.get("WriteCapacityUnits") or 0
+    return (rcu * scale or None), (wcu * scale or None)
+
+
+def limit_from_args(transport, args):
+    """Wrap ``transport`` according to the budget options of ``add_transport_args``.
+
+    Explicit ``--read-budget``/``--write-budget`` win; otherwise the budget is
+    ``--budget-percent`` (default 30) of the provisioned capacity of ``--table``.
+    """
+    read_rate, write_rate = args.read_budget, args.write_budget
+    table = getattr(args, "table", None)
+    percent = args.budget_percent if args.budget_percent is not None else DEFAULT_BUDGET_PERCENT
+    refresh = None
+    if table and percent > 0 and (read_rate is None or write_rate is None):
+        def refresh():
+            read, write = provisioned_rates(transport, table, percent)
+            return (args.read_budget or read), (args.write_budget or write)
+
+        try:
+            read_rate, write_rate = refresh()
+        except TransportError:
+            refresh = None
+    if not read_rate and not write_rate:
+        return transport
+    return RateLimitedTransport(transport, read_rate, write_rate, refresh)
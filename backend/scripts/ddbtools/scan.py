@@ -0,0 +1,139 @@
+"""Segmented, parallel table scans.
+
+``scan`` arguments are callables that take low-level Scan parameters and return
+one response page, e.g. ``functools.partial(transport.call, "Scan")`` or a boto3
+``Table.scan``. Each segment is paged by its own worker thread and the pages are
+merged into a single stream through a bounded queue, so memory stays flat no
+matter how far the workers run ahead of the consumer.
+"""
+
+import queue
+import threading
+from functools import partial
+
+DEFAULT_SEGMENTS = 4
+MAX_BUFFERED_PAGES = 16
+
+_DONE = object()
+
+
+def paginate(request, start_key=None, **params):
+    """Yield response pages of a Scan or Query, following LastEvaluatedKey."""
+    last_key = start_key
+    while True:
+        if last_key:
+            params["ExclusiveStartKey"] = last_key
+        page = request(**params)
+        yield page
+        last_key = page.get("LastEvaluatedKey")
+        if not last_key:
+            return
+
+
+def scan_pages(scan, segment=None, total_segments=None, start_key=None, **params):
+    """Yield every response page of one segment (or of the whole table)."""
+    if total_segments and total_segments > 1:
+        params["Segment"] = segment
+        params["TotalSegments"] = total_segments
+    return paginate(scan, start_key, **params)
+
+
+def merge_pages(sources, workers=DEFAULT_SEGMENTS, max_buffered_pages=MAX_BUFFERED_PAGES):
+    """Yield ``(cursor, page)`` pairs from several page streams read concurrently.
+
+    ``sources`` are ``(cursor, read)`` pairs, ``read()`` returning the page
+    iterator of one stream (a scan segment, an index partition). Up to
+    ``workers`` threads each take the next stream and read it to the end, so
+    pages of one stream arrive in order and pages of different streams
+    interleave. Pages are handed over through a bounded queue as they arrive.
+    A failure in any worker is re-raised here.
+    """
+    streams = queue.Queue()
+    for source in sources:
+        streams.put(source)
+    if streams.empty():
+        return
+    pages = queue.Queue(maxsize=max_buffered_pages)
+    stop = threading.Event()
+
+    def put(entry):
+        while not stop.is_set():
+            try:
+                pages.put(entry, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def worker():
+        while not stop.is_set():
+            try:
+                cursor, read = streams.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                for page in read():
+                    if not put((cursor, page)):
+                        return
+            except BaseException as e:
+                put((cursor, e))
+                return
+        put((None, _DONE))
+
+    threads = [threading.Thread(target=worker, daemon=True)
+               for _ in range(max(min(workers, streams.qsize()), 1))]
+    for t in threads:
+        t.start()
+
+    remaining = len(threads)
+    try:
+        while remaining:
+            cursor, page = pages.get()
+            if page is _DONE:
+                remaining -= 1
+            elif isinstance(page, BaseException):
+                raise page
+            else:
+                yield cursor, page
+    finally:
+        stop.set()
+        for t in threads:
+            t.join()
+
+
+def scan_segments(scan, segments=DEFAULT_SEGMENTS, start_keys=None, skip=(),
+                  max_buffered_pages=MAX_BUFFERED_PAGES, **params):
+    """Yield ``(segment, page)`` pairs from ``segments`` concurrent workers.
+
+    ``start_keys`` maps a segment number to the ``ExclusiveStartKey`` it should
+    resume from and segments listed in ``skip`` are not read at all. Pages from
+    different segments arrive interleaved; pages of the same segment arrive in
+    order. A failure in any worker is re-raised here.
+    """
+    start_keys = start_keys or {}
+    if segments <= 1:
+        if 0 in skip:
+            return
+        for page in scan_pages(scan, start_key=start_keys.get(0), **params):
+            yield 0, page
+        return
+
+    sources = [(s, partial(scan_pages, scan, s, segments, start_keys.get(s), **params))
+               for s in range(segments) if s not in skip]
+    yield from merge_pages(sources, segments, max_buffered_pages)
+
+
+def prefix_filter(prefixes):
+    """Scan params that keep only items whose PK starts with one of ``<prefix>#``."""
+    values = {f":p{i}": {"S": f"{p}#"} for i, p in enumerate(prefixes)}
+    return {
+        "FilterExpression": " OR ".join(f"begins_with(#pk, {v})" for v in values),
+        "ExpressionAttributeNames": {"#pk": "PK"},
+        "ExpressionAttributeValues": values,
+    }
+
+
+def parallel_scan(scan, segments=DEFAULT_SEGMENTS, **params):
+    """Yield every item matched by a scan split across ``segments`` workers."""
+    for _, page in scan_segments(scan, segments, **params):
+        yield from page.get("Items", [])
@@ -0,0 +1,153 @@
+"""Key layout of the single table, mirroring the NestJS services.
+
+Every entity stores ``PK = <ENTITY>#<id>``. ``ENTITY_INDEXES`` records the
+secondary index partition each entity is written under; templates such as
+``PAGE#{pageId}`` name the item attribute that completes the partition key.
+Entities missing here have no index that isolates them and must be scanned.
+
+``ENTITY_ATTRIBUTES`` records the stored type of each entity's well-known
+attributes, taken from the service entity interfaces, so ``codec`` can compile
+a decoder per entity. ``LOCALIZED`` is an ``{en, hi}`` string map and
+``FIELDS`` a component ``fields`` list; attributes not listed are decoded
+generically.
+
+``RELATIONS`` declares the foreign keys between entities: the child attribute
+that holds a parent row's ``id`` and, for children deleted with their parent,
+the ``Lookup`` partition that holds a parent's children. Entities in ``NESTED_ENTITIES`` live in
+their parent's partition (``PK = <PARENT>#<id>``) and are told apart by their
+SK prefix.
+"""
+
+from collections import namedtuple
+from string import Formatter
+
+TABLE_INDEXES = {
+    "GSI1": ("GSI1PK", "GSI1SK"),
+    "GSI2": ("GSI2PK", "GSI2SK"),
+    "GSI3": ("GSI3PK", "GSI3SK"),
+}
+
+Index = namedtuple("Index", "name template")
+
+ENTITY_INDEXES = {
+    "ACTIVITY": Index("GSI1", "ACTIVITY"),
+    "CMS_COMPONENT": Index("GSI1", "PAGE#{pageId}"),
+    "CMS_PAGE": Index("GSI1", "CMS_PAGE"),
+    "CONTENT": Index("GSI1", "CONTENT#{type}"),
+    "CONTENT_SCHEDULE": Index("GSI2", "CONTENT_SCHEDULE"),
+    "COUPON": Index("GSI1", "COUPON"),
+    "DONATION": Index("GSI1", "DONATION"),
+    "DONATION_CONFIG": Index("GSI1", "DONATION_CONFIG"),
+    "EVENT": Index("GSI1", "EVENT"),
+    "MIGRATION": Index("GSI1", "MIGRATION"),
+    "NEWSLETTER_CAMPAIGN": Index("GSI1", "NEWSLETTER_CAMPAIGN"),
+    "NEWSLETTER_SUBSCRIBER": Index("GSI1", "NEWSLETTER_SUBSCRIBER"),
+    "ORDER": Index("GSI1", "ORDER"),
+    "PAYMENT": Index("GSI1", "PAYMENT"),
+    "PRODUCT": Index("GSI1", "PRODUCT"),
+    "PRODUCT_CATEGORY": Index("GSI1", "PRODUCT_CATEGORY"),
+    "SETTINGS": Index("GSI1", "SETTINGS"),
+    "SUBSCRIPTION_CONTENT": Index("GSI1", "PLAN#{planId}"),
+    "SUBSCRIPTION_PLAN": Index("GSI1", "SUBSCRIPTION_PLAN"),
+    "SUPPORT_TICKET": Index("GSI1", "SUPPORT_TICKET"),
+    "TEACHING": Index("GSI1", "TEACHING#{category}"),
+    "USER": Index("GSI1", "USER"),
+    "USER_SUBSCRIPTION": Index("GSI2", "USER_SUBSCRIPTION"),
+}
+
+_KEYS = {"PK": "S", "SK": "S", "GSI1PK": "S", "GSI1SK": "S", "GSI2PK": "S", "GSI2SK": "S",
+         "GSI3PK": "S", "GSI3SK": "S"}
+_TIMESTAMPS = {"createdAt": "S", "updatedAt": "S"}
+
+ENTITY_ATTRIBUTES = {
+    "ACTIVITY": {"id": "S", "userId": "S", "userEmail": "S", "action": "S", "entityType": "S",
+                 "entityId": "S", "details": "S", "ipAddress": "S"},
+    "CMS_COMPONENT": {"id": "S", "pageId": "S", "componentType": "S", "name": "LOCALIZED",
+                      "description": "LOCALIZED", "fields": "FIELDS", "displayOrder": "N",
+                      "isVisible": "BOOL", "customClasses": "S"},
+    "CMS_PAGE": {"id": "S", "slug": "S", "title": "LOCALIZED", "description": "LOCALIZED",
+                 "path": "S", "heroImage": "S", "status": "S", "displayOrder": "N",
+                 "metaTitle": "LOCALIZED", "metaDescription": "LOCALIZED"},
+    "COUPON": {"id": "S", "code": "S", "type": "S", "value": "N", "minOrderAmount": "N",
+               "maxDiscount": "N", "expiresAt": "S", "isActive": "BOOL", "usageLimit": "N",
+               "usageCount": "N"},
+    "ORDER": {"id": "S", "userId": "S", "userEmail": "S", "status": "S", "totalItems": "N",
+              "totalAmount": "N", "currency": "S", "razorpayOrderId": "S",
+              "razorpayPaymentId": "S", "paymentStatus": "S", "paymentMethod": "S",
+              "trackingNumber": "S", "adminNotes": "S"},
+    "PAYMENT": {"id": "S", "type": "S", "userId": "S", "userEmail": "S", "entityId": "S",
+                "razorpayOrderId": "S", "razorpayPaymentId": "S", "amount": "N", "currency": "S",
+                "status": "S", "failureReason": "S"},
+    "PRODUCT": {"id": "S", "slug": "S", "title": "S", "titleHi": "S", "description": "S",
+                "descriptionHi": "S", "categoryId": "S", "categoryName": "S", "price": "N",
+                "originalPrice": "N", "stockStatus": "S", "isFeatured": "BOOL", "isActive": "BOOL",
+                "displayOrder": "N", "avgRating": "N", "totalReviews": "N"},
+    "SUPPORT_TICKET": {"id": "S", "ticketNumber": "S", "subject": "S", "message": "S",
+                       "category": "S", "status": "S", "priority": "S", "userId": "S",
+                       "userEmail": "S", "repliesCount": "N"},
+    "USER": {"id": "S", "email": "S", "name": "S", "role": "S", "status": "S"},
+}
+for _attributes in ENTITY_ATTRIBUTES.values():
+    _attributes.update(_KEYS)
+    _attributes.update(_TIMESTAMPS)
+
+# SK entity -> the entity whose partition it is stored in
+NESTED_ENTITIES = {
+    "REVIEW": "PRODUCT",
+    "TICKET_REPLY": "SUPPORT_TICKET",
+}
+
+
+# Partition ``template`` of ``index`` (None: the table itself), filled with the
+# parent's id, holding the children; ``sk_prefix`` narrows a shared partition
+Lookup = namedtuple("Lookup", "index template sk_prefix", defaults=(None,))
+
+
+class Relation(namedtuple("Relation", "child attribute parent where ignore lookup")):
+    """``child.attribute`` holds the ``id`` of a ``parent`` row.
+
+    Only child rows whose attributes equal every value in ``where`` carry the
+    reference; values in ``ignore`` refer to no row. Children of a relation
+    with a ``lookup`` are deleted together with their parent.
+    """
+
+    __slots__ = ()
+
+    def __new__(cls, child, attribute, parent, where=None, ignore=(), lookup=None):
+        return super().__new__(cls, child, attribute, parent, where or {}, frozenset(ignore), lookup)
+
+    @property
+    def name(self):
+        return f"{self.child}.{self.attribute}->{self.parent}"
+
+
+RELATIONS = [
+    # Components on every page are stored under the __GLOBAL__ pseudo-page
+    Relation("CMS_COMPONENT", "pageId", "CMS_PAGE", ignore=["__GLOBAL__"],
+             lookup=Lookup("GSI1", "PAGE#{pageId}")),
+    Relation("TICKET_REPLY", "ticketId", "SUPPORT_TICKET",
+             lookup=Lookup(None, "SUPPORT_TICKET#{ticketId}", "TICKET_REPLY#")),
+    Relation("COUPON_USAGE", "couponId", "COUPON", lookup=Lookup(None, "COUPON_USAGE#{couponId}")),
+    Relation("ORDER", "userId", "USER"),
+    # Order payments are recorded on the order itself; PAYMENT rows point at
+    # the subscription, donation or yagya booking they paid for
+    Relation("PAYMENT", "entityId", "USER_SUBSCRIPTION", where={"type": "subscription"}),
+    Relation("USER_SUBSCRIPTION", "planId", "SUBSCRIPTION_PLAN"),
+]
+
+
+def template_fields(template):
+    return [name for _, name, _, _ in Formatter().parse(template) if name]
+
+
+def entity_of(pk):
+    """``"CMS_PAGE#abc"`` -> ``"CMS_PAGE"``."""
+    return pk.split("#", 1)[0]
+
+
+def item_entity(pk, sk):
+    """Entity of a row, telling nested rows (``TICKET_REPLY#`` SKs) from their parent."""
+    entity = entity_of(sk)
+    if entity in NESTED_ENTITIES:
+        return entity
+    return entity_of(pk)
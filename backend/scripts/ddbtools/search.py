@@ -0,0 +1,289 @@
+"""Bilingual inverted index for the site search, ranked with BM25.
+
+``SearchService`` matches a query against the title, subtitle, description
+(and page slug) of every active product, event and published CMS page, in
+English or in Hindi with the English text as fallback. This module indexes
+exactly those texts ahead of time, one shard file per search type and locale:
+
+    search-index/
+        manifest.json
+        product.en.idx  product.hi.idx
+        event.en.idx    event.hi.idx
+        page.en.idx     page.hi.idx
+
+Text is normalised before it is split into terms: case folded, Latin accents
+dropped and, for Devanagari, nukta removed (ज़ = ज), long vowels and their
+matras folded into short ones (ी = ि, ू = ु), chandrabindu into anusvara and a
+nasal conjunct into anusvara (हिन्दी = हिंदी). Field weights multiply a term's
+frequency, so a title match outranks a description match.
+
+A shard is a flat little-endian file meant to be ``mmap``-ed, with no parsing
+at load time:
+
+    header    magic, document count, term count, average length and the
+              offsets of the four sections below
+    documents (id offset, id length, weighted length) per document
+    terms     (term offset, term length, document frequency, postings
+              offset) per term, sorted by the term's UTF-8 bytes
+    postings  per term, varint (document delta, weighted frequency) pairs
+    strings   UTF-8 ids and terms
+
+A lookup is a binary search over the fixed-width term table followed by a
+read of that term's postings, so a query costs what its terms match, not
+the size of the catalog.
+"""
+
+import heapq
+import json
+import math
+import mmap
+import os
+import re
+import struct
+import unicodedata
+from collections import Counter
+
+MAGIC = b"SRCHIDX1"
+HEADER = struct.Struct("<8sIIfIIII")
+DOCUMENT = struct.Struct("<III")
+TERM = struct.Struct("<IIII")
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+# Terms the last query word expands to when it is matched as a prefix
+MAX_PREFIX_TERMS = 64
+
+LOCALES = ("en", "hi")
+SEARCH_TYPES = {"product": "PRODUCT", "event": "EVENT", "page": "CMS_PAGE"}
+# (attribute, weight) per entity, as matched by SearchService
+FIELDS = {
+    "PRODUCT": (("title", 3), ("subtitle", 2), ("description", 1)),
+    "EVENT": (("title", 3), ("description", 1)),
+    "CMS_PAGE": (("title", 3), ("slug", 2)),
+}
+PROJECTION = ("id", "title", "titleHi", "subtitle", "subtitleHi", "description",
+              "descriptionHi", "slug", "isActive", "status")
+
+_FOLD = {
+    0x093C: None,  # nukta
+    0x0901: "ं",  # chandrabindu -> anusvara
+    0x0908: "इ",  # ई -> इ
+    0x090A: "उ",  # ऊ -> उ
+    0x0940: "ि",  # ी -> ि
+    0x0942: "ु",  # ू -> ु
+    0x200C: None,  # zero-width non-joiner
+    0x200D: None,  # zero-width joiner
+}
+_FOLD.update({c: None for c in range(0x0300, 0x0370)})  # Latin combining accents
+_FOLD.update({0x0966 + d: str(d) for d in range(10)})  # Devanagari digits
+_FOLD = str.maketrans(_FOLD)
+# A nasal consonant with virama before another consonant is written as anusvara
+_NASAL_CONJUNCT = re.compile("[ङञणनम]्(?=[क-ह])")
+_TOKEN = re.compile("[\\w\u0900-\u0963\u0970-\u097f]+")
+
+
+def normalize(text):
+    """Case-folded text with accents and Devanagari spelling variants folded."""
+    text = unicodedata.normalize("NFD", text).casefold().translate(_FOLD)
+    return _NASAL_CONJUNCT.sub("ं", text)
+
+
+def tokens(text):
+    return _TOKEN.findall(normalize(text))
+
+
+def searchable(entity, row):
+    """Whether ``SearchService`` would return the row at all."""
+    if entity == "CMS_PAGE":
+        return row.get("status") == "published"
+    return bool(row.get("isActive"))
+
+
+def field_text(row, name, locale):
+    """A field in ``locale``: an ``{en, hi}`` map entry or ``<name>Hi``, else the English text."""
+    value = row.get(name)
+    if isinstance(value, dict):
+        return value.get(locale) or value.get("en") or ""
+    if locale == "hi" and row.get(f"{name}Hi"):
+        return row[f"{name}Hi"]
+    return value if isinstance(value, str) else ""
+
+
+def document_terms(entity, row, locale):
+    """Weighted term frequencies of one row in one locale."""
+    terms = Counter()
+    for name, weight in FIELDS[entity]:
+        for term in tokens(field_text(row, name, locale)):
+            terms[term] += weight
+    return terms
+
+
+def _varint(value, out):
+    while value >= 0x80:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+class IndexBuilder:
+    """Collects documents in memory and writes them as one shard file."""
+
+    def __init__(self):
+        self.ids = []
+        self.lengths = []
+        self.postings = {}
+
+    def add(self, doc_id, terms):
+        number = len(self.ids)
+        self.ids.append(doc_id)
+        self.lengths.append(sum(terms.values()))
+        for term, frequency in terms.items():
+            self.postings.setdefault(term, []).append((number, frequency))
+
+    def write(self, path):
+        """Write the shard to ``path`` atomically; return its size in bytes."""
+        strings = bytearray()
+        documents = bytearray()
+        for doc_id, length in zip(self.ids, self.lengths):
+            encoded = doc_id.encode()
+            documents += DOCUMENT.pack(len(strings), len(encoded), length)
+            strings += encoded
+
+        terms = bytearray()
+        postings = bytearray()
+        for encoded, term in sorted((t.encode(), t) for t in self.postings):
+            entries = self.postings[term]
+            terms += TERM.pack(len(strings), len(encoded), len(entries), len(postings))
+            strings += encoded
+            previous = 0
+            for number, frequency in entries:
+                _varint(number - previous, postings)
+                _varint(frequency, postings)
+                previous = number
+
+        average = sum(self.lengths) / len(self.lengths) if self.lengths else 0.0
+        offset = HEADER.size
+        offsets = []
+        for section in (documents, terms, postings, strings):
+            offsets.append(offset)
+            offset += len(section)
+        header = HEADER.pack(MAGIC, len(self.ids), len(self.postings), average, *offsets)
+        with open(f"{path}.tmp", "wb") as f:
+            for section in (header, documents, terms, postings, strings):
+                f.write(section)
+        os.replace(f"{path}.tmp", path)
+        return offset
+
+
+class SearchIndex:
+    """A memory-mapped shard; ``search`` ranks its documents for a query."""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, self.documents, self.terms, self.average_length, self._documents,
+         self._terms, self._postings, self._strings) = HEADER.unpack_from(self._map)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a search index shard")
+
+    def close(self):
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _string(self, offset, length):
+        start = self._strings + offset
+        return self._map[start:start + length]
+
+    def _term(self, number):
+        return TERM.unpack_from(self._map, self._terms + number * TERM.size)
+
+    def _term_bytes(self, number):
+        offset, length, _, _ = self._term(number)
+        return self._string(offset, length)
+
+    def _lower_bound(self, encoded):
+        low, high = 0, self.terms
+        while low < high:
+            middle = (low + high) // 2
+            if self._term_bytes(middle) < encoded:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def term_numbers(self, term, prefix=False):
+        """Numbers of the terms equal to ``term`` or, with ``prefix``, starting with it."""
+        encoded = term.encode()
+        start = self._lower_bound(encoded)
+        if not prefix:
+            if start < self.terms and self._term_bytes(start) == encoded:
+                return range(start, start + 1)
+            return range(0)
+        end = self._lower_bound(encoded + b"\xff")
+        return range(start, min(end, start + MAX_PREFIX_TERMS))
+
+    def postings(self, number):
+        """Yield ``(document number, weighted frequency)`` for a term number."""
+        _, _, count, offset = self._term(number)
+        data = self._map
+        position = self._postings + offset
+        document = 0
+        for _ in range(count):
+            values = []
+            for _ in range(2):
+                value, shift = 0, 0
+                while True:
+                    byte = data[position]
+                    position += 1
+                    value |= (byte & 0x7F) << shift
+                    if byte < 0x80:
+                        break
+                    shift += 7
+                values.append(value)
+            document += values[0]
+            yield document, values[1]
+
+    def document(self, number):
+        """``(id, weighted length)`` of a document number."""
+        offset, length, weighted = DOCUMENT.unpack_from(self._map, self._documents + number * DOCUMENT.size)
+        return self._string(offset, length).decode(), weighted
+
+    def search(self, query, limit=10, prefix=True):
+        """``[(id, score)]`` best first; with ``prefix`` the last word also matches as a prefix."""
+        words = tokens(query)
+        if not words or not self.documents:
+            return []
+        scores = {}
+        lengths = {}
+        for position, word in enumerate(words):
+            expand = prefix and position == len(words) - 1
+            for number in self.term_numbers(word, expand):
+                _, _, df, _ = self._term(number)
+                idf = math.log(1 + (self.documents - df + 0.5) / (df + 0.5))
+                for document, frequency in self.postings(number):
+                    length = lengths.get(document)
+                    if length is None:
+                        length = lengths[document] = self.document(document)[1]
+                    norm = K1 * (1 - B + B * length / self.average_length)
+                    scores[document] = scores.get(document, 0.0) + idf * frequency * (K1 + 1) / (frequency + norm)
+        best = heapq.nlargest(limit, scores.items(), key=lambda s: s[1])
+        return [(self.document(number)[0], score) for number, score in best]
+
+
+def shard_name(search_type, locale):
+    return f"{search_type}.{locale}"
+
+
+def load_manifest(directory):
+    with open(os.path.join(directory, "manifest.json")) as f:
+        return json.load(f)
+
+
+def open_shard(directory, search_type, locale):
+    return SearchIndex(os.path.join(directory, f"{shard_name(search_type, locale)}.idx"))
@@ -0,0 +1,189 @@
+"""Partition-key skew of the single table and write-sharding simulations.
+
+Many GSI partition keys are constants (``GSI1PK = USER``, ``PRODUCT``,
+``CART``, ...), so every row of the entity lands on one index partition, and
+every write to one of those rows is also a write to that partition.
+``SkewAnalyzer`` makes one pass over raw items and records, per value of
+``PK``, ``GSI1PK`` and ``GSI2PK``, the item count, the stored bytes and the
+WCU each item's last write cost, bucketed by the hour of its ``updatedAt``
+(or ``createdAt``). Peak hours give the write rate a partition has to absorb.
+
+The data only shows each item's last write, so rows updated many times (cart
+rows, counters) are undercounted; the rates are a lower bound.
+
+For the constant partitions, and any value named in ``simulate``, the WCU are
+also split by ``crc32(PK) % SHARD_SPACE``. That is enough to replay the same
+writes under ``<value>#0..N-1`` write sharding for any ``N`` dividing
+``SHARD_SPACE`` and report the load of the busiest shard. Reading the whole
+set back then takes ``N`` queries instead of one.
+"""
+
+import zlib
+from collections import Counter
+from datetime import datetime, timedelta
+
+from .memory import item_size, write_units
+
+KEY_ATTRIBUTES = ("PK", "GSI1PK", "GSI2PK")
+INDEX_ATTRIBUTES = ("GSI1PK", "GSI2PK")
+SHARD_SPACE = 64
+DEFAULT_SHARDS = (2, 4, 8, 16)
+# Per-partition limits DynamoDB enforces before it splits a partition
+PARTITION_WCU = 1000
+PARTITION_BYTES = 10 * 1024 ** 3
+HOUR = "%Y-%m-%dT%H"
+
+
+def constant_partition(value):
+    """Whether a partition key value is shared by a whole entity (no ``#<id>`` part)."""
+    return "#" not in value
+
+
+def write_hour(item):
+    """``YYYY-MM-DDTHH`` of the item's last write, or ``None`` without timestamps."""
+    for name in ("updatedAt", "createdAt"):
+        value = item.get(name, {}).get("S")
+        if value:
+            return value[:13]
+    return None
+
+
+def shard_of(pk, shards=SHARD_SPACE):
+    return zlib.crc32(pk.encode("utf-8")) % shards
+
+
+class SkewAnalyzer:
+    """Accumulates per-key volume and write-hour histograms from raw items."""
+
+    def __init__(self, simulate=()):
+        self.simulate = set(simulate)
+        self.items = 0
+        self.bytes = 0
+        # attribute -> value -> [items, bytes]
+        self.volume = {attribute: {} for attribute in KEY_ATTRIBUTES}
+        # (attribute, value) -> Counter(hour -> WCU)
+        self.hours = {}
+        # (attribute, value) -> Counter((hour, shard) -> WCU)
+        self.shards = {}
+        self.latest = None
+
+    def simulated(self, attribute, value):
+        return attribute in INDEX_ATTRIBUTES and (constant_partition(value) or value in self.simulate)
+
+    def add(self, item):
+        size = item_size(item)
+        units = write_units(size)
+        hour = write_hour(item)
+        pk = item["PK"]["S"]
+        self.items += 1
+        self.bytes += size
+        if hour is not None and (self.latest is None or hour > self.latest):
+            self.latest = hour
+        for attribute in KEY_ATTRIBUTES:
+            value = item.get(attribute, {}).get("S")
+            if value is None:
+                continue
+            entry = self.volume[attribute].get(value)
+            if entry is None:
+                entry = self.volume[attribute][value] = [0, 0]
+            entry[0] += 1
+            entry[1] += size
+            if hour is None or attribute == "PK":
+                continue
+            key = (attribute, value)
+            hours = self.hours.get(key)
+            if hours is None:
+                hours = self.hours[key] = Counter()
+            hours[hour] += units
+            if self.simulated(attribute, value):
+                shards = self.shards.get(key)
+                if shards is None:
+                    shards = self.shards[key] = Counter()
+                shards[hour, shard_of(pk)] += units
+
+    def window(self, days):
+        """First hour of the ``days``-day window that ends at the latest write seen."""
+        if self.latest is None:
+            return None
+        start = datetime.strptime(self.latest, HOUR) - timedelta(days=days) + timedelta(hours=1)
+        return start.strftime(HOUR)
+
+    def _rates(self, key, since, seconds):
+        """``(WCU in window, average WCU/s, peak-hour WCU/s)`` of one key value."""
+        hours = self.hours.get(key, {})
+        recent = {h: u for h, u in hours.items() if since is not None and h >= since}
+        total = sum(recent.values())
+        return total, total / seconds, max(recent.values(), default=0) / 3600
+
+    def report(self, top=10, window_days=30, shard_counts=DEFAULT_SHARDS):
+        """Plain-dict report: per attribute the ``top`` values, then the simulations."""
+        since = self.window(window_days)
+        seconds = window_days * 86400
+        attributes = {}
+        for attribute in KEY_ATTRIBUTES:
+            values = self.volume[attribute]
+            if not values:
+                continue
+            window_units = {v: self._rates((attribute, v), since, seconds)[0] for v in values} \
+                if attribute != "PK" else {}
+            total_units = sum(window_units.values())
+            items = sum(entry[0] for entry in values.values())
+            volume = sum(entry[1] for entry in values.values())
+            ranked = sorted(values.items(), key=lambda v: (-v[1][0], v[0]))[:top]
+            rows = []
+            for value, (count, size) in ranked:
+                row = {"value": value, "items": count, "bytes": size,
+                       "itemShare": count / items, "byteShare": size / volume if volume else 0.0,
+                       "overPartitionSize": size > PARTITION_BYTES}
+                if attribute != "PK":
+                    units, average, peak = self._rates((attribute, value), since, seconds)
+                    row.update(windowWcu=units, writeShare=units / total_units if total_units else 0.0,
+                               averageWcuPerSecond=average, peakWcuPerSecond=peak,
+                               overPartitionWcu=peak > PARTITION_WCU)
+                rows.append(row)
+            largest = max(entry[0] for entry in values.values())
+            attributes[attribute] = {
+                "values": len(values), "items": items, "bytes": volume,
+                # How many times the busiest value exceeds an even spread over all values
+                "itemSkew": largest / (items / len(values)),
+                "top": rows,
+            }
+            if total_units:
+                attributes[attribute]["writeSkew"] = max(window_units.values()) / (total_units / len(values))
+        return {
+            "items": self.items, "bytes": self.bytes,
+            "window": {"from": since, "to": self.latest, "days": window_days},
+            "attributes": attributes,
+            "simulations": self.simulations(since, shard_counts),
+        }
+
+    def simulations(self, since, shard_counts=DEFAULT_SHARDS):
+        """Busiest-shard load of each simulated value under each shard count."""
+        for count in shard_counts:
+            if SHARD_SPACE % count:
+                raise ValueError(f"Shard counts must divide {SHARD_SPACE}, got {count}")
+        results = []
+        for (attribute, value), units in sorted(self.shards.items()):
+            items, size = self.volume[attribute][value]
+            recent = {k: u for k, u in units.items() if since is not None and k[0] >= since}
+            hourly = Counter()
+            for (hour, _), wcu in recent.items():
+                hourly[hour] += wcu
+            options = [{"shards": 1, "peakWcuPerSecond": max(hourly.values(), default=0) / 3600,
+                        "imbalance": 1.0}]
+            for count in shard_counts:
+                per_hour = Counter()
+                totals = Counter()
+                for (hour, shard), wcu in recent.items():
+                    per_hour[hour, shard % count] += wcu
+                    totals[shard % count] += wcu
+                even = sum(totals.values()) / count
+                options.append({
+                    "shards": count,
+                    "peakWcuPerSecond": max(per_hour.values(), default=0) / 3600,
+                    # Busiest shard's share of the window's writes against an even split
+                    "imbalance": max(totals.values(), default=0) / even if even else 1.0,
+                })
+            results.append({"attribute": attribute, "value": value, "items": items, "bytes": size,
+                            "options": options})
+        return results
@@ -0,0 +1,161 @@
+"""Compressed, entity-partitioned table snapshots.
+
+A snapshot is a directory with one sub-directory per entity prefix (``USER``,
+``ORDER``, ``CMS_PAGE``, ...) holding JSON-lines files of raw DynamoDB-JSON
+items, so nothing is lost in conversion, plus a ``manifest.json``:
+
+    snapshots/prod-2026-10-18/
+        manifest.json
+        CMS_PAGE/part-00000.jsonl.zst
+        USER/part-00000.jsonl.zst
+        ...
+
+Files are zstd-compressed when the ``zstandard`` package is installed and
+gzip-compressed otherwise. Jobs that only need to read data can stream a
+snapshot with ``read_snapshot`` at disk speed instead of paying for a scan.
+"""
+
+import base64
+import gzip
+import io
+import json
+import os
+import time
+from datetime import datetime, timezone
+
+from .codec import loads
+from .schema import entity_of
+
+COMPRESSIONS = ("zstd", "gzip", "none")
+EXTENSIONS = {"zstd": ".jsonl.zst", "gzip": ".jsonl.gz", "none": ".jsonl"}
+ITEMS_PER_FILE = 500_000
+
+
+def _encode_binary(value):
+    # The SDK transport returns B/BS values as bytes; store them as the CLI does
+    if isinstance(value, (bytes, bytearray)):
+        return base64.b64encode(value).decode("ascii")
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def _decode_binary(value):
+    """Turn the base64 strings ``_encode_binary`` wrote back into bytes, in place."""
+    if "B" in value:
+        value["B"] = base64.b64decode(value["B"])
+    elif "BS" in value:
+        value["BS"] = [base64.b64decode(v) for v in value["BS"]]
+    elif "M" in value:
+        for v in value["M"].values():
+            _decode_binary(v)
+    elif "L" in value:
+        for v in value["L"]:
+            _decode_binary(v)
+
+
+def default_compression():
+    try:
+        import zstandard  # noqa: F401
+    except ImportError:
+        return "gzip"
+    return "zstd"
+
+
+def open_write(path, compression):
+    if compression == "zstd":
+        import zstandard
+
+        raw = open(path, "wb")
+        return io.TextIOWrapper(zstandard.ZstdCompressor(level=3).stream_writer(raw), encoding="utf-8")
+    if compression == "gzip":
+        return gzip.open(path, "wt", encoding="utf-8", compresslevel=6)
+    return open(path, "w", encoding="utf-8")
+
+
+def open_read(path):
+    if path.endswith(".zst"):
+        import zstandard
+
+        raw = open(path, "rb")
+        return io.TextIOWrapper(zstandard.ZstdDecompressor().stream_reader(raw), encoding="utf-8")
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8")
+    return open(path, encoding="utf-8")
+
+
+class SnapshotWriter:
+    """Routes raw items into per-entity part files and writes the manifest."""
+
+    def __init__(self, directory, compression=None, items_per_file=ITEMS_PER_FILE, **metadata):
+        self.directory = directory
+        self.compression = compression or default_compression()
+        self.items_per_file = items_per_file
+        self.metadata = metadata
+        self.partitions = {}
+        self.started = time.monotonic()
+        os.makedirs(directory, exist_ok=True)
+
+    def _partition(self, entity):
+        partition = self.partitions.get(entity)
+        if partition is None or partition["open_count"] >= self.items_per_file:
+            if partition is not None:
+                partition["handle"].close()
+            else:
+                os.makedirs(os.path.join(self.directory, entity), exist_ok=True)
+                partition = {"files": [], "items": 0}
+                self.partitions[entity] = partition
+            name = f"part-{len(partition['files']):05d}{EXTENSIONS[self.compression]}"
+            partition["files"].append(f"{entity}/{name}")
+            partition["handle"] = open_write(os.path.join(self.directory, entity, name), self.compression)
+            partition["open_count"] = 0
+        return partition
+
+    def write(self, item):
+        partition = self._partition(entity_of(item["PK"]["S"]))
+        line = json.dumps(item, separators=(",", ":"), ensure_ascii=False, default=_encode_binary)
+        partition["handle"].write(line)
+        partition["handle"].write("\n")
+        partition["open_count"] += 1
+        partition["items"] += 1
+
+    def close(self):
+        for partition in self.partitions.values():
+            partition["handle"].close()
+        manifest = {
+            **self.metadata,
+            "createdAt": datetime.now(timezone.utc).isoformat(timespec="seconds").replace("+00:00", "Z"),
+            "compression": self.compression,
+            "items": sum(p["items"] for p in self.partitions.values()),
+            "seconds": round(time.monotonic() - self.started, 1),
+            "entities": {
+                entity: {"items": p["items"], "files": p["files"]}
+                for entity, p in sorted(self.partitions.items())
+            },
+        }
+        with open(os.path.join(self.directory, "manifest.json"), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        return manifest
+
+
+def load_manifest(directory):
+    with open(os.path.join(directory, "manifest.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def read_snapshot(directory, entities=None):
+    """Stream raw items from a snapshot, optionally only some entity prefixes.
+
+    Binary values come back as bytes, as the SDK and memory transports return them.
+    """
+    manifest = load_manifest(directory)
+    for entity, partition in manifest["entities"].items():
+        if entities and entity not in entities:
+            continue
+        for name in partition["files"]:
+            with open_read(os.path.join(directory, name)) as f:
+                for line in f:
+                    item = loads(line)
+                    # Only lines holding a binary value pay for the walk
+                    if '"B"' in line or '"BS"' in line:
+                        for value in item.values():
+                            _decode_binary(value)
+                    yield item
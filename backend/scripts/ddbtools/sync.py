@@ -0,0 +1,67 @@
+"""Incremental copies: which items changed since the last sync.
+
+Items carry ``updatedAt`` (or only ``createdAt``, for rows that are never
+updated) as ``toISOString()`` timestamps, which compare correctly as strings.
+A sync records a watermark when it finishes; the next one copies only items
+stamped after it, plus the few that carry no timestamp at all. The watermark is the time the sync *started*, less
+``OVERLAP`` for clock skew between writers, so an item written while a scan
+was running is picked up by the next sync rather than lost. A copy from a
+snapshot holds the table as of the export, not the copy, so its watermark is
+taken from the manifest instead. Deletions are not seen this way;
+``diff-tables.py`` finds them.
+"""
+
+import json
+import os
+from datetime import datetime, timedelta, timezone
+
+OVERLAP = timedelta(minutes=5)
+
+
+def next_watermark(started):
+    """Watermark for a sync that started at ``started`` (an aware datetime)."""
+    moment = (started - OVERLAP).astimezone(timezone.utc)
+    return moment.isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+def snapshot_watermark(manifest):
+    """Watermark for a sync from a snapshot: from when its export scan started.
+
+    The manifest's ``createdAt`` is written when the export finishes, so its
+    ``seconds`` (the export's duration) are taken off as well.
+    """
+    finished = datetime.fromisoformat(manifest["createdAt"].replace("Z", "+00:00"))
+    return next_watermark(finished - timedelta(seconds=manifest.get("seconds", 0)))
+
+
+def changed_since_params(watermark):
+    """Scan params keeping items updated (or, lacking ``updatedAt``, created) after ``watermark``.
+
+    Items with neither timestamp (e.g. ``COUPON_USAGE``) cannot be dated and are always kept.
+    """
+    return {
+        "FilterExpression": "#u > :w OR (attribute_not_exists(#u) AND (#c > :w OR attribute_not_exists(#c)))",
+        "ExpressionAttributeNames": {"#u": "updatedAt", "#c": "createdAt"},
+        "ExpressionAttributeValues": {":w": {"S": watermark}},
+    }
+
+
+def changed_since(item, watermark):
+    """``changed_since_params`` for items that are already in hand, e.g. from a snapshot."""
+    stamp = item.get("updatedAt") or item.get("createdAt")
+    return stamp is None or stamp.get("S", "") > watermark
+
+
+def load_state(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_state(path, state):
+    """Replace the state file atomically, so an interrupted write keeps the old watermark."""
+    temporary = f"{path}.tmp"
+    with open(temporary, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+    os.replace(temporary, path)
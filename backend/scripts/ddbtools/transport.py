@@ -0,0 +1,150 @@
+"""Low-level DynamoDB transports.
+
+Every transport exposes ``call(operation, **params)`` taking the API operation
+name (``"Scan"``, ``"DeleteItem"``, ...) and the request parameters in the
+low-level API shape, and returning the raw DynamoDB-JSON response. This keeps
+the scripts independent of whether requests go through the ``aws`` CLI or an
+in-process boto3 client, or to the in-memory table of ``ddbtools.memory``.
+"""
+
+import json
+import re
+import subprocess
+
+from . import PROFILE, REGION
+from .codec import loads
+
+TRANSPORTS = ("cli", "sdk", "memory")
+DEFAULT_POOL_SIZE = 10
+
+_CLI_ERROR_RE = re.compile(r"An error occurred \((\w+)\)")
+
+
+class TransportError(Exception):
+    """A DynamoDB request failed; ``code`` is the AWS error code when known."""
+
+    def __init__(self, operation, code, message):
+        super().__init__(f"{operation} failed ({code}): {message}")
+        self.operation = operation
+        self.code = code
+
+
+def consumed_capacity(response):
+    """Capacity units reported by a response made with ReturnConsumedCapacity.
+
+    Single-table operations return one ``ConsumedCapacity`` object, batch
+    operations a list of them.
+    """
+    capacity = response.get("ConsumedCapacity")
+    if not capacity:
+        return 0.0
+    if isinstance(capacity, dict):
+        capacity = [capacity]
+    return sum(c.get("CapacityUnits", 0.0) for c in capacity)
+
+
+def _kebab(operation):
+    return re.sub(r"(?<!^)(?=[A-Z])", "-", operation).lower()
+
+
+def _snake(operation):
+    return re.sub(r"(?<!^)(?=[A-Z])", "_", operation).lower()
+
+
+class CliTransport:
+    """Runs every request in a fresh ``aws dynamodb`` process."""
+
+    name = "cli"
+
+    def __init__(self, profile=PROFILE, region=REGION, endpoint_url=None):
+        self.base_args = ["--profile", profile, "--region", region, "--output", "json"]
+        if endpoint_url:
+            self.base_args += ["--endpoint-url", endpoint_url]
+
+    def call(self, operation, **params):
+        cmd = ["aws", "dynamodb", _kebab(operation), "--cli-input-json", json.dumps(params)]
+        result = subprocess.run(cmd + self.base_args, capture_output=True, text=True)
+        if result.returncode != 0:
+            match = _CLI_ERROR_RE.search(result.stderr)
+            code = match.group(1) if match else "CliError"
+            raise TransportError(operation, code, result.stderr.strip())
+        return loads(result.stdout) if result.stdout.strip() else {}
+
+
+class SdkTransport:
+    """Sends requests through one shared boto3 client.
+
+    The client keeps a pool of up to ``max_pool_connections`` HTTP connections
+    alive, so credentials are resolved and TLS is negotiated once per run instead
+    of once per request. boto3 clients are thread-safe, so the same transport can
+    be shared by worker threads.
+    """
+
+    name = "sdk"
+
+    def __init__(self, profile=PROFILE, region=REGION, endpoint_url=None,
+                 max_pool_connections=DEFAULT_POOL_SIZE):
+        import boto3
+        from botocore.config import Config
+
+        session = boto3.session.Session(profile_name=profile, region_name=region)
+        config = Config(max_pool_connections=max_pool_connections, retries={"mode": "standard"})
+        self.client = session.client("dynamodb", endpoint_url=endpoint_url, config=config)
+
+    def call(self, operation, **params):
+        from botocore.exceptions import ClientError
+
+        try:
+            response = getattr(self.client, _snake(operation))(**params)
+        except ClientError as e:
+            error = e.response.get("Error", {})
+            raise TransportError(operation, error.get("Code", "ClientError"), error.get("Message", str(e)))
+        response.pop("ResponseMetadata", None)
+        return response
+
+
+def make_transport(name, profile=PROFILE, region=REGION, endpoint_url=None,
+                   max_pool_connections=DEFAULT_POOL_SIZE):
+    if name == "cli":
+        return CliTransport(profile, region, endpoint_url)
+    if name == "sdk":
+        return SdkTransport(profile, region, endpoint_url, max_pool_connections)
+    if name == "memory":
+        from .memory import MemoryTransport
+
+        return MemoryTransport()
+    raise ValueError(f"Unknown transport: {name}")
+
+
+def add_transport_args(parser):
+    """Register the connection options shared by every script."""
+    parser.add_argument("--transport", choices=TRANSPORTS, default="sdk",
+                        help="'sdk' reuses one pooled boto3 client; 'cli' spawns the aws CLI per request; "
+                             "'memory' runs against an in-process table (see --snapshot)")
+    parser.add_argument("--profile", default=PROFILE)
+    parser.add_argument("--region", default=REGION)
+    parser.add_argument("--endpoint-url", default=None, help="e.g. http://localhost:8000 for DynamoDB Local")
+    parser.add_argument("--max-pool-connections", type=int, default=DEFAULT_POOL_SIZE,
+                        help="HTTP connection pool size for the sdk transport")
+    parser.add_argument("--snapshot", default=None, metavar="DIR",
+                        help="load this export-table.py snapshot into the memory transport")
+    parser.add_argument("--budget-percent", type=float, default=None,
+                        help="cap consumption at this %% of the table's provisioned RCU/WCU "
+                             "(default 30, 0 = unlimited)")
+    parser.add_argument("--read-budget", type=float, default=None, help="cap reads at this many RCU/s")
+    parser.add_argument("--write-budget", type=float, default=None, help="cap writes at this many WCU/s")
+
+
+def transport_from_args(args):
+    from .ratelimit import limit_from_args
+
+    if args.snapshot and args.transport != "memory":
+        raise SystemExit("--snapshot needs --transport memory")
+    transport = make_transport(args.transport, args.profile, args.region,
+                               args.endpoint_url, args.max_pool_connections)
+    if args.snapshot:
+        from .snapshot import load_manifest
+
+        table = getattr(args, "table", None) or load_manifest(args.snapshot)["table"]
+        transport.load_snapshot(table, args.snapshot)
+    return limit_from_args(transport, args)
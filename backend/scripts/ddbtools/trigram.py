@@ -0,0 +1,221 @@
+"""Trigram index for substring and typo-tolerant search.
+
+``SearchService`` answers a query with ``includes()`` over every row of a
+type. Here each row's searchable text (the ``search`` fields in one locale,
+normalised the same way) is split into its trigrams, and the index maps every
+trigram to the rows containing it. The index is a SQLite file, so it can be
+updated in place:
+
+    documents  (shard, id, updatedAt, text) per row, shard = "<type>.<locale>"
+    trigrams   (shard, gram, document) per distinct trigram of a row
+
+A substring query of three or more characters first intersects the rows of
+its trigrams, then confirms the substring in the few rows left. A fuzzy query
+uses the count filter instead: a text within ``k`` edits of the query still
+holds at least ``len(grams) - 3k`` of its trigrams. The candidates left are
+ranked by the edit distance between the query and their closest substring.
+
+``update`` is given every searchable row of a type, since that is the only
+way to notice the rows that were deleted, so an update reads as much as a
+rebuild. It saves the index writes: only rows whose ``updatedAt`` changed are
+re-indexed, and rows that are gone or no longer searchable are dropped.
+"""
+
+import sqlite3
+
+from .search import FIELDS, field_text, normalize
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    number INTEGER PRIMARY KEY, shard TEXT, id TEXT, updated_at TEXT, text TEXT,
+    UNIQUE (shard, id)
+);
+CREATE TABLE IF NOT EXISTS trigrams (
+    shard TEXT, gram TEXT, document INTEGER,
+    PRIMARY KEY (shard, gram, document)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS trigrams_document ON trigrams (document);
+"""
+# Joins the fields of a row; no query matches across it
+SEPARATOR = "\n"
+
+
+def trigrams(text):
+    """Distinct trigrams of a normalised text, none spanning two fields."""
+    return {text[i:i + 3] for i in range(len(text) - 2) if SEPARATOR not in text[i:i + 3]}
+
+
+def document_text(entity, row, locale):
+    return SEPARATOR.join(normalize(field_text(row, name, locale)) for name, _ in FIELDS[entity])
+
+
+def default_distance(query):
+    """Edits tolerated for a query: one per five characters, at least one."""
+    return max(1, len(query) // 5)
+
+
+def substring_distance(pattern, text, limit):
+    """Fewest edits turning ``pattern`` into some substring of ``text``, or ``None`` above ``limit``.
+
+    Myers' bit-parallel form of Sellers' dynamic programme: one column of
+    the edit-distance matrix is a pair of bit vectors, updated in a few
+    integer operations per character of ``text``.
+    """
+    m = len(pattern)
+    if m == 0:
+        return 0
+    full = (1 << m) - 1
+    last = 1 << (m - 1)
+    peq = {}
+    for i, char in enumerate(pattern):
+        peq[char] = peq.get(char, 0) | (1 << i)
+    pv, mv, score = full, 0, m
+    best = m
+    for char in text:
+        eq = peq.get(char, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | (~(xh | pv) & full)
+        mh = pv & xh
+        if ph & last:
+            score += 1
+        elif mh & last:
+            score -= 1
+            if score < best:
+                best = score
+                if best == 0:
+                    break
+        # The match may start anywhere: the top row stays 0, no carry into bit 0
+        ph = (ph << 1) & full
+        mh = (mh << 1) & full
+        pv = mh | (~(xv | ph) & full)
+        mv = ph & xv
+    return best if best <= limit else None
+
+
+class TrigramIndex:
+    """A trigram index file; every method works on one ``shard``."""
+
+    def __init__(self, path):
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # -- updates --------------------------------------------------------------
+
+    def versions(self, shard):
+        """``{id: updatedAt}`` of the rows indexed in ``shard``."""
+        return dict(self.db.execute("SELECT id, updated_at FROM documents WHERE shard = ?", (shard,)))
+
+    def _remove(self, shard, doc_id):
+        row = self.db.execute("SELECT number FROM documents WHERE shard = ? AND id = ?",
+                              (shard, doc_id)).fetchone()
+        if row is not None:
+            self.db.execute("DELETE FROM trigrams WHERE document = ?", row)
+            self.db.execute("DELETE FROM documents WHERE number = ?", row)
+
+    def _put(self, shard, doc_id, updated_at, text):
+        self._remove(shard, doc_id)
+        number = self.db.execute("INSERT INTO documents (shard, id, updated_at, text) VALUES (?, ?, ?, ?)",
+                                 (shard, doc_id, updated_at, text)).lastrowid
+        self.db.executemany("INSERT INTO trigrams VALUES (?, ?, ?)",
+                            ((shard, gram, number) for gram in trigrams(text)))
+
+    def update(self, shard, entity, locale, rows, reindex_all=False):
+        """Bring ``shard`` in line with ``rows``, the searchable rows of ``entity``.
+
+        A row is re-indexed when its ``updatedAt`` (or ``createdAt``) differs
+        from the indexed one, or always with ``reindex_all``. Returns the counts of
+        ``(indexed, unchanged, removed)`` rows; all of it is one transaction.
+        """
+        indexed = unchanged = 0
+        with self.db:
+            stale = self.versions(shard)
+            for row in rows:
+                version = row.get("updatedAt") or row.get("createdAt")
+                known = stale.pop(row["id"], None)
+                if not reindex_all and version is not None and known == version:
+                    unchanged += 1
+                    continue
+                self._put(shard, row["id"], version, document_text(entity, row, locale))
+                indexed += 1
+            for doc_id in stale:
+                self._remove(shard, doc_id)
+        return indexed, unchanged, len(stale)
+
+    # -- queries --------------------------------------------------------------
+
+    def _candidates(self, shard, grams, at_least):
+        """``(id, text, shared)`` of rows holding at least ``at_least`` of ``grams``, most shared first."""
+        marks = ",".join("?" * len(grams))
+        return self.db.execute(
+            f"SELECT d.id, d.text, t.shared FROM documents d JOIN ("
+            f"  SELECT document, COUNT(*) AS shared FROM trigrams WHERE shard = ? AND gram IN ({marks})"
+            f"  GROUP BY document HAVING shared >= ?) t ON t.document = d.number"
+            f" ORDER BY t.shared DESC, d.id",
+            (shard, *grams, at_least))
+
+    def substring(self, shard, query, limit=10):
+        """``[(id, field, position)]`` of the rows containing ``query``.
+
+        Ranked by the field it is found in (title first), then by how early.
+        """
+        query = normalize(query)
+        grams = trigrams(query)
+        if grams:
+            rows = self._candidates(shard, sorted(grams), len(grams))
+        else:
+            # Under three characters there is nothing to prune with
+            rows = self.db.execute("SELECT id, text, 0 FROM documents WHERE shard = ? AND instr(text, ?) > 0",
+                                   (shard, query))
+        found = []
+        for doc_id, text, _ in rows:
+            position = text.find(query)
+            if position >= 0:
+                found.append((doc_id, text.count(SEPARATOR, 0, position), position))
+        found.sort(key=lambda f: (f[1], f[2], f[0]))
+        return found[:limit]
+
+    def fuzzy(self, shard, query, limit=10, max_distance=None):
+        """``[(id, distance)]`` of the rows within ``max_distance`` edits of ``query``, closest first.
+
+        Candidates are read most shared trigrams first. Sharing ``s`` of ``g``
+        trigrams means at least ``(g - s) / 3`` edits, so reading stops once
+        ``limit`` rows are closer than any row left can be.
+        """
+        query = normalize(query)
+        grams = trigrams(query)
+        if not grams:
+            return []
+        distance = default_distance(query) if max_distance is None else max_distance
+        found = []
+        for doc_id, text, shared in self._candidates(shard, sorted(grams), max(1, len(grams) - 3 * distance)):
+            if len(found) >= limit and found[limit - 1][1] <= -(-(len(grams) - shared) // 3):
+                break
+            best = None
+            for field in text.split(SEPARATOR):
+                edits = substring_distance(query, field, distance if best is None else best)
+                if edits is not None and (best is None or edits < best):
+                    best = edits
+            if best is not None:
+                found.append((doc_id, best))
+                found.sort(key=lambda f: f[1])
+        return found[:limit]
+
+    def search(self, shard, query, limit=10, max_distance=None):
+        """``[(id, distance)]``: exact substring matches (distance 0) first, then fuzzy ones."""
+        results = [(doc_id, 0) for doc_id, _, _ in self.substring(shard, query, limit)]
+        if len(results) < limit:
+            seen = {doc_id for doc_id, _ in results}
+            results += [r for r in self.fuzzy(shard, query, limit + len(seen), max_distance)
+                        if r[0] not in seen][:limit - len(results)]
+        return results
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""Diff two tables or snapshots, e.g. to see how dev has drifted from prod.
+
+Each side is a snapshot directory (from ``export-table.py``) or a table name.
+Bucket digests are compared first and only the buckets that differ are read
+item by item; see ``ddbtools/diff.py``. Changes are written as JSON lines.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import Counter
+
+from ddbtools.diff import DEFAULT_BUCKETS, SnapshotSource, TableSource, diff
+from ddbtools.scan import DEFAULT_SEGMENTS
+from ddbtools.transport import TransportError, add_transport_args, transport_from_args
+
+REPORT = "diff.jsonl"
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("left", help="snapshot directory or table to diff from, e.g. the prod snapshot")
+    parser.add_argument("right", help="snapshot directory or table to diff to")
+    parser.add_argument("--out", default=REPORT, help="change report to write (default: %(default)s)")
+    parser.add_argument("--buckets", type=int, default=DEFAULT_BUCKETS, help="hash buckets per entity prefix")
+    parser.add_argument("--ignore", action="append", default=[], metavar="ATTRIBUTE",
+                        help="attribute to leave out of the comparison, e.g. updatedAt (repeatable)")
+    parser.add_argument("--workers", type=int, help="processes digesting a snapshot (default: CPU count)")
+    parser.add_argument("--segments", type=int, default=DEFAULT_SEGMENTS,
+                        help="parallel scan segments for table sides")
+    add_transport_args(parser)
+    args = parser.parse_args()
+
+    transport = None
+
+    def source(name):
+        nonlocal transport
+        if os.path.exists(os.path.join(name, "manifest.json")):
+            return SnapshotSource(name, args.workers)
+        transport = transport or transport_from_args(args)
+        return TableSource(transport, name, args.segments)
+
+    left, right = source(args.left), source(args.right)
+    started = time.monotonic()
+    print(f"Diffing {left.name} -> {right.name} ({args.buckets} buckets per entity)...")
+
+    def report_digests(left_digests, right_digests, differing):
+        for entity in sorted(set(left_digests) | set(right_digests)):
+            before = sum(count for count, _ in left_digests.get(entity, {}).values())
+            after = sum(count for count, _ in right_digests.get(entity, {}).values())
+            changed = len(differing.get(entity, ()))
+            print(f"  {entity:25s} {before:>9} -> {after:<9} "
+                  + (f"{changed} buckets differ" if changed else "identical"))
+        print(f"Digests compared in {time.monotonic() - started:.1f}s")
+
+    counts = Counter()
+    with open(args.out, "w", encoding="utf-8") as f:
+        for change in diff(left, right, args.buckets, args.ignore, report_digests):
+            f.write(json.dumps(change) + "\n")
+            counts[change["PK"].split("#", 1)[0], change["change"]] += 1
+
+    print()
+    for entity in sorted({entity for entity, _ in counts}):
+        print(f"  {entity:25s} " + "  ".join(f"{counts[entity, c]:>7} {c}" for c in ("added", "removed", "changed")))
+    print(f"\nDone! {sum(counts.values())} changes written to {args.out} in {time.monotonic() - started:.1f}s")
+    if transport is not None and hasattr(transport, "report"):
+        print(transport.report())
+
+if __name__ == "__main__":
+    try:
+        main()
+    except TransportError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""Give short-lived rows a ``ttl`` and delete the ones already past it.
+
+Expiry policies are declared in ``ddbtools/expiry.py`` (``EXPIRY_POLICIES``):
+an entity, its lifetime and the timestamps it counts from. Rows without a
+``ttl`` get one; expired rows are deleted with parallel, conditional writes
+held to the write budget. This is a dry run unless ``--apply`` is given.
+"""
+
+import argparse
+import sys
+import time
+
+from ddbtools.access import TableAccess
+from ddbtools.batch import DEFAULT_CONCURRENCY
+from ddbtools.expiry import DAY, EXPIRY_POLICIES, ExpirySweeper
+from ddbtools.scan import DEFAULT_SEGMENTS
+from ddbtools.transport import TransportError, add_transport_args, transport_from_args
+
+TABLE = "swami-rupeshwaranand-api-dev-main"
+
+def otp_table(table):
+    """``...-dev-main`` -> ``...-dev-otp``."""
+    return table[:-len("-main")] + "-otp" if table.endswith("-main") else table
+
+def lifetime(seconds):
+    return f"{seconds // DAY} days" if seconds % DAY == 0 else f"{seconds}s"
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("policy", nargs="*", metavar="NAME",
+                        help=f"policies to run: {', '.join(sorted(EXPIRY_POLICIES))} (default: all)")
+    parser.add_argument("--table", default=TABLE)
+    parser.add_argument("--otp-table", default=None,
+                        help="table of the cognito-otp policy (default: --table with -main replaced by -otp)")
+    parser.add_argument("--apply", action="store_true", help="write changes (default is a dry run)")
+    parser.add_argument("--segments", type=int, default=DEFAULT_SEGMENTS,
+                        help="parallel scan segments (1 = sequential scan)")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help="conditional writes in flight at once")
+    add_transport_args(parser)
+    args = parser.parse_args()
+    unknown = set(args.policy) - set(EXPIRY_POLICIES)
+    if unknown:
+        parser.error(f"unknown policy(s): {', '.join(sorted(unknown))}")
+    names = args.policy or sorted(EXPIRY_POLICIES)
+    tables = {"main": args.table, "otp": args.otp_table or otp_table(args.table)}
+
+    transport = transport_from_args(args)
+    accesses = {}
+    now = int(time.time())
+
+    def progress(result):
+        print(f"  [{result.read}] items read, {result.scheduled} ttl set, {result.purged} deleted")
+
+    mode = "APPLY" if args.apply else "DRY RUN"
+    print(f"{mode}: {len(names)} expiry policies")
+    failed = False
+    for name in names:
+        expiry = EXPIRY_POLICIES[name]
+        table = tables[expiry.table]
+        if table not in accesses:
+            accesses[table] = TableAccess(transport, table, args.segments)
+        sweeper = ExpirySweeper(transport, table, accesses[table], args.concurrency,
+                                dry_run=not args.apply, now=now)
+        print(f"\n{name}: {expiry.entity} in {table}, {lifetime(expiry.lifetime)} after "
+              f"{' or '.join(expiry.sources)}")
+        started = time.monotonic()
+        try:
+            result = sweeper.run(expiry, progress)
+        except TransportError as e:
+            if e.code != "ResourceNotFoundException":
+                raise
+            print(f"  SKIPPED: {e}")
+            continue
+        print(f"  {result.summary()} in {time.monotonic() - started:.1f}s")
+        for error in result.errors[:10]:
+            print(f"  ERROR: {error}", file=sys.stderr)
+        failed = failed or bool(result.errors)
+
+    for access in accesses.values():
+        print()
+        print(access.report())
+    if hasattr(transport, "report"):
+        print(transport.report())
+    if failed:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    try:
+        main()
+    except TransportError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""Export a whole table to a compressed snapshot, partitioned by entity prefix."""
+
+import argparse
+import os
+import sys
+import time
+from datetime import date
+from functools import partial
+
+from ddbtools.scan import DEFAULT_SEGMENTS, scan_segments
+from ddbtools.snapshot import COMPRESSIONS, ITEMS_PER_FILE, SnapshotWriter, default_compression
+from ddbtools.transport import TransportError, add_transport_args, transport_from_args
+
+TABLE = "swami-rupeshwaranand-api-prod-main"
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--table", default=TABLE)
+    parser.add_argument("--out", help="snapshot directory (default snapshots/<table>-<date>)")
+    parser.add_argument("--compression", choices=COMPRESSIONS, default=default_compression(),
+                        help="zstd needs the zstandard package (default: zstd if installed, else gzip)")
+    parser.add_argument("--items-per-file", type=int, default=ITEMS_PER_FILE,
+                        help="start a new part file after this many items")
+    parser.add_argument("--segments", type=int, default=DEFAULT_SEGMENTS,
+                        help="parallel scan segments (1 = sequential scan)")
+    add_transport_args(parser)
+    args = parser.parse_args()
+    out = args.out or os.path.join("snapshots", f"{args.table}-{date.today().isoformat()}")
+    if os.path.exists(os.path.join(out, "manifest.json")):
+        parser.error(f"{out} already holds a snapshot")
+
+    transport = transport_from_args(args)
+    writer = SnapshotWriter(out, args.compression, args.items_per_file,
+                            table=args.table, segments=args.segments)
+    started = time.monotonic()
+    print(f"Exporting {args.table} to {out} ({writer.compression}, {args.segments} segments)...")
+
+    count, reported = 0, 0
+    for _, page in scan_segments(partial(transport.call, "Scan"), args.segments, TableName=args.table):
+        for item in page.get("Items", []):
+            writer.write(item)
+            count += 1
+        if count - reported >= 10_000:
+            print(f"  [{count}] items exported")
+            reported = count
+
+    manifest = writer.close()
+    for entity, partition in manifest["entities"].items():
+        print(f"  {entity:25s} {partition['items']:>9} items in {len(partition['files'])} file(s)")
+    elapsed = time.monotonic() - started
+    print(f"\nDone! Exported {manifest['items']} items in {elapsed:.1f}s "
+          f"({manifest['items'] / elapsed if elapsed else 0:.0f} items/s, {transport.name} transport)")
+    if hasattr(transport, "report"):
+        print(transport.report())
+
+if __name__ == "__main__":
+    try:
+        main()
+    except TransportError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""Generate production-shaped synthetic items into a table or a snapshot."""
+
+import argparse
+import sys
+import time
+
+from ddbtools.batch import DEFAULT_CONCURRENCY, batch_write
+from ddbtools.generate import DataGenerator, parse_mix
+from ddbtools.snapshot import SnapshotWriter
+from ddbtools.transport import TransportError, add_transport_args, transport_from_args
+
+TABLE = "swami-rupeshwaranand-api-local-main"
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--items", type=int, default=100_000, help="approximate number of items")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--skew", type=float, default=1.0,
+                        help="how strongly activity/orders concentrate on few users (0 = uniform)")
+    parser.add_argument("--item-bytes", type=int, default=0, help="pad items up to this size")
+    parser.add_argument("--duplicate-rate", type=float, default=0.0,
+                        help="fraction of pages, coupons and users seeded twice")
+    parser.add_argument("--mix", action="append", default=[], metavar="ENTITY=WEIGHT",
+                        help="override an entity's share of the items (repeatable)")
+    parser.add_argument("--out", metavar="DIR",
+                        help="write a snapshot (load it with --transport memory --snapshot DIR) "
+                             "instead of writing to --table")
+    parser.add_argument("--table", default=TABLE)
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help="BatchWriteItem requests in flight at once")
+    add_transport_args(parser)
+    args = parser.parse_args()
+    if "-prod-" in args.table and not args.out:
+        parser.error("refusing to write synthetic data to a production table")
+
+    generator = DataGenerator(args.seed, args.skew, args.item_bytes, args.duplicate_rate, parse_mix(args.mix))
+    started = time.monotonic()
+    if args.out:
+        print(f"Generating ~{args.items} items into snapshot {args.out}...")
+        settings = {"items": args.items, "seed": args.seed, "skew": args.skew,
+                    "itemBytes": args.item_bytes, "duplicateRate": args.duplicate_rate}
+        writer = SnapshotWriter(args.out, table=args.table, generator=settings)
+        for item in generator.items(args.items):
+            writer.write(item)
+        writer.close()
+    else:
+        print(f"Generating ~{args.items} items into {args.table}...")
+        transport = transport_from_args(args)
+
+        def progress(stats):
+            if stats.batches % 400 == 0:
+                print(f"  [{stats.items}] items written ({stats.items_per_second:.0f}/s)")
+
+        stats = batch_write(
+            transport, args.table, ({"PutRequest": {"Item": i}} for i in generator.items(args.items)),
+            concurrency=args.concurrency, on_batch=progress,
+        )
+        print(f"  {stats.summary()}")
+        for error in stats.errors:
+            print(f"ERROR: {error}", file=sys.stderr)
+
+    for entity, count in sorted(generator.counts.items()):
+        print(f"  {entity:25s} {count:>9}")
+    print(f"\nDone! {sum(generator.counts.values())} items in {time.monotonic() - started:.1f}s")
+
+if __name__ == "__main__":
+    try:
+        main()
+    except TransportError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(1)
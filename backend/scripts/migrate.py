@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""Apply the versioned data migrations in scripts/migrations to a table."""
+
+import argparse
+import os
+import sys
+import time
+
+from ddbtools.access import TableAccess
+from ddbtools.batch import DEFAULT_CONCURRENCY
+from ddbtools.migrate import MigrationRunner, load_migrations
+from ddbtools.scan import DEFAULT_SEGMENTS
+from ddbtools.transport import TransportError, add_transport_args, transport_from_args
+
+TABLE = "swami-rupeshwaranand-api-dev-main"
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--table", default=TABLE)
+    parser.add_argument("--apply", action="store_true", help="write changes (default is a dry run)")
+    parser.add_argument("--only", action="append", default=[], metavar="ID",
+                        help="run only this migration id (repeatable)")
+    parser.add_argument("--rerun", action="store_true", help="run migrations even if already applied")
+    parser.add_argument("--status", action="store_true", help="list migrations and their state, then exit")
+    parser.add_argument("--segments", type=int, default=DEFAULT_SEGMENTS,
+                        help="parallel scan segments (1 = sequential scan)")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help="conditional updates in flight at once")
+    add_transport_args(parser)
+    args = parser.parse_args()
+
+    transport = transport_from_args(args)
+    access = TableAccess(transport, args.table, args.segments)
+    runner = MigrationRunner(transport, args.table, access, args.concurrency, dry_run=not args.apply)
+
+    migrations = load_migrations(MIGRATIONS_DIR)
+    if args.only:
+        unknown = set(args.only) - {m.id for m in migrations}
+        if unknown:
+            parser.error(f"unknown migration(s): {', '.join(sorted(unknown))}")
+        migrations = [m for m in migrations if m.id in args.only]
+
+    mode = "APPLY" if args.apply else "DRY RUN"
+    print(f"{mode}: {len(migrations)} migrations against {args.table}")
+    for migration in migrations:
+        state = runner.state(migration)
+        status = state.get("status") if state else None
+        applied = status == "applied"
+        if applied:
+            label = f"applied {state['appliedAt']}"
+        elif status == "partial":
+            label = f"pending ({state['conflicts']} conflicts {state['updatedAt']})"
+        else:
+            label = "pending"
+        if args.status:
+            print(f"  {migration.id:35s} {label:35s} {migration.description}")
+            continue
+        if applied and not args.rerun:
+            print(f"\n{migration.id}: already {label}, skipping")
+            continue
+
+        print(f"\n{migration.id}: {migration.description}")
+        started = time.monotonic()
+        result = runner.run(migration)
+        print(f"  {result.summary()} in {time.monotonic() - started:.1f}s")
+        for error in result.errors:
+            print(f"ERROR: {error}", file=sys.stderr)
+        if result.errors:
+            print("Stopping: fix the errors above and re-run; finished items are skipped.", file=sys.stderr)
+            sys.exit(1)
+        if args.apply and result.conflicts:
+            print(f"  {result.conflicts} items changed while running and were skipped; "
+                  "re-run to migrate them.")
+
+    if not args.apply and not args.status:
+        print("\nDry run only. Re-run with --apply to write changes.")
+
+if __name__ == "__main__":
+    try:
+        main()
+    except TransportError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(1)
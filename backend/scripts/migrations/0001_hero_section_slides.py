@@ -0,0 +1,27 @@
+"""Migrate hero_section from individual fields to slides array format.
+
+The heading, subheading, background image and CTA fields become the first
+slide; overlayOpacity and enableParallax are kept (with their defaults when
+missing) and every other legacy field is dropped.
+"""
+
+from decimal import Decimal
+
+from ddbtools.fields import FieldTransform, Keep, SetDefault, Wrap
+
+ENTITY = "CMS_COMPONENT"
+
+transform = FieldTransform(
+    Wrap("slides", {
+        "backgroundImage": "imageUrl",
+        "heading": "heading",
+        "subheading": "subheading",
+        "ctaText": "ctaText",
+        "ctaLink": "ctaLink",
+    }),
+    SetDefault("overlayOpacity", Decimal("0.5")),
+    SetDefault("enableParallax", True),
+    Keep("slides", "overlayOpacity", "enableParallax"),
+    component_type="hero_section",
+    skip_if_present="slides",
+)
@@ -0,0 +1,27 @@
+"""Add an events array to upcoming_events components.
+
+Keeps the title and subtitle fields and seeds the list with the weekly
+Hanuman Chalisa Path event.
+"""
+
+from ddbtools.fields import Add, FieldTransform, Keep
+
+ENTITY = "CMS_COMPONENT"
+
+SEED_EVENTS = [
+    {
+        "title": {"en": "Hanuman Chalisa Path", "hi": "हनुमान चालीसा पाठ"},
+        "description": {"en": "Weekly recitation of Hanuman Chalisa", "hi": "साप्ताहिक हनुमान चालीसा पाठ"},
+        "date": "2025-03-01T07:00:00",
+        "location": {"en": "Main Temple Hall", "hi": "मुख्य मंदिर हॉल"},
+        "imageUrl": "",
+        "link": "/events",
+    }
+]
+
+transform = FieldTransform(
+    Keep("title", "subtitle"),
+    Add("events", SEED_EVENTS),
+    component_type="upcoming_events",
+    skip_if_present="events",
+)
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""Roll the activity log up into per-day, per-user and total count items.
+
+The admin stats endpoint reads ``ACTIVITY_ROLLUP#TOTAL`` instead of scanning
+every ``ACTIVITY`` row; see ``ddbtools/rollup.py`` for the item layout. Runs
+are incremental from the watermark in the total item unless ``--full`` is
+given, and can be repeated safely.
+"""
+
+import argparse
+import sys
+import time
+
+from ddbtools.access import TableAccess
+from ddbtools.batch import DEFAULT_CONCURRENCY, batch_write, key
+from ddbtools.codec import decode, marshal
+from ddbtools.rollup import PROJECTION, ROLLUP, TOTAL_KEY, ActivityRollup, now_iso, total_item
+from ddbtools.scan import DEFAULT_SEGMENTS
+from ddbtools.transport import TransportError, add_transport_args, transport_from_args
+
+TABLE = "swami-rupeshwaranand-api-prod-main"
+
+def activity_pages(access, since_day):
+    """Pages of ACTIVITY rows: all of them, or those from ``since_day`` on via GSI1."""
+    if since_day is None:
+        for _, page in access.pages("ACTIVITY", PROJECTION):
+            yield page
+        return
+    yield from access.query_pages("GSI1", "ACTIVITY", PROJECTION, sk_from=f"DATE#{since_day}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--table", default=TABLE)
+    parser.add_argument("--full", action="store_true", help="re-count every day instead of resuming")
+    parser.add_argument("--segments", type=int, default=DEFAULT_SEGMENTS,
+                        help="parallel scan segments (1 = sequential scan)")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help="BatchWriteItem requests in flight at once")
+    parser.add_argument("--no-index", action="store_true",
+                        help="scan the table even where a GSI1 query would do")
+    add_transport_args(parser)
+    args = parser.parse_args()
+    transport = transport_from_args(args)
+    access = TableAccess(transport, args.table, args.segments, use_indexes=not args.no_index)
+    started = time.monotonic()
+
+    previous = transport.call("GetItem", TableName=args.table, Key=key(TOTAL_KEY, TOTAL_KEY)).get("Item")
+    watermark = decode(previous)["watermark"] if previous else ""
+    since_day = watermark[:10] if watermark and not args.full else None
+    print(f"Counting activity in {args.table}"
+          + (f" from {since_day} (watermark {watermark})" if since_day else ", all days") + "...")
+
+    rollup = ActivityRollup()
+    rows = 0
+    for page in activity_pages(access, since_day):
+        for item in page.get("Items", []):
+            rollup.add(decode(item, PROJECTION, ""))
+            rows += 1
+    print(f"Read {rows} activity rows over {len(rollup.days)} days, {len(rollup.user_days)} user-days")
+
+    now = now_iso()
+    stats = batch_write(transport, args.table,
+                        ({"PutRequest": {"Item": marshal(i)}} for i in rollup.items(now)),
+                        concurrency=args.concurrency)
+    print(f"  {stats.summary()}")
+    for error in stats.errors:
+        print(f"ERROR: {error}", file=sys.stderr)
+    if stats.failed or stats.errors:
+        sys.exit("Some rollup items were not written; the watermark was not advanced, run again")
+
+    # The total is summed from every day item, including days before this run
+    days = (decode(i) for i in access.query("GSI1", ROLLUP, ("total", "byEntityType", "byAction")))
+    total = total_item(days, max(watermark, rollup.latest), now)
+    transport.call("PutItem", TableName=args.table, Item=marshal(total))
+
+    print(f"\nDone! {total['total']} activities over {total['days']} days, watermark {total['watermark']}")
+    for name, counts in (("By entity type", total["byEntityType"]), ("By action", total["byAction"])):
+        print(f"  {name}: " + ", ".join(f"{k} {v}" for k, v in sorted(counts.items(), key=lambda c: -c[1])))
+    print(access.report())
+    if hasattr(transport, "report"):
+        print(transport.report())
+    print(f"Elapsed: {time.monotonic() - started:.1f}s ({transport.name} transport)")
+
+if __name__ == "__main__":
+    try:
+        main()
+    except TransportError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,103 @@
+import pytest
+
+from ddbtools.access import TableAccess
+from ddbtools.batch import WriteStats
+from ddbtools.cascade import CascadePlanner, IncompleteDelete, batch_delete_levels, delete_levels
+from ddbtools.codec import marshal
+from ddbtools.memory import MemoryTransport
+from ddbtools.schema import RELATIONS, Lookup, Relation
+
+TABLE = "test-main"
+
+ITEMS = [
+    {"PK": "CMS_PAGE#p1", "SK": "CMS_PAGE#p1", "GSI1PK": "CMS_PAGE", "GSI1SK": "home"},
+    {"PK": "CMS_COMPONENT#c1", "SK": "CMS_COMPONENT#c1", "GSI1PK": "PAGE#p1", "GSI1SK": "ORDER#1"},
+    {"PK": "CMS_COMPONENT#c2", "SK": "CMS_COMPONENT#c2", "GSI1PK": "PAGE#p1", "GSI1SK": "ORDER#2"},
+    {"PK": "CMS_COMPONENT#c3", "SK": "CMS_COMPONENT#c3", "GSI1PK": "PAGE#p2", "GSI1SK": "ORDER#1"},
+    {"PK": "SUPPORT_TICKET#t1", "SK": "SUPPORT_TICKET#t1", "GSI1PK": "SUPPORT_TICKET",
+     "GSI1SK": "2026-01-01"},
+    {"PK": "SUPPORT_TICKET#t1", "SK": "TICKET_REPLY#r1"},
+    {"PK": "SUPPORT_TICKET#t1", "SK": "TICKET_REPLY#r2"},
+]
+
+# A component's attachments, to give the plan a third level
+ATTACHMENTS = Relation("ATTACHMENT", "componentId", "CMS_COMPONENT",
+                       lookup=Lookup(None, "ATTACHMENT#{componentId}"))
+
+
+def transport_with(items=ITEMS):
+    transport = MemoryTransport()
+    transport.load(TABLE, [marshal(i) for i in items])
+    return transport
+
+
+def keys(level):
+    return sorted((r["PK"], r["SK"]) for r in level)
+
+
+def test_plan_expands_roots_level_by_level():
+    transport = transport_with()
+    planner = CascadePlanner(TableAccess(transport, TABLE, segments=2))
+
+    levels = planner.plan([{"PK": "CMS_PAGE#p1", "SK": "CMS_PAGE#p1"},
+                           {"PK": "SUPPORT_TICKET#t1", "SK": "SUPPORT_TICKET#t1"}])
+
+    assert len(levels) == 2
+    assert keys(levels[1]) == [("CMS_COMPONENT#c1", "CMS_COMPONENT#c1"),
+                               ("CMS_COMPONENT#c2", "CMS_COMPONENT#c2"),
+                               ("SUPPORT_TICKET#t1", "TICKET_REPLY#r1"),
+                               ("SUPPORT_TICKET#t1", "TICKET_REPLY#r2")]
+
+
+def test_plan_follows_grandchildren():
+    transport = transport_with(ITEMS + [{"PK": "ATTACHMENT#c2", "SK": "FILE#1"}])
+    planner = CascadePlanner(TableAccess(transport, TABLE, segments=1), RELATIONS + [ATTACHMENTS])
+
+    levels = planner.plan([{"PK": "CMS_PAGE#p1", "SK": "CMS_PAGE#p1"}])
+
+    assert [len(level) for level in levels] == [1, 2, 1]
+    assert keys(levels[2]) == [("ATTACHMENT#c2", "FILE#1")]
+
+
+def test_levels_are_deleted_deepest_first():
+    order = []
+
+    def delete(depth, rows):
+        order.append((depth, [r["PK"] for r in rows]))
+        return WriteStats()
+
+    stats = delete_levels([[{"PK": "A"}], [], [{"PK": "C"}]], delete)
+
+    assert order == [(2, ["C"]), (0, ["A"])]
+    assert sorted(stats) == [0, 2]
+
+
+def test_a_failed_level_stops_before_its_parents():
+    deleted = []
+
+    def delete(depth, rows):
+        deleted.append(depth)
+        stats = WriteStats()
+        if depth == 1:
+            stats.record(failed=[{"DeleteRequest": {"Key": rows[0]}}])
+        return stats
+
+    with pytest.raises(IncompleteDelete) as raised:
+        delete_levels([[{"PK": "A"}], [{"PK": "B"}], [{"PK": "C"}]], delete)
+
+    assert deleted == [2, 1]
+    assert raised.value.depth == 1
+    assert raised.value.code == "IncompleteDelete"
+
+
+def test_batch_delete_levels_removes_every_level():
+    transport = transport_with()
+    planner = CascadePlanner(TableAccess(transport, TABLE, segments=1))
+    levels = planner.plan([{"PK": "CMS_PAGE#p1", "SK": "CMS_PAGE#p1"}])
+
+    stats = batch_delete_levels(transport, TABLE, levels, concurrency=2)
+
+    assert {depth: s.items for depth, s in stats.items()} == {0: 1, 1: 2}
+    assert transport.table(TABLE).get("CMS_PAGE#p1", "CMS_PAGE#p1") is None
+    assert transport.table(TABLE).get("CMS_COMPONENT#c1", "CMS_COMPONENT#c1") is None
+    assert transport.table(TABLE).get("CMS_COMPONENT#c3", "CMS_COMPONENT#c3") is not None
@@ -0,0 +1,67 @@
+from decimal import Decimal
+
+import pytest
+
+from ddbtools.codec import compile_decoder, decode, marshal, marshal_value, unmarshal
+
+COMPONENT = {
+    "PK": "CMS_COMPONENT#c1",
+    "SK": "CMS_COMPONENT#c1",
+    "pageId": "p1",
+    "componentType": "hero_section",
+    "name": {"en": "Hero", "hi": "हीरो"},
+    "displayOrder": Decimal(2),
+    "isVisible": True,
+    "fields": [
+        {"key": "heading", "localizedValue": {"en": "Welcome", "hi": "स्वागत"}},
+        {"key": "overlayOpacity", "value": Decimal("0.5")},
+        {"key": "slides", "value": [{"imageUrl": "/a.jpg", "order": Decimal(1)}]},
+    ],
+    "customClasses": None,
+}
+
+
+@pytest.mark.parametrize("item", [
+    COMPONENT,
+    {"PK": "COUPON#c1", "SK": "COUPON#c1", "code": "DIWALI", "value": Decimal("10.5"),
+     "isActive": False, "usageCount": Decimal(0)},
+    {"PK": "USER#u1", "SK": "USER#u1", "email": "a@example.com", "tags": {"admin", "beta"},
+     "scores": {Decimal(1), Decimal(2)}},
+])
+def test_decode_round_trips(item):
+    raw = marshal(item)
+
+    assert decode(raw) == item
+    assert unmarshal(raw) == item
+
+
+def test_decode_falls_back_on_unexpected_types():
+    # displayOrder is declared a number; a string written by hand still decodes
+    raw = marshal(dict(COMPONENT, displayOrder="2", name="Hero"))
+
+    decoded = decode(raw)
+
+    assert decoded["displayOrder"] == "2"
+    assert decoded["name"] == "Hero"
+
+
+def test_decode_projection_and_default():
+    raw = marshal(COMPONENT)
+
+    assert decode(raw, ("PK", "pageId")) == {"PK": "CMS_COMPONENT#c1", "pageId": "p1"}
+    assert decode(raw, ("PK", "missing"), None) == {"PK": "CMS_COMPONENT#c1", "missing": None}
+
+
+def test_compiled_decoder_keeps_unknown_attributes():
+    decoder = compile_decoder({"n": "N"})
+
+    assert decoder({"n": {"N": "1.50"}, "extra": {"L": [{"S": "x"}]}}) == {
+        "n": Decimal("1.50"), "extra": ["x"]}
+
+
+def test_marshal_value_types():
+    assert marshal_value(1.1) == {"N": "1.1"}
+    assert marshal_value(True) == {"BOOL": True}
+    assert marshal_value(None) == {"NULL": True}
+    with pytest.raises(TypeError):
+        marshal_value(object())
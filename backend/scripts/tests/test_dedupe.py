@@ -0,0 +1,115 @@
+from ddbtools.access import TableAccess
+from ddbtools.codec import decode, marshal
+from ddbtools.dedupe import RULES, Move, move_children, referenced_ids, relation
+from ddbtools.memory import MemoryTransport
+
+TABLE = "test-main"
+
+
+def user(id, email, created, **extra):
+    return dict({"PK": f"USER#{id}", "SK": f"USER#{id}", "GSI1PK": "USER", "GSI1SK": f"EMAIL#{email}",
+                 "id": id, "email": email, "createdAt": created}, **extra)
+
+
+def profile(email, created):
+    return {"PK": f"USER#{email}", "SK": "PROFILE", "GSI1PK": "USER", "GSI1SK": f"USER#{email}",
+            "email": email, "role": "admin", "createdAt": created}
+
+
+def coupon(id, code, created, usage_count=0):
+    return {"PK": f"COUPON#{id}", "SK": f"COUPON#{id}", "GSI1PK": "COUPON", "GSI1SK": f"CODE#{code}",
+            "id": id, "code": code, "usageCount": usage_count, "createdAt": created}
+
+
+def usage(coupon_id, user_id):
+    return {"PK": f"COUPON_USAGE#{coupon_id}", "SK": f"USER#{user_id}", "couponId": coupon_id,
+            "userId": user_id}
+
+
+def group(rule, items):
+    return rule.group(decode(marshal(i), rule.projection, None) for i in items)
+
+
+def test_group_keeps_one_row_per_natural_key():
+    rule = RULES["COUPON"]
+
+    kept, superseded = group(rule, [
+        coupon("c2", "diwali ", "2026-02-01"),
+        coupon("c1", "DIWALI", "2026-01-01"),
+        coupon("c3", "Diwali", "2026-03-01"),
+        coupon("c4", "HOLI", "2026-01-01"),
+        coupon("c5", "", "2026-01-01"),
+    ])
+
+    assert {k: r["id"] for k, r in kept.items()} == {"DIWALI": "c1", "HOLI": "c4"}
+    assert sorted(superseded) == ["c2", "c3"]
+
+
+def test_keep_newest_by_default():
+    rule = RULES["CMS_PAGE"]
+    page = {"SK": "CMS_PAGE#x", "slug": "home"}
+
+    kept, superseded = group(rule, [dict(page, PK="CMS_PAGE#old", createdAt="2026-01-01"),
+                                    dict(page, PK="CMS_PAGE#new", createdAt="2026-02-01")])
+
+    assert kept["home"]["PK"] == "CMS_PAGE#new"
+    assert list(superseded) == ["old"]
+
+
+def test_user_profile_and_id_rows_with_one_email_are_not_duplicates():
+    rule = RULES["USER"]
+
+    kept, superseded = group(rule, [
+        user("u1", "Seeker@Example.com", "2026-01-01"),
+        profile("seeker@example.com", "2025-12-01"),
+        user("u2", "seeker@example.com", "2026-02-01"),
+    ])
+
+    assert [r["PK"] for r in kept.values()] == ["USER#u1"]
+    assert list(superseded) == ["u2"]
+
+
+def test_users_still_referenced_are_kept():
+    transport = MemoryTransport()
+    transport.load(TABLE, [marshal(i) for i in [
+        user("u1", "a@example.com", "2026-01-01"),
+        user("u2", "a@example.com", "2026-02-01"),
+        user("u3", "a@example.com", "2026-03-01"),
+        {"PK": "ORDER#o1", "SK": "ORDER#o1", "GSI1PK": "ORDER", "GSI1SK": "2026-02-02",
+         "userId": "u2"},
+    ]])
+    rule = RULES["USER"]
+    access = TableAccess(transport, TABLE, segments=1)
+    _, superseded = rule.group(decode(i, rule.projection, None)
+                               for i in access.items("USER", rule.projection))
+
+    removable, in_use = rule.in_use(superseded, referenced_ids(access, rule))
+
+    assert list(removable) == ["u3"]
+    assert list(in_use) == ["u2"]
+
+
+def test_move_children_rekeys_usages_onto_the_kept_coupon():
+    transport = MemoryTransport()
+    transport.load(TABLE, [marshal(i) for i in [
+        coupon("c1", "DIWALI", "2026-01-01", usage_count=1),
+        coupon("c2", "DIWALI", "2026-02-01", usage_count=2),
+        usage("c1", "u1"),
+        usage("c2", "u1"),
+        usage("c2", "u2"),
+    ]])
+    rule = RULES["COUPON"]
+    access = TableAccess(transport, TABLE, segments=1)
+    kept, superseded = rule.group(decode(i, rule.projection, None)
+                                  for i in access.items("COUPON", rule.projection))
+    pairs = [(row, kept["DIWALI"]) for row in superseded.values()]
+    move = Move(relation("COUPON_USAGE", "COUPON"), "usageCount")
+
+    assert move_children(transport, TABLE, access, move, pairs, dry_run=True) == (2, 0)
+    assert move_children(transport, TABLE, access, move, pairs) == (1, 1)
+    assert move_children(transport, TABLE, access, move, pairs) == (0, 0)
+
+    table = transport.table(TABLE)
+    assert table.get("COUPON_USAGE#c2", "USER#u2") is None
+    assert decode(table.get("COUPON_USAGE#c1", "USER#u2"))["couponId"] == "c1"
+    assert decode(table.get("COUPON#c1", "COUPON#c1"))["usageCount"] == 2
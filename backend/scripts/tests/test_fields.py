@@ -0,0 +1,120 @@
+from decimal import Decimal
+
+from ddbtools.fields import (Add, Drop, FieldSet, FieldTransform, Keep, Rename, SetDefault, Wrap,
+                             make_field)
+
+
+def hero(*fields):
+    return {"componentType": "hero_section", "fields": list(fields)}
+
+
+def test_fieldset_indexes_fields_by_key_in_order():
+    fields = FieldSet([make_field("title", {"en": "Om", "hi": "ॐ"}, localized=True),
+                       make_field("count", Decimal(3))])
+
+    assert "title" in fields
+    assert fields.value("title") == {"en": "Om", "hi": "ॐ"}
+    assert fields.value("count") == Decimal(3)
+    assert fields.value("missing", "default") == "default"
+    fields.set("count", Decimal(4))
+    fields.drop("title", "missing")
+    assert fields.to_list() == [{"key": "count", "value": Decimal(4)}]
+
+
+def test_rename_keeps_the_field_in_place():
+    fields = FieldSet([make_field("heading", {"en": "Om"}, localized=True), make_field("subtitle", "x"),
+                       make_field("title", "stale")])
+
+    Rename("heading", "title")(fields)
+    Rename("missing", "other")(fields)
+    Rename("subtitle", "subtitle")(fields)
+
+    assert fields.to_list() == [{"key": "title", "localizedValue": {"en": "Om"}},
+                                {"key": "subtitle", "value": "x"}]
+
+
+def test_drop_ignores_missing_fields():
+    fields = FieldSet([make_field("a", 1), make_field("b", 2), make_field("c", 3)])
+
+    Drop("a", "c", "missing")(fields)
+
+    assert fields.to_list() == [{"key": "b", "value": 2}]
+
+
+def test_keep_drops_unlisted_fields():
+    fields = FieldSet([make_field("a", 1), make_field("b", 2), make_field("c", 3)])
+
+    Keep("c", "a")(fields)
+
+    assert fields.to_list() == [{"key": "a", "value": 1}, {"key": "c", "value": 3}]
+
+
+def test_wrap_collects_fields_into_an_array_entry():
+    fields = FieldSet([make_field("heading", "Welcome"), make_field("backgroundImage", "/hero.jpg"),
+                       make_field("overlayOpacity", Decimal("0.3"))])
+
+    Wrap("slides", {"heading": "heading", "backgroundImage": "imageUrl", "ctaText": "ctaText"})(fields)
+
+    assert fields.to_list() == [
+        {"key": "overlayOpacity", "value": Decimal("0.3")},
+        {"key": "slides", "value": [{"heading": "Welcome", "imageUrl": "/hero.jpg"}]},
+    ]
+
+
+def test_wrap_appends_to_an_existing_array_and_can_keep_sources():
+    fields = FieldSet([make_field("slides", [{"heading": "First"}]), make_field("heading", "Second")])
+
+    Wrap("slides", {"heading": "heading"}, keep_sources=True)(fields)
+
+    assert fields.value("slides") == [{"heading": "First"}, {"heading": "Second"}]
+    assert fields.value("heading") == "Second"
+
+
+def test_add_and_set_default():
+    fields = FieldSet([make_field("overlayOpacity", Decimal("0.3"))])
+
+    SetDefault("overlayOpacity", Decimal("0.5"))(fields)
+    SetDefault("enableParallax", True)(fields)
+    Add("overlayOpacity", Decimal("0.8"))(fields)
+    assert fields.value("overlayOpacity") == Decimal("0.3")
+    Add("overlayOpacity", Decimal("0.8"), overwrite=True)(fields)
+
+    assert fields.value("overlayOpacity") == Decimal("0.8")
+    assert fields.value("enableParallax") is True
+
+
+def test_transform_applies_operations_in_order():
+    transform = FieldTransform(
+        Wrap("slides", {"heading": "heading"}),
+        SetDefault("overlayOpacity", Decimal("0.5")),
+        Keep("slides", "overlayOpacity"),
+        component_type="hero_section",
+    )
+
+    result = transform(hero(make_field("heading", "Welcome"), make_field("legacy", "x")))
+
+    assert result == {"fields": [{"key": "slides", "value": [{"heading": "Welcome"}]},
+                                 {"key": "overlayOpacity", "value": Decimal("0.5")}]}
+
+
+def test_transform_renames_and_drops():
+    transform = FieldTransform(Rename("heading", "title"), Drop("legacy"))
+
+    assert transform(hero(make_field("heading", "Welcome"), make_field("legacy", "x"))) == {
+        "fields": [{"key": "title", "value": "Welcome"}]}
+    assert transform(hero(make_field("title", "Welcome"))) is None
+
+
+def test_transform_returns_none_when_nothing_changes():
+    transform = FieldTransform(SetDefault("overlayOpacity", Decimal("0.5")), Keep("overlayOpacity"))
+
+    assert transform(hero(make_field("overlayOpacity", Decimal("0.3")))) is None
+
+
+def test_transform_skips_other_components_and_migrated_ones():
+    transform = FieldTransform(Add("slides", []), component_type="hero_section",
+                               skip_if_present="slides")
+
+    assert transform({"componentType": "upcoming_events", "fields": []}) is None
+    assert transform(hero(make_field("slides", [{"heading": "Welcome"}]))) is None
+    assert transform(hero()) == {"fields": [{"key": "slides", "value": []}]}
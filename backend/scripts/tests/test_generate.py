@@ -0,0 +1,54 @@
+import os
+import re
+import subprocess
+import sys
+from collections import Counter
+
+from ddbtools.codec import decode
+from ddbtools.dedupe import RULES
+from ddbtools.generate import DataGenerator
+from ddbtools.snapshot import SnapshotWriter
+
+SCRIPTS = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TABLE = "test-main"
+
+
+def test_output_is_deterministic():
+    first = list(DataGenerator(seed=7, duplicate_rate=0.2).items(500))
+
+    assert first == list(DataGenerator(seed=7, duplicate_rate=0.2).items(500))
+
+
+def test_duplicate_users_match_the_dedupe_rule():
+    generator = DataGenerator(seed=1, duplicate_rate=0.2)
+    rule = RULES["USER"]
+    users = [decode(i, rule.projection, None) for i in generator.items(2000)
+             if i["PK"]["S"].startswith("USER#")]
+
+    _, superseded = rule.group(users)
+
+    per_email = Counter(email for _, email, by_email in generator.users if not by_email)
+    assert len(superseded) == sum(n - 1 for n in per_email.values()) > 0
+
+
+def test_cleanup_duplicates_finds_the_generated_users(tmp_path):
+    generator = DataGenerator(seed=3, duplicate_rate=0.2)
+    writer = SnapshotWriter(str(tmp_path / "snapshot"), table=TABLE)
+    for item in generator.items(2000):
+        writer.write(item)
+    writer.close()
+    per_email = Counter(email for _, email, by_email in generator.users if not by_email)
+    duplicates = sum(n - 1 for n in per_email.values())
+
+    output = subprocess.run(
+        [sys.executable, "cleanup-duplicates.py", "--entity", "USER", "--dry-run", "--table", TABLE,
+         "--transport", "memory", "--snapshot", str(tmp_path / "snapshot"),
+         "--journal", str(tmp_path / "journal.sqlite")],
+        cwd=SCRIPTS, capture_output=True, text=True, check=True,
+    ).stdout
+
+    assert "No duplicate USER rows found" not in output
+    removable = re.search(r"(\d+) duplicate USER rows \(keeping the oldest\)", output)
+    in_use = re.search(r"(\d+) duplicate USER rows are still referenced", output)
+    found = int(removable.group(1)) + (int(in_use.group(1)) if in_use else 0)
+    assert found == duplicates > 0
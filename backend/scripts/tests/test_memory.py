@@ -0,0 +1,73 @@
+import threading
+from functools import partial
+
+from ddbtools import memory
+from ddbtools.codec import marshal
+from ddbtools.memory import MemoryTransport
+from ddbtools.scan import paginate
+
+TABLE = "test-main"
+
+
+def transport_with(count):
+    transport = MemoryTransport()
+    items = [{"PK": f"ORDER#o{i:03d}", "SK": f"ORDER#o{i:03d}", "GSI1PK": "ORDER",
+              "GSI1SK": f"2026-01-{i % 28 + 1:02d}", "status": "paid" if i % 3 else "new"}
+             for i in range(count)]
+    transport.load(TABLE, [marshal(i) for i in items])
+    return transport
+
+
+def test_pages_follow_limit_and_filters_count_every_item_read():
+    transport = transport_with(100)
+
+    pages = list(paginate(partial(transport.call, "Scan"), TableName=TABLE, Limit=30,
+                          FilterExpression="#s = :s", ExpressionAttributeNames={"#s": "status"},
+                          ExpressionAttributeValues={":s": {"S": "new"}}))
+
+    assert [p["ScannedCount"] for p in pages] == [30, 30, 30, 10]
+    assert sum(p["Count"] for p in pages) == 34
+    queried = list(paginate(partial(transport.call, "Query"), TableName=TABLE, IndexName="GSI1", Limit=40,
+                            KeyConditionExpression="GSI1PK = :pk",
+                            ExpressionAttributeValues={":pk": {"S": "ORDER"}}))
+    assert sum(p["Count"] for p in queried) == 100
+
+
+def test_pages_are_copied_outside_the_lock(monkeypatch):
+    transport = transport_with(10)
+    copy_item = memory.copy_item
+    free = []
+
+    def copy_checking_lock(item):
+        # Another thread must be able to take the lock while a page is being built
+        def probe():
+            taken = transport.lock.acquire(timeout=1)
+            if taken:
+                transport.lock.release()
+            free.append(taken)
+
+        thread = threading.Thread(target=probe)
+        thread.start()
+        thread.join()
+        return copy_item(item)
+
+    monkeypatch.setattr(memory, "copy_item", copy_checking_lock)
+
+    transport.call("Scan", TableName=TABLE, Segment=0, TotalSegments=2)
+    transport.call("Query", TableName=TABLE, KeyConditionExpression="PK = :pk",
+                   ExpressionAttributeValues={":pk": {"S": "ORDER#o001"}})
+
+    assert free and all(free)
+
+
+def test_writes_keep_sizes_in_step():
+    transport = transport_with(5)
+    table = transport.table(TABLE)
+
+    transport.call("UpdateItem", TableName=TABLE,
+                   Key={"PK": {"S": "ORDER#o001"}, "SK": {"S": "ORDER#o001"}},
+                   UpdateExpression="SET notes = :n", ExpressionAttributeValues={":n": {"S": "x" * 500}})
+    transport.call("DeleteItem", TableName=TABLE, Key={"PK": {"S": "ORDER#o002"}, "SK": {"S": "ORDER#o002"}})
+
+    assert table.size == sum(memory.item_size(table.get(pk, sk)) for pk, sk in table.sizes)
+    assert len(table.sizes) == table.count == 4
@@ -0,0 +1,69 @@
+from ddbtools.access import TableAccess
+from ddbtools.codec import marshal
+from ddbtools.memory import MemoryTransport
+from ddbtools.migrate import MigrationRunner
+
+TABLE = "test-main"
+
+
+class Migration:
+    id = "0001_test"
+    description = "Set a flag on every coupon"
+    entity = "COUPON"
+    keys = {}
+    key = {"PK": {"S": "MIGRATION#0001_test"}, "SK": {"S": "MIGRATION#0001_test"}}
+
+    def __init__(self, on_read=None):
+        self.on_read = on_read
+
+    def transform(self, item):
+        if self.on_read:
+            self.on_read(item)
+        return None if item.get("migrated") else {"migrated": True}
+
+
+def coupon(id):
+    return {"PK": f"COUPON#{id}", "SK": f"COUPON#{id}", "GSI1PK": "COUPON", "GSI1SK": f"CODE#{id}",
+            "id": id, "code": id}
+
+
+def runner():
+    transport = MemoryTransport()
+    transport.load(TABLE, [marshal(coupon(i)) for i in ("c1", "c2", "c3")])
+    return transport, MigrationRunner(transport, TABLE, TableAccess(transport, TABLE, segments=1),
+                                      concurrency=1, dry_run=False, log=lambda _: None)
+
+
+def test_clean_run_is_recorded_applied():
+    _, migrations = runner()
+
+    result = migrations.run(Migration())
+
+    assert (result.changed, result.conflicts) == (3, 0)
+    state = migrations.state(Migration())
+    assert state["status"] == "applied"
+    assert "appliedAt" in state
+
+
+def test_conflicts_leave_the_migration_pending_until_a_clean_rerun():
+    transport, migrations = runner()
+
+    def edit_c2(item):
+        # Another writer changes c2 between the read and the conditional update
+        if item["id"] == "c2":
+            transport.call("UpdateItem", TableName=TABLE,
+                           Key={"PK": {"S": "COUPON#c2"}, "SK": {"S": "COUPON#c2"}},
+                           UpdateExpression="SET migrated = :f",
+                           ExpressionAttributeValues={":f": {"BOOL": False}})
+
+    result = migrations.run(Migration(on_read=edit_c2))
+
+    assert (result.changed, result.conflicts) == (2, 1)
+    state = migrations.state(Migration())
+    assert state["status"] == "partial"
+    assert "appliedAt" not in state
+
+    result = migrations.run(Migration())
+
+    assert (result.changed, result.conflicts) == (1, 0)
+    assert migrations.state(Migration())["status"] == "applied"
@@ -0,0 +1,74 @@
+import threading
+from functools import partial
+
+import pytest
+
+from ddbtools.access import TableAccess
+from ddbtools.codec import marshal
+from ddbtools.memory import MemoryTransport
+from ddbtools.scan import merge_pages, scan_segments
+
+TABLE = "test-main"
+
+
+def test_pages_arrive_before_their_stream_is_read_to_the_end():
+    first_seen = threading.Event()
+
+    def stream():
+        yield "first"
+        # Blocks until the consumer has the first page, so holding whole streams would hang
+        assert first_seen.wait(5)
+        yield "second"
+
+    merged = merge_pages([("a", stream)], workers=2)
+
+    assert next(merged) == ("a", "first")
+    first_seen.set()
+    assert list(merged) == [("a", "second")]
+
+
+def test_buffered_pages_are_bounded():
+    produced = []
+
+    def endless(name):
+        while True:
+            produced.append(name)
+            yield name
+
+    merged = merge_pages([("a", partial(endless, "a")), ("b", partial(endless, "b"))], workers=2,
+                         max_buffered_pages=4)
+    next(merged)
+    threading.Event().wait(0.3)
+
+    # The queue, plus one page in hand per worker
+    assert len(produced) <= 1 + 4 + 2
+    merged.close()
+
+
+def test_streams_keep_their_page_order_and_errors_propagate():
+    def pages(name, count, fail=False):
+        for i in range(count):
+            yield f"{name}{i}"
+        if fail:
+            raise RuntimeError(name)
+
+    merged = list(merge_pages([(n, partial(pages, n, 5)) for n in "abc"], workers=2))
+
+    for name in "abc":
+        assert [p for c, p in merged if c == name] == [f"{name}{i}" for i in range(5)]
+    with pytest.raises(RuntimeError):
+        list(merge_pages([("a", partial(pages, "a", 2, fail=True))]))
+
+
+def test_scan_segments_and_partition_queries_read_every_item():
+    transport = MemoryTransport()
+    items = [{"PK": f"CMS_COMPONENT#c{i}", "SK": f"CMS_COMPONENT#c{i}", "GSI1PK": f"PAGE#p{i % 5}",
+              "GSI1SK": f"ORDER#{i:03d}", "pageId": f"p{i % 5}"} for i in range(300)]
+    transport.load(TABLE, [marshal(i) for i in items])
+    access = TableAccess(transport, TABLE, segments=3)
+
+    pages = scan_segments(partial(transport.call, "Scan"), 3, TableName=TABLE, Limit=20)
+    scanned = [i for _, page in pages for i in page["Items"]]
+    queried = list(access.items("CMS_COMPONENT", ("PK",), pageId=[f"p{i}" for i in range(5)]))
+
+    assert len(scanned) == len(queried) == 300
@@ -0,0 +1,39 @@
+from ddbtools.codec import marshal
+from ddbtools.diff import item_digest
+from ddbtools.memory import MemoryTransport
+from ddbtools.snapshot import SnapshotWriter, load_manifest, read_snapshot
+
+TABLE = "test-main"
+
+ITEMS = [
+    {"PK": "USER#u1", "SK": "USER#u1", "avatar": b"\x89PNG\r\n\x00\xff", "keys": {b"a", b"\x00b"},
+     "profile": {"thumb": b"\x01\x02", "tags": ["x", b"\x03"]}, "note": 'says "B": here'},
+    {"PK": "ORDER#o1", "SK": "ORDER#o1", "total": 12, "isActive": True},
+]
+
+
+def test_binary_values_round_trip(tmp_path):
+    directory = str(tmp_path / "snap")
+    writer = SnapshotWriter(directory, compression="gzip")
+    for item in ITEMS:
+        writer.write(marshal(item))
+    writer.close()
+
+    assert load_manifest(directory)["items"] == 2
+    read = sorted(read_snapshot(directory), key=lambda i: i["PK"]["S"])
+    assert read == sorted((marshal(i) for i in ITEMS), key=lambda i: i["PK"]["S"])
+    assert read[1]["avatar"] == {"B": b"\x89PNG\r\n\x00\xff"}
+    assert [item_digest(i) for i in read] == [item_digest(marshal(i)) for i in sorted(ITEMS, key=lambda i: i["PK"])]
+
+
+def test_memory_transport_loads_binary_values_as_bytes(tmp_path):
+    directory = str(tmp_path / "snap")
+    writer = SnapshotWriter(directory, compression="none")
+    writer.write(marshal(ITEMS[0]))
+    writer.close()
+    transport = MemoryTransport()
+    transport.load_snapshot(TABLE, directory)
+
+    item = transport.call("GetItem", TableName=TABLE, Key={"PK": {"S": "USER#u1"}, "SK": {"S": "USER#u1"}})["Item"]
+
+    assert item == marshal(ITEMS[0])
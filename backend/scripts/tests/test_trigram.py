@@ -0,0 +1,27 @@
+from ddbtools.trigram import TrigramIndex
+
+
+def page(id, title, updated):
+    return {"id": id, "title": {"en": title, "hi": title}, "slug": id, "updatedAt": updated}
+
+
+def test_update_reindexes_only_changed_rows_and_drops_missing_ones(tmp_path):
+    with TrigramIndex(str(tmp_path / "trigrams.sqlite")) as index:
+        rows = [page("meditation", "Guided Meditation", "2026-01-01"),
+                page("yoga", "Morning Yoga", "2026-01-01")]
+        assert index.update("page.en", "CMS_PAGE", "en", rows) == (2, 0, 0)
+        assert index.update("page.en", "CMS_PAGE", "en", rows) == (0, 2, 0)
+
+        rows = [page("meditation", "Silent Meditation", "2026-02-01")]
+        assert index.update("page.en", "CMS_PAGE", "en", rows) == (1, 0, 1)
+        assert [doc for doc, _ in index.search("page.en", "silent")] == ["meditation"]
+        assert index.search("page.en", "yoga") == []
+
+        assert index.update("page.en", "CMS_PAGE", "en", rows, reindex_all=True) == (1, 0, 0)
+
+
+def test_fuzzy_search_tolerates_typos(tmp_path):
+    with TrigramIndex(str(tmp_path / "trigrams.sqlite")) as index:
+        index.update("page.en", "CMS_PAGE", "en", [page("meditation", "Guided Meditation", "2026-01-01")])
+
+        assert [doc for doc, _ in index.search("page.en", "medtation")] == ["meditation"]
@@ -20,6 +20,8 @@ interface ActivityLogEntity {
   GSI1SK: string;
   GSI2PK: string;
   GSI2SK: string;
+  GSI3PK: string;
+  GSI3SK: string;
   id: string;
   userId: string;
   userEmail: string;
@@ -30,8 +32,27 @@ interface ActivityLogEntity {
   metadata?: Record<string, any>;
   ipAddress?: string;
   createdAt: string;
+  ttl: number; // epoch seconds; DynamoDB TTL deletes the row after ACTIVITY_TTL_SECONDS
 }
 
+// Written by scripts/rollup-activity.py: counts of every activity up to `watermark`
+interface ActivityRollupTotalEntity {
+  PK: string;
+  SK: string;
+  total: number;
+  byEntityType: Record<string, number>;
+  byAction: Record<string, number>;
+  days: number;
+  watermark: string;
+  updatedAt: string;
+}
+
+const ROLLUP_TOTAL_KEY = 'ACTIVITY_ROLLUP#TOTAL';
+
+// Activity is kept for a year; getStats counts older rows through the rollups.
+// Rows written before this existed: scripts/expire-items.py activity
+const ACTIVITY_TTL_SECONDS = 365 * 24 * 60 * 60;
+
 @Injectable()
 export class ActivityLogService {
   private readonly logger = new Logger(ActivityLogService.name);
@@ -58,6 +79,8 @@ export class ActivityLogService {
         GSI1SK: `DATE#${now}`,
         GSI2PK: `ACTIVITY_USER#${data.userId}`,
         GSI2SK: `DATE#${now}`,
+        GSI3PK: `ACTIVITY_ENTITY#${data.entityType}`,
+        GSI3SK: `DATE#${now}`,
         id,
         userId: data.userId,
         userEmail: data.userEmail,
@@ -68,6 +91,7 @@ export class ActivityLogService {
         metadata: data.metadata,
         ipAddress: data.ipAddress,
         createdAt: now,
+        ttl: Math.floor(Date.now() / 1000) + ACTIVITY_TTL_SECONDS,
       };
 
       await this.databaseService.put(entity);
@@ -173,22 +197,35 @@ export class ActivityLogService {
   // ============================================
 
   async getStats(): Promise<ActivityLogStatsDto> {
-    const allItems = await this.databaseService.scan<ActivityLogEntity>(this.entityName);
-
-    const byEntityType: Record<string, number> = {};
-    const byAction: Record<string, number> = {};
-    const todayUsers = new Set<string>();
-
     const todayStart = new Date();
     todayStart.setHours(0, 0, 0, 0);
     const todayIso = todayStart.toISOString();
 
-    for (const item of allItems) {
-      // Count by entity type
-      byEntityType[item.entityType] = (byEntityType[item.entityType] || 0) + 1;
+    // Start from the rollup and only read what was logged since; without one, read everything
+    const rollup = await this.databaseService.get<ActivityRollupTotalEntity>(
+      ROLLUP_TOTAL_KEY,
+      ROLLUP_TOTAL_KEY,
+    );
+    const watermark = rollup?.watermark ?? '';
+    const items = rollup
+      ? await this.getLogsSince(watermark < todayIso ? watermark : todayIso)
+      : await this.databaseService.scan<ActivityLogEntity>(this.entityName);
+
+    let total = rollup?.total ?? 0;
+    const byEntityType: Record<string, number> = { ...rollup?.byEntityType };
+    const byAction: Record<string, number> = { ...rollup?.byAction };
+    const todayUsers = new Set<string>();
+
+    for (const item of items) {
+      if (item.createdAt > watermark) {
+        total += 1;
 
-      // Count by action
-      byAction[item.action] = (byAction[item.action] || 0) + 1;
+        // Count by entity type
+        byEntityType[item.entityType] = (byEntityType[item.entityType] || 0) + 1;
+
+        // Count by action
+        byAction[item.action] = (byAction[item.action] || 0) + 1;
+      }
 
       // Active users today
       if (item.createdAt >= todayIso) {
@@ -197,13 +234,31 @@ export class ActivityLogService {
     }
 
     return {
-      total: allItems.length,
+      total,
       byEntityType,
       byAction,
       activeUsersToday: todayUsers.size,
     };
   }
 
+  private async getLogsSince(since: string): Promise<ActivityLogEntity[]> {
+    const items: ActivityLogEntity[] = [];
+    let exclusiveStartKey: Record<string, any> | undefined;
+
+    do {
+      const result = await this.databaseService.query<ActivityLogEntity>(this.entityName, {
+        indexName: 'GSI1',
+        keyConditionExpression: 'GSI1PK = :pk AND GSI1SK > :since',
+        expressionAttributeValues: { ':pk': this.entityName, ':since': `DATE#${since}` },
+        exclusiveStartKey,
+      });
+      items.push(...result.items);
+      exclusiveStartKey = result.lastKey;
+    } while (exclusiveStartKey);
+
+    return items;
+  }
+
   // ============================================
   // Mapper
   // ============================================
@@ -43,6 +43,7 @@ interface CartItemEntity {
   stockStatus: string;
   createdAt: string;
   updatedAt: string;
+  ttl: number; // epoch seconds; refreshed on every change, see CART_TTL_SECONDS
 }
 
 interface ProductEntity {
@@ -76,6 +77,10 @@ interface UserAddressEntity {
   updatedAt: string;
 }
 
+// Cart items untouched this long are deleted by DynamoDB TTL.
+// Rows written before this existed: scripts/expire-items.py cart-items
+const CART_TTL_SECONDS = 90 * 24 * 60 * 60;
+
 @Injectable()
 export class CartService {
   private readonly logger = new Logger(CartService.name);
@@ -94,6 +99,11 @@ export class CartService {
     return variantId ? `ITEM#${productId}#${variantId}` : `ITEM#${productId}`;
   }
 
+  /** TTL (epoch seconds) of a cart line written now. */
+  private expiresAt(): number {
+    return Math.floor(Date.now() / 1000) + CART_TTL_SECONDS;
+  }
+
   async addToCart(userId: string, dto: AddToCartDto): Promise<CartResponseDto> {
     const quantity = dto.quantity || 1;
 
@@ -148,13 +158,15 @@ export class CartService {
       await this.databaseService.update('CART', {
         key: { PK: `CART#${userId}`, SK: sk },
         updateExpression:
-          'SET quantity = :qty, updatedAt = :now, price = :price, title = :title, stockStatus = :stockStatus',
+          'SET quantity = :quantity, updatedAt = :updatedAt, price = :price, title = :title, stockStatus = :stockStatus, #ttl = :ttl',
+        expressionAttributeNames: { '#ttl': 'ttl' },
         expressionAttributeValues: {
-          ':qty': newQty,
-          ':now': now,
+          ':quantity': newQty,
+          ':updatedAt': now,
           ':price': price,
           ':title': product.title,
           ':stockStatus': product.stockStatus,
+          ':ttl': this.expiresAt(),
         },
       });
     } else {
@@ -182,6 +194,7 @@ export class CartService {
         stockStatus: product.stockStatus,
         createdAt: now,
         updatedAt: now,
+        ttl: this.expiresAt(),
       };
 
       await this.databaseService.put(cartItem);
@@ -242,10 +255,12 @@ export class CartService {
 
     await this.databaseService.update('CART', {
       key: { PK: `CART#${userId}`, SK: sk },
-      updateExpression: 'SET quantity = :qty, updatedAt = :now',
+      updateExpression: 'SET quantity = :quantity, updatedAt = :updatedAt, #ttl = :ttl',
+      expressionAttributeNames: { '#ttl': 'ttl' },
       expressionAttributeValues: {
-        ':qty': dto.quantity,
-        ':now': new Date().toISOString(),
+        ':quantity': dto.quantity,
+        ':updatedAt': new Date().toISOString(),
+        ':ttl': this.expiresAt(),
       },
     });
 